@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the catalog-scale mass loss engines.
+
+Measures the vectorized calculate_mass_loss_batch and the scaling of the process-pool runner
+(exoplanet_loss.batch.run_parallel) from 1 to N workers on a synthetic catalog.
+
+Usage:
+    python benchmarks/benchmark_batch.py [--planets 6000] [--max-workers N] [--chunk-size 64]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from exoplanet_loss.batch import run_parallel
+from exoplanet_loss.calculador_final import calculate_mass_loss_batch
+
+
+def synthetic_catalog(num_planets, seed=0):
+    """Random but physically plausible planets, as a dict of columns."""
+    rng = np.random.default_rng(seed)
+    return {
+        "Restrela": rng.uniform(0.3, 2.0, num_planets),  # Solar radii
+        "Mestrela": rng.uniform(0.3, 2.0, num_planets),  # Solar masses
+        "t_gyr": rng.uniform(0.5, 10.0, num_planets),  # Gyr
+        "RplanetaEarth": rng.uniform(1.0, 20.0, num_planets),  # Earth radii
+        "MplanetaEarth": rng.uniform(1.0, 300.0, num_planets),  # Earth masses
+        "EixoMaiorPlaneta": rng.uniform(0.01, 2.0, num_planets),  # AU
+        "Excentricidade": rng.uniform(0.0, 0.3, num_planets),  # Eccentricity
+    }
+
+
+def timed(function, *args, **kwargs):
+    """Run function and return its wall-clock time in seconds."""
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--planets", type=int, default=6000, help="number of synthetic planets")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="largest worker count to time")
+    parser.add_argument("--chunk-size", type=int, default=64, help="planets per chunk")
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.planets)
+
+    elapsed = timed(calculate_mass_loss_batch, catalog)
+    print(f"calculate_mass_loss_batch: {args.planets} planets in {elapsed:.3f} s")
+
+    print(f"run_parallel (chunk_size={args.chunk_size}, {os.cpu_count()} CPUs):")
+    print(f"{'workers':>8} {'seconds':>10} {'planets/s':>12} {'speedup':>8}")
+    baseline = None
+    # Powers of two up to the maximum, and the maximum itself even if it is not a power of two
+    worker_counts = sorted({2 ** k for k in range(args.max_workers.bit_length())} | {args.max_workers})
+    for workers in worker_counts:
+        elapsed = timed(run_parallel, catalog, workers=workers, chunk_size=args.chunk_size)
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.3f} {args.planets / elapsed:>12.1f} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
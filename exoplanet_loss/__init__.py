@@ -6,7 +6,9 @@ from exoplanet_loss.calculators import (
     PhotoevaporationMassLossCalculator,
     calculate_photoevaporation_mass_loss,
     TotalMassLossCalculator,
-    calculate_total_mass_loss
+    calculate_total_mass_loss,
+    calculate_mass_loss_rates,
+    evolve_mass_loss
 )
 
 __all__ = [
@@ -17,5 +19,7 @@ __all__ = [
     'PhotoevaporationMassLossCalculator',
     'calculate_photoevaporation_mass_loss',
     'TotalMassLossCalculator',
-    'calculate_total_mass_loss'
+    'calculate_total_mass_loss',
+    'calculate_mass_loss_rates',
+    'evolve_mass_loss'
 ]
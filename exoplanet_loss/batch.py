@@ -0,0 +1,217 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from exoplanet_loss.calculador_final import BATCH_COLUMNS, Rsun, Msun, Rearth, Mearth
+from exoplanet_loss.calculators.total_mass_loss_calculator import calculate_total_mass_loss
+from exoplanet_loss.utils.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Default number of planets sent to a worker at a time
+DEFAULT_CHUNK_SIZE = 64
+
+# Result fields of calculate_total_mass_loss_row
+RESULT_COLUMNS = [
+    "total_mass_loss", "total_mass_loss_percent",
+    "wind_mass_loss", "wind_mass_loss_percent",
+    "photoevap_mass_loss", "photoevap_mass_loss_percent"
+]
+
+# Catalog column naming the host star; planets of the same host share the stellar calculations
+HOST_COLUMN = "hostname"
+STAR_COLUMNS = ["Restrela", "Mestrela", "t_gyr"]
+
+
+def calculate_total_mass_loss_row(row, efficiency_factor=0.3, min_age=0.01, max_age=None):
+    """
+    Calculate the total mass loss of one planet given as a row of a catalog.
+
+    Parameters:
+        row (dict): Planet with the fields Restrela, Mestrela, t_gyr, RplanetaEarth,
+            MplanetaEarth, EixoMaiorPlaneta and Excentricidade
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
+        min_age (float, optional): Minimum age in Gyr. Defaults to 0.01.
+        max_age (float, optional): Maximum age in Gyr. Defaults to the age of the system (t_gyr).
+
+    Returns:
+        dict: total_mass_loss, wind_mass_loss and photoevap_mass_loss in g, and the
+            corresponding *_percent values as percentage of the planet mass
+    """
+    planet_mass = row["MplanetaEarth"] * Mearth
+    total_mass_loss, wind_mass_loss, photoevap_mass_loss, _ = calculate_total_mass_loss(
+        planet_radius_cm=row["RplanetaEarth"] * Rearth,
+        planet_mass_g=planet_mass,
+        planet_orbital_distance_au=row["EixoMaiorPlaneta"],
+        eccentricity=row["Excentricidade"],
+        stellar_radius_cm=row["Restrela"] * Rsun,
+        stellar_mass_kg=row["Mestrela"] * Msun,
+        efficiency_factor=efficiency_factor,
+        min_age=min_age,
+        max_age=row["t_gyr"] if max_age is None else max_age
+    )
+
+    return {
+        "total_mass_loss": float(total_mass_loss),
+        "total_mass_loss_percent": float(total_mass_loss / planet_mass * 100),
+        "wind_mass_loss": float(wind_mass_loss),
+        "wind_mass_loss_percent": float(wind_mass_loss / planet_mass * 100),
+        "photoevap_mass_loss": float(photoevap_mass_loss),
+        "photoevap_mass_loss_percent": float(photoevap_mass_loss / planet_mass * 100),
+    }
+
+
+def calculate_system_total_mass_loss_rows(rows, efficiency_factor=0.3, min_age=0.01, max_age=None):
+    """
+    Calculate the total mass loss of the planets of one host star in a single vectorized pass.
+
+    The stellar time series is calculated once and every planet is evaluated against it, which
+    gives the same results as calling calculate_total_mass_loss_row for each planet.
+
+    Parameters:
+        rows (list): Planets of one star, as dictionaries with the fields of calculate_total_mass_loss_row.
+            The stellar fields (Restrela, Mestrela, t_gyr) are taken from the first row.
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
+        min_age (float, optional): Minimum age in Gyr. Defaults to 0.01.
+        max_age (float, optional): Maximum age in Gyr. Defaults to the age of the system (t_gyr).
+
+    Returns:
+        list: One dictionary per planet with the fields of calculate_total_mass_loss_row
+    """
+    star = rows[0]
+    planet_mass = np.array([row["MplanetaEarth"] for row in rows], dtype=float) * Mearth
+    total_mass_loss, wind_mass_loss, photoevap_mass_loss, _ = calculate_total_mass_loss(
+        planet_radius_cm=np.array([[row["RplanetaEarth"]] for row in rows], dtype=float) * Rearth,
+        planet_mass_g=planet_mass[:, None],
+        planet_orbital_distance_au=np.array([[row["EixoMaiorPlaneta"]] for row in rows], dtype=float),
+        eccentricity=np.array([[row["Excentricidade"]] for row in rows], dtype=float),
+        stellar_radius_cm=star["Restrela"] * Rsun,
+        stellar_mass_kg=star["Mestrela"] * Msun,
+        efficiency_factor=efficiency_factor,
+        min_age=min_age,
+        max_age=star["t_gyr"] if max_age is None else max_age
+    )
+
+    return [
+        {
+            "total_mass_loss": float(total_mass_loss[i]),
+            "total_mass_loss_percent": float(total_mass_loss[i] / planet_mass[i] * 100),
+            "wind_mass_loss": float(wind_mass_loss[i]),
+            "wind_mass_loss_percent": float(wind_mass_loss[i] / planet_mass[i] * 100),
+            "photoevap_mass_loss": float(photoevap_mass_loss[i]),
+            "photoevap_mass_loss_percent": float(photoevap_mass_loss[i] / planet_mass[i] * 100),
+        }
+        for i in range(len(rows))
+    ]
+
+
+def run_parallel(inputs, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, efficiency_factor=0.3, min_age=0.01, max_age=None):
+    """
+    Calculate the total mass loss of many planets on a pool of worker processes.
+
+    The planets are split into chunks of about chunk_size rows, each chunk is processed by one worker,
+    and the results are merged back in input order. When the rows have a hostname column, planets
+    of the same host star are kept in the same chunk and calculated together (see
+    calculate_system_total_mass_loss_rows). An exception raised by one planet is recorded in that
+    planet's "error" field instead of aborting the whole run.
+
+    Parameters:
+        inputs (list, pandas.DataFrame or dict): Planets to process, as a list of dictionaries,
+            a DataFrame or a dict of columns, with the fields of calculate_total_mass_loss_row
+        workers (int, optional): Number of worker processes. With 1 the chunks are processed in
+            this process. Defaults to the number of CPUs.
+        chunk_size (int, optional): Number of planets per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
+        min_age (float, optional): Minimum age in Gyr. Defaults to 0.01.
+        max_age (float, optional): Maximum age in Gyr. Defaults to each planet's t_gyr.
+
+    Returns:
+        list: One dictionary per input planet, in input order, with the input fields, the
+            results of calculate_total_mass_loss_row and an "error" field (None on success)
+    """
+    rows = _to_rows(inputs)
+    workers = workers or os.cpu_count() or 1
+
+    # Fill each chunk with whole systems, so the planets of a star are never split between workers
+    chunk_indices = [[]]
+    for group in _group_by_host(rows):
+        if len(chunk_indices[-1]) >= chunk_size:
+            chunk_indices.append([])
+        chunk_indices[-1].extend(group)
+    chunk_indices = [indices for indices in chunk_indices if indices]
+    chunks = [[rows[i] for i in indices] for indices in chunk_indices]
+    options = {"efficiency_factor": efficiency_factor, "min_age": min_age, "max_age": max_age}
+
+    logger.info(f"Processing {len(rows)} planets in {len(chunks)} chunks with {workers} workers")
+
+    if workers == 1:
+        chunk_results = [_run_chunk(chunk, options) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_results = list(executor.map(_run_chunk, chunks, [options] * len(chunks)))
+
+    results = [None] * len(rows)
+    for indices, chunk in zip(chunk_indices, chunk_results):
+        for i, result in zip(indices, chunk):
+            results[i] = result
+    return results
+
+
+def _to_rows(inputs):
+    """Convert a DataFrame, a dict of columns or a list of dictionaries to a list of dictionaries."""
+    if isinstance(inputs, pd.DataFrame):
+        return inputs.to_dict("records")
+    if isinstance(inputs, dict):
+        return pd.DataFrame(inputs).to_dict("records")
+    return list(inputs)
+
+
+def _group_by_host(rows):
+    """
+    Indices of the rows grouped by host star, in order of first appearance.
+
+    Rows are grouped when they have the same hostname and the same stellar fields. Rows without a
+    hostname or with missing fields form groups of their own.
+    """
+    groups = {}
+    for i, row in enumerate(rows):
+        host = row.get(HOST_COLUMN)
+        if pd.isna(host) or any(field not in row for field in BATCH_COLUMNS):
+            key = ("row", i)
+        else:
+            key = (host,) + tuple(row[field] for field in STAR_COLUMNS)
+        groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+
+def _run_chunk(rows, options):
+    """Process one chunk of planets, system by system, capturing per-planet failures."""
+    results = [None] * len(rows)
+    for group in _group_by_host(rows):
+        if len(group) > 1:
+            try:
+                system_results = calculate_system_total_mass_loss_rows([rows[i] for i in group], **options)
+                for i, system_result in zip(group, system_results):
+                    results[i] = {**rows[i], **system_result, "error": None}
+                continue
+            except Exception as e:
+                # Fall back to one planet at a time so only the failing planets get an error
+                logger.warning(f"System calculation failed for {rows[group[0]][HOST_COLUMN]}: {str(e)}")
+
+        for i in group:
+            row = rows[i]
+            result = dict(row)
+            try:
+                missing_fields = [field for field in BATCH_COLUMNS if field not in row]
+                if missing_fields:
+                    raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+                result.update(calculate_total_mass_loss_row(row, **options))
+                result["error"] = None
+            except Exception as e:
+                logger.warning(f"Mass loss calculation failed for {row}: {str(e)}")
+                result["error"] = str(e)
+            results[i] = result
+    return results
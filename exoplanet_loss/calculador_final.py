@@ -1,10 +1,15 @@
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from scipy.integrate import simpson
+
 from exoplanet_loss.calculators.densidade_wind_stellar import rho_w, generate_density_vs_distance_data
-from exoplanet_loss.calculators.lx_age_calculator import LxAgeFxCalculator
-from exoplanet_loss.calculators.photoevap_calculator import PhotoevaporationCalculator
-from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import generate_velocity_vs_distance_data
+from exoplanet_loss.calculators.lx_age_calculator import LxAgeFxCalculator, calculate_xray_luminosity, calculate_coronal_temperature_and_fx
+from exoplanet_loss.calculators.photoevap_calculator import calculo_perda_fotoevaporacao, G
+from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import generate_velocity_vs_distance_data, wind_velocity_at
 from exoplanet_loss.calculators.txc_mass_loss_stellar_wind import calcular_taxa_perda_de_massa_interacao_vento_solar
-from exoplanet_loss.calculators.stellar_wind_mass_loss_calculator import StellarWindMassLossCalculator
-from exoplanet_loss.calculators.photoevaporation_mass_loss_calculator import PhotoevaporationMassLossCalculator
+from exoplanet_loss.calculators.total_mass_loss_calculator import calculate_mass_loss_rates
 from exoplanet_loss.utils.logging import get_logger
 
 # Get logger for this module
@@ -16,6 +21,23 @@ Msun = 1.98e30  # kg
 Rearth = 6.371e8  # cm
 Mearth = 5.97e27  # grams
 AU = 1.496e11 * 100  # 1 AU in cm
+SEC_PER_GYR = 3.1536e16  # seconds in 1 Gyr
+
+# Ages (in Gyr) at which the wind and photoevaporation calculators integrate the mass loss
+INTEGRATION_AGES = np.array([0.1, 0.3, 0.65, 1.6, 4.56, 6.7])
+
+# Input columns of calculate_mass_loss_batch
+BATCH_COLUMNS = [
+    "Restrela", "Mestrela", "t_gyr", "RplanetaEarth", "MplanetaEarth",
+    "EixoMaiorPlaneta", "Excentricidade"
+]
+
+# Result columns of calculate_mass_loss_batch
+BATCH_RESULT_COLUMNS = [
+    "lx", "t_cor", "fx", "velicidade_vento_estelar", "densidade_vento_estelar",
+    "txmass_loss_photoev", "txmass_loss_wind", "mass_loss_photoev", "mass_loss_photoev_percent",
+    "mass_loss_wind", "mass_loss_wind_percent", "total_mass_loss", "total_mass_loss_percent"
+]
 
 def calculate_mass_loss(star_data, planet_data, efficiency_factor=0.3, initial_velocity=5e3):
     """
@@ -35,7 +57,10 @@ def calculate_mass_loss(star_data, planet_data, efficiency_factor=0.3, initial_v
         initial_velocity (float, optional): Initial guess velocity [m/s] for stellar wind calculation. Defaults to 5e3 m/s.
 
     Returns:
-        dict: Dictionary containing mass loss results
+        MassLossResult: Read-only mapping containing mass loss results, used like a dictionary.
+        The integrals are calculated up front; the plotting profiles (density_vs_distance,
+        velocity_vs_distance) and time series (stellar_wind_mass_loss, photoevaporation_mass_loss)
+        are built the first time they are read.
             - lx: X-ray luminosity in erg/s
             - t_cor: Coronal temperature in K
             - mass_loss_photoev: Mass loss due to photoevaporation in g
@@ -44,121 +69,339 @@ def calculate_mass_loss(star_data, planet_data, efficiency_factor=0.3, initial_v
             - mass_loss_wind_percent: Mass loss due to stellar wind as percentage of planet mass
             - total_mass_loss: Total mass loss in g
             - total_mass_loss_percent: Total mass loss as percentage of planet mass
+
+    Raises:
+        ValueError: If the star or planet is missing required fields
     """
-    # Extract data
-    Restrela = star_data["Restrela"]  # Solar radii
-    Mestrela = star_data["Mestrela"]  # Solar masses
-    t_gyr = star_data["t_gyr"]  # Gyr
+    # The stages of the calculation live in MassLossSession, which imports the constants of this module
+    from exoplanet_loss.session import MassLossSession, PLANET_INPUTS, STAR_INPUTS
 
-    RplanetaEarth = planet_data["RplanetaEarth"]  # Earth radii
-    MplanetaEarth = planet_data["MplanetaEarth"]  # Earth masses
-    EixoMaiorPlaneta = planet_data["EixoMaiorPlaneta"]  # AU
-    Excentricidade = planet_data["Excentricidade"]  # Eccentricity
+    # Other fields of the dictionaries (e.g. names from get_exoplanet_data) are ignored
+    star_data = {name: star_data[name] for name in STAR_INPUTS if name in star_data}
+    planet_data = {name: planet_data[name] for name in PLANET_INPUTS if name in planet_data}
+    return MassLossSession(star_data, planet_data, efficiency_factor, initial_velocity).results()
 
-    # Calculate X-ray luminosity and coronal temperature
-    lx_age_fx = LxAgeFxCalculator(t_gyr, Restrela * Rsun)
-    lx, t_cor,fx = lx_age_fx.getLx(), lx_age_fx.getTCor(),lx_age_fx.fx
+class MassLossResult(Mapping):
+    """
+    Read-only mapping of mass loss results whose expensive sections are computed on demand.
 
-    # Calculate mass loss due to photoevaporation
-    n = efficiency_factor
-    photoEvp = PhotoevaporationCalculator(n, lx, RplanetaEarth * Rearth, MplanetaEarth * Mearth,
-                                         EixoMaiorPlaneta * AU, Excentricidade)
-    txmLossPhoto = photoEvp.get()
-
-    # Calculate integrated photoevaporation mass loss over time
-    photoevap_mass_loss_calculator = PhotoevaporationMassLossCalculator(
-        planet_radius_cm=RplanetaEarth * Rearth,
-        planet_mass_g=MplanetaEarth * Mearth,
-        planet_orbital_distance_cm=EixoMaiorPlaneta * AU,
-        eccentricity=Excentricidade,
-        efficiency_factor=n
-    )
+    Values are given either directly or as functions without arguments. A function is called the
+    first time its key is read, and its value is kept for later reads. Iterating over items() or
+    converting with dict() computes every section.
 
-    # Get total photoevaporation mass loss and additional data
-    mLossPhoto, photo_mass_loss_rates, photo_x_ray_luminosities = photoevap_mass_loss_calculator.calculate_mass_loss()
+    Parameters:
+        values (dict): Result values, or functions returning them, in key order
+    """
 
-    # Calculate percentage of planet mass lost due to photoevaporation
-    mLossPhotoPercent = (mLossPhoto / (MplanetaEarth * Mearth)) * 100
+    def __init__(self, values):
+        self._values = dict(values)
+        self._pending = {key for key, value in self._values.items() if callable(value)}
 
-    # Calculate mass loss due to stellar wind
-    d_w = rho_w(Restrela *AU/ Rsun, t_gyr)
+    def __getitem__(self, key):
+        value = self._values[key]
+        if key in self._pending:
+            value = self._values[key] = value()
+            self._pending.discard(key)
+        return value
 
-    # Generate velocity vs distance data for plotting
-    r_min_au = 0.005  # Minimum radius in AU
-    vel_distances, velocities, veloc, final_initial_velocity = generate_velocity_vs_distance_data(T_corona=t_cor, r_planeta_au=EixoMaiorPlaneta,
-                                                                 r_min_au=r_min_au, r_max_au=(EixoMaiorPlaneta*4),
-                                                                 Mstar=Mestrela*Msun, v_initial_at_start=initial_velocity,
-                                                                 num_points=1000)
-
-    # Calculate instantaneous mass loss rate
-    txmLossWind = calcular_taxa_perda_de_massa_interacao_vento_solar(RplanetaEarth * Rearth, d_w, veloc *1000)
-
-    # Calculate integrated mass loss over time using the new calculator
-    wind_mass_loss_calculator = StellarWindMassLossCalculator(
-        planet_radius_cm=RplanetaEarth * Rearth,
-        planet_orbital_distance_au=EixoMaiorPlaneta,
-        stellar_radius_cm=Restrela * Rsun,
-        stellar_mass_kg=Mestrela * Msun
-    )
+    def __iter__(self):
+        return iter(self._values)
 
-    # Get total mass loss and additional data
-    mLossWind, mass_loss_rates, _, wind_velocities, wind_densities = wind_mass_loss_calculator.calculate_mass_loss()
+    def __len__(self):
+        return len(self._values)
 
-    # Calculate percentage of planet mass lost
-    mLossWindPercent = (mLossWind / (MplanetaEarth * Mearth)) * 100
+    def is_computed(self, key):
+        """
+        Whether the value of key is already available without computing it.
 
-    # Calculate total mass loss
-    totalMassLoss = mLossWind + mLossPhoto
-    totalMassLossPercent = (totalMassLoss / (MplanetaEarth * Mearth)) * 100
+        Parameters:
+            key (str): Result key
 
-    # Generate density vs distance data for plotting
-    # Convert AU to solar radii (1 AU = 215 Rsun)
-    r_min_solar = 0.005 * AU /Rsun  # Convert from AU to solar radii
-    r_max_solar = 1.5 * AU /Rsun     # Convert from AU to solar radii
-    distances, densities = generate_density_vs_distance_data(r_min=r_min_solar, r_max=r_max_solar, num_points=1000)
+        Returns:
+            bool: False if reading key would compute its section
+        """
+        return key in self._values and key not in self._pending
+
+    def to_dict(self):
+        """
+        Compute every section and return the results as a plain dictionary.
+
+        Returns:
+            dict: All results, e.g. for JSON serialization
+        """
+        return dict(self)
+
+    def __repr__(self):
+        shown = ", ".join(f"{key!r}: {self._values[key]!r}" if self.is_computed(key) else f"{key!r}: <not computed>"
+                          for key in self._values)
+        return f"{type(self).__name__}({{{shown}}})"
 
-    # Return results
-    return {
-        "idade_estrela": t_gyr,
-        "fator_de_eficiencia": n,
-        "velocidade_inicial": final_initial_velocity,
+def calculate_mass_loss_batch(table, efficiency_factor=0.3):
+    """
+    Calculate mass loss for many planets at once with array kernels.
+
+    Gives the same numbers as calling calculate_mass_loss for every row, without the plotting
+    profiles and without a Python loop over planets.
+
+    Parameters:
+        table (pandas.DataFrame or dict): One row per planet, with the columns
+            Restrela, Mestrela, t_gyr, RplanetaEarth, MplanetaEarth, EixoMaiorPlaneta and
+            Excentricidade (same units as star_data and planet_data in calculate_mass_loss).
+            A dict maps each column name to an array.
+        efficiency_factor (float or array-like, optional): Efficiency factor for photoevaporation
+            calculation, for all planets or per planet. Defaults to 0.3.
+
+    Returns:
+        pandas.DataFrame or dict: Columnar results with the same keys as the scalar values of
+            calculate_mass_loss: lx, t_cor, fx, velicidade_vento_estelar, densidade_vento_estelar,
+            txmass_loss_photoev, txmass_loss_wind, mass_loss_photoev, mass_loss_photoev_percent,
+            mass_loss_wind, mass_loss_wind_percent, total_mass_loss and total_mass_loss_percent.
+            A DataFrame (with the input index) is returned when a DataFrame is passed in,
+            otherwise a dict of arrays.
+
+    Raises:
+        ValueError: If the table is missing required columns
+    """
+    missing_fields = [field for field in BATCH_COLUMNS if field not in table]
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    columns = {field: np.asarray(table[field], dtype=float) for field in BATCH_COLUMNS}
+    n = np.asarray(efficiency_factor, dtype=float)
+
+    if columns["t_gyr"].size == 0:
+        # No planets: empty result columns, so empty inputs still give a table with every column
+        results = {key: np.empty(0) for key in BATCH_RESULT_COLUMNS}
+        if isinstance(table, pd.DataFrame):
+            return pd.DataFrame(results, index=table.index)
+        return results
+
+    stellar_radius = columns["Restrela"] * Rsun
+    stellar_mass = columns["Mestrela"] * Msun
+    t_gyr = columns["t_gyr"]
+    planet_radius = columns["RplanetaEarth"] * Rearth
+    planet_mass = columns["MplanetaEarth"] * Mearth
+    distance_au = columns["EixoMaiorPlaneta"]
+    eccentricity = columns["Excentricidade"]
+
+    # Instantaneous quantities at the age of the system
+    lx = calculate_xray_luminosity(t_gyr)
+    t_cor, fx = calculate_coronal_temperature_and_fx(lx, stellar_radius)
+    txmLossPhoto = calculo_perda_fotoevaporacao(n, lx, planet_radius, G, planet_mass, distance_au * AU, eccentricity)
+    veloc = wind_velocity_at(distance_au, t_cor, stellar_mass)
+    d_w = rho_w(columns["Restrela"] * AU / Rsun, t_gyr)
+    txmLossWind = calcular_taxa_perda_de_massa_interacao_vento_solar(planet_radius, d_w, veloc * 1000)
+
+    # Rates at the integration ages, one row per planet, integrated along the age axis
+    history = calculate_mass_loss_rates(
+        INTEGRATION_AGES, planet_radius[:, None], planet_mass[:, None], distance_au[:, None],
+        eccentricity[:, None], stellar_radius[:, None], stellar_mass[:, None], np.reshape(n, np.shape(n) + (1,))
+    )
+    ages_seconds = INTEGRATION_AGES * SEC_PER_GYR
+    mLossPhoto = simpson(history["photoevap_mass_loss_rates"], x=ages_seconds, axis=-1)
+    mLossWind = simpson(history["wind_mass_loss_rates"], x=ages_seconds, axis=-1)
+    totalMassLoss = mLossWind + mLossPhoto
+
+    results = {
         "lx": lx,
         "t_cor": t_cor,
-        "fx":fx,
+        "fx": fx,
         "velicidade_vento_estelar": veloc,
+        "densidade_vento_estelar": d_w,
         "txmass_loss_photoev": txmLossPhoto,
-        "mass_loss_photoev": mLossPhoto,
-        "mass_loss_photoev_percent": mLossPhotoPercent,
         "txmass_loss_wind": txmLossWind,
+        "mass_loss_photoev": mLossPhoto,
+        "mass_loss_photoev_percent": (mLossPhoto / planet_mass) * 100,
         "mass_loss_wind": mLossWind,
-        "mass_loss_wind_percent": mLossWindPercent,
+        "mass_loss_wind_percent": (mLossWind / planet_mass) * 100,
         "total_mass_loss": totalMassLoss,
-        "total_mass_loss_percent": totalMassLossPercent,
-        "planet_distance": EixoMaiorPlaneta,
-        "densidade_vento_estelar": d_w,
-        "density_vs_distance": {
-            "distances": distances,
-            "densities": densities
-        },
-        "velocity_vs_distance": {
-            "t_cor": t_cor,
-            "velocity":veloc,
-            "distance": EixoMaiorPlaneta,
-            "distances": vel_distances,
-            "velocities": velocities
-        },
-        "stellar_wind_mass_loss": {
-            "ages": wind_mass_loss_calculator.ages.tolist(),
-            "mass_loss_rates": mass_loss_rates.tolist(),
-            "wind_velocities": wind_velocities.tolist(),
-            "wind_densities": wind_densities.tolist()
-        },
-        "photoevaporation_mass_loss": {
-            "ages": photoevap_mass_loss_calculator.ages.tolist(),
-            "mass_loss_rates": photo_mass_loss_rates.tolist(),
-            "x_ray_luminosities": photo_x_ray_luminosities.tolist()
-        }
+        "total_mass_loss_percent": (totalMassLoss / planet_mass) * 100,
     }
+    results = {key: np.broadcast_to(value, t_gyr.shape).copy() for key, value in results.items()}
+
+    if isinstance(table, pd.DataFrame):
+        return pd.DataFrame(results, index=table.index)
+    return results
+
+def calculate_system_mass_loss(star_data, planets, efficiency_factor=0.3, initial_velocity=5e3):
+    """
+    Calculate mass loss for every planet of one star, sharing the stellar work between them.
+
+    The X-ray luminosity, coronal temperature and wind velocity profile depend only on the star,
+    so they are calculated once per age for the whole system, and every planet's orbital distance
+    is evaluated against the same profile. Each planet gets the same results as calculate_mass_loss,
+    except that velocity_vs_distance holds one profile for the whole system, spanning out to four
+    times the widest orbit.
+
+    Parameters:
+        star_data (dict): Stellar properties, as in calculate_mass_loss
+        planets (list): One dictionary of planet properties per planet, as planet_data in calculate_mass_loss
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation calculation. Defaults to 0.3.
+        initial_velocity (float, optional): Initial guess velocity [m/s] for stellar wind calculation. Defaults to 5e3 m/s.
+
+    Returns:
+        list: One dictionary of results per planet, in input order, with the keys of calculate_mass_loss
+
+    Raises:
+        ValueError: If the star or a planet is missing required fields
+    """
+    missing_fields = [field for field in ("Restrela", "Mestrela", "t_gyr") if field not in star_data]
+    missing_fields += sorted({field for planet_data in planets
+                              for field in ("RplanetaEarth", "MplanetaEarth", "EixoMaiorPlaneta", "Excentricidade")
+                              if field not in planet_data})
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+    if not planets:
+        return []
+
+    Restrela = star_data["Restrela"]  # Solar radii
+    Mestrela = star_data["Mestrela"]  # Solar masses
+    t_gyr = star_data["t_gyr"]  # Gyr
+    n = efficiency_factor
+
+    planet_radius = np.array([planet_data["RplanetaEarth"] for planet_data in planets], dtype=float) * Rearth
+    planet_mass = np.array([planet_data["MplanetaEarth"] for planet_data in planets], dtype=float) * Mearth
+    distance_au = np.array([planet_data["EixoMaiorPlaneta"] for planet_data in planets], dtype=float)
+    eccentricity = np.array([planet_data["Excentricidade"] for planet_data in planets], dtype=float)
+
+    logger.info(f"Calculating mass loss for a system of {len(planets)} planets")
+
+    # Stellar quantities at the age of the system, shared by every planet
+    lx_age_fx = LxAgeFxCalculator(t_gyr, Restrela * Rsun)
+    lx, t_cor, fx = lx_age_fx.getLx(), lx_age_fx.getTCor(), lx_age_fx.fx
+    d_w = rho_w(Restrela * AU / Rsun, t_gyr)
+
+    # One wind velocity profile for the system, evaluated at every orbit
+    r_min_au = 0.005  # Minimum radius in AU
+    vel_distances, velocities, _, final_initial_velocity = generate_velocity_vs_distance_data(
+        T_corona=t_cor, r_planeta_au=distance_au.max(), r_min_au=r_min_au, r_max_au=distance_au.max() * 4,
+        Mstar=Mestrela * Msun, v_initial_at_start=initial_velocity, num_points=1000)
+    veloc = wind_velocity_at(distance_au, t_cor, Mestrela * Msun)
+
+    txmLossPhoto = calculo_perda_fotoevaporacao(n, lx, planet_radius, G, planet_mass, distance_au * AU, eccentricity)
+    txmLossWind = calcular_taxa_perda_de_massa_interacao_vento_solar(planet_radius, d_w, veloc * 1000)
+
+    # Rates at the integration ages: the stellar time series is calculated once (the star parameters
+    # are scalars) and broadcast against one row per planet
+    history = calculate_mass_loss_rates(
+        INTEGRATION_AGES, planet_radius[:, None], planet_mass[:, None], distance_au[:, None],
+        eccentricity[:, None], Restrela * Rsun, Mestrela * Msun, n
+    )
+    ages_seconds = INTEGRATION_AGES * SEC_PER_GYR
+    mLossPhoto = simpson(history["photoevap_mass_loss_rates"], x=ages_seconds, axis=-1)
+    mLossWind = simpson(history["wind_mass_loss_rates"], x=ages_seconds, axis=-1)
+    totalMassLoss = mLossWind + mLossPhoto
+
+    # Density profile for plotting, which depends on neither the star nor the planet
+    r_min_solar = 0.005 * AU / Rsun  # Convert from AU to solar radii
+    r_max_solar = 1.5 * AU / Rsun  # Convert from AU to solar radii
+    distances, densities = generate_density_vs_distance_data(r_min=r_min_solar, r_max=r_max_solar, num_points=1000)
+
+    results = []
+    for i in range(len(planets)):
+        results.append({
+            "idade_estrela": t_gyr,
+            "fator_de_eficiencia": n,
+            "velocidade_inicial": final_initial_velocity,
+            "lx": lx,
+            "t_cor": t_cor,
+            "fx": fx,
+            "velicidade_vento_estelar": float(veloc[i]),
+            "txmass_loss_photoev": float(txmLossPhoto[i]),
+            "mass_loss_photoev": float(mLossPhoto[i]),
+            "mass_loss_photoev_percent": float(mLossPhoto[i] / planet_mass[i] * 100),
+            "txmass_loss_wind": float(txmLossWind[i]),
+            "mass_loss_wind": float(mLossWind[i]),
+            "mass_loss_wind_percent": float(mLossWind[i] / planet_mass[i] * 100),
+            "total_mass_loss": float(totalMassLoss[i]),
+            "total_mass_loss_percent": float(totalMassLoss[i] / planet_mass[i] * 100),
+            "planet_distance": float(distance_au[i]),
+            "densidade_vento_estelar": d_w,
+            "density_vs_distance": {
+                "distances": distances,
+                "densities": densities
+            },
+            "velocity_vs_distance": {
+                "t_cor": t_cor,
+                "velocity": float(veloc[i]),
+                "distance": float(distance_au[i]),
+                "distances": vel_distances,
+                "velocities": velocities
+            },
+            "stellar_wind_mass_loss": {
+                "ages": INTEGRATION_AGES.tolist(),
+                "mass_loss_rates": history["wind_mass_loss_rates"][i].tolist(),
+                "wind_velocities": history["wind_velocities"][i].tolist(),
+                "wind_densities": history["wind_densities"][i].tolist()
+            },
+            "photoevaporation_mass_loss": {
+                "ages": INTEGRATION_AGES.tolist(),
+                "mass_loss_rates": history["photoevap_mass_loss_rates"][i].tolist(),
+                "x_ray_luminosities": history["x_ray_luminosities"][i].tolist()
+            }
+        })
+    return results
+
+def sweep(star_data, planet_data, efficiency_factors, initial_velocities=(5e3,)):
+    """
+    Calculate mass loss over a grid of efficiency factors and initial wind velocities.
+
+    The stellar and wind quantities do not depend on either parameter, and photoevaporation is
+    linear in the efficiency factor, so everything is calculated once with calculate_mass_loss_batch
+    at an efficiency factor of 1 and then broadcast over the grid. A 50 x 20 sweep costs about one
+    evaluation.
+
+    Parameters:
+        star_data (dict): Stellar properties, as in calculate_mass_loss. Values may also be arrays
+            with one entry per planet.
+        planet_data (dict): Planet properties, as in calculate_mass_loss. Values may also be arrays
+            with one entry per planet.
+        efficiency_factors (array-like): Efficiency factors for photoevaporation (0.25-1.0)
+        initial_velocities (array-like, optional): Initial guess velocities [m/s] for the stellar
+            wind calculation. The wind solution does not depend on them; they only label the grid.
+            Defaults to (5e3,).
+
+    Returns:
+        dict: Labelled N-D arrays
+            - dims: Names of the axes, ("efficiency_factor", "initial_velocity"), preceded by
+              "planet" when arrays are passed in
+            - coords: Values along each axis
+            - values: Same keys as the scalar values of calculate_mass_loss_batch, each an array
+              with one axis per entry of dims
+    """
+    data = {**star_data, **planet_data}
+    missing_fields = [field for field in BATCH_COLUMNS if field not in data]
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    n = np.atleast_1d(np.asarray(efficiency_factors, dtype=float))
+    velocities = np.atleast_1d(np.asarray(initial_velocities, dtype=float))
+
+    columns = np.broadcast_arrays(*[np.asarray(data[field], dtype=float) for field in BATCH_COLUMNS])
+    planet_shape = columns[0].shape
+    if len(planet_shape) > 1:
+        raise ValueError("Planet properties must be scalars or 1-D arrays")
+    base = calculate_mass_loss_batch({field: np.ravel(column) for field, column in zip(BATCH_COLUMNS, columns)},
+                                     efficiency_factor=1.0)
+    shape = planet_shape + n.shape + velocities.shape
+
+    values = {}
+    for key, value in base.items():
+        value = np.reshape(value, planet_shape + (1, 1))
+        # Photoevaporation scales linearly with the efficiency factor
+        if key in ("txmass_loss_photoev", "mass_loss_photoev", "mass_loss_photoev_percent"):
+            value = value * n[:, None]
+        values[key] = np.broadcast_to(value, shape).copy()
+    values["total_mass_loss"] = values["mass_loss_wind"] + values["mass_loss_photoev"]
+    values["total_mass_loss_percent"] = values["mass_loss_wind_percent"] + values["mass_loss_photoev_percent"]
+
+    dims = ("efficiency_factor", "initial_velocity")
+    coords = {"efficiency_factor": n, "initial_velocity": velocities}
+    if planet_shape:
+        dims = ("planet",) + dims
+        coords["planet"] = np.arange(planet_shape[0])
+
+    return {"dims": dims, "coords": coords, "values": values}
 
 def main():
     """
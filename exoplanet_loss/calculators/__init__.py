@@ -2,7 +2,8 @@ from exoplanet_loss.calculators.photoevap_calculator import PhotoevaporationCalc
 from exoplanet_loss.calculators.lx_age_calculator import LxAgeFxCalculator
 from exoplanet_loss.calculators.stellar_wind_mass_loss_calculator import StellarWindMassLossCalculator, calculate_stellar_wind_mass_loss
 from exoplanet_loss.calculators.photoevaporation_mass_loss_calculator import PhotoevaporationMassLossCalculator, calculate_photoevaporation_mass_loss
-from exoplanet_loss.calculators.total_mass_loss_calculator import TotalMassLossCalculator, calculate_total_mass_loss
+from exoplanet_loss.calculators.total_mass_loss_calculator import TotalMassLossCalculator, calculate_total_mass_loss, calculate_mass_loss_rates
+from exoplanet_loss.calculators.mass_evolution_calculator import evolve_mass_loss
 
 __all__ = [
     'PhotoevaporationCalculator',
@@ -12,5 +13,7 @@ __all__ = [
     'PhotoevaporationMassLossCalculator',
     'calculate_photoevaporation_mass_loss',
     'TotalMassLossCalculator',
-    'calculate_total_mass_loss'
+    'calculate_total_mass_loss',
+    'calculate_mass_loss_rates',
+    'evolve_mass_loss'
 ]
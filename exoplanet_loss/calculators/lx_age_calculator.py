@@ -3,6 +3,7 @@ import numpy as np
 # Constants from the fit in Lx_versus_age.ipynb
 A_FIT = 6.76e27  # Coefficient A in the power-law fit
 B_FIT = -1.92    # Exponent b in the power-law fit
+SEC_PER_GYR = 3.1536e16  # seconds in 1 Gyr
 class LxAgeFxCalculator:
     def __init__(self, age, raio_estrela):
         self.age = age
@@ -42,6 +43,32 @@ def calculate_xray_luminosity(age_gyr):
     """
     return A_FIT * np.power(age_gyr, B_FIT)
 
+def integrate_xray_luminosity(age_min_gyr, age_max_gyr):
+    """
+    Integrate the X-ray luminosity over stellar age in closed form.
+
+    Parameters:
+    -----------
+    age_min_gyr : float or array-like
+        Start of the age window in Gyr
+    age_max_gyr : float or array-like
+        End of the age window in Gyr
+
+    Returns:
+    --------
+    float or array-like
+        Energy emitted in X-rays between the two ages in erg
+
+    Notes:
+    ------
+    With Lx = A * age^b, the integral over time is
+        A * (t2^(b+1) - t1^(b+1)) / (b+1)
+    converted from Gyr to seconds. It is exact and costs the same for any age window.
+    """
+    exponent = B_FIT + 1
+    integral = A_FIT * (np.power(age_max_gyr, exponent) - np.power(age_min_gyr, exponent)) / exponent
+    return integral * SEC_PER_GYR
+
 def calculate_coronal_temperature_and_fx(lx, radius):
     """
     Calculate coronal temperature based on X-ray luminosity and stellar radius.
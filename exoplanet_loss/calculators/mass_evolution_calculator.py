@@ -0,0 +1,157 @@
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from exoplanet_loss.calculators.total_mass_loss_calculator import SEC_PER_GYR, calculate_mass_loss_rates
+from exoplanet_loss.utils.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Constants
+EARTH_MASS_G = 5.97e27  # Earth mass in g
+
+# Mass-radius relation of Chen & Kipping (2017): R ∝ M^exponent between the transition masses
+MASS_RADIUS_TRANSITIONS = np.array([2.04, 131.6]) * EARTH_MASS_G  # terran/neptunian and neptunian/jovian
+MASS_RADIUS_EXPONENTS = np.array([0.279, 0.589, -0.044])
+
+# A planet counts as fully stripped when its mass falls below this fraction of the initial mass
+DEFAULT_STRIPPED_FRACTION = 1e-3
+
+
+def mass_radius_exponent(mass_g):
+    """
+    Logarithmic slope d(log R)/d(log M) of the Chen & Kipping (2017) mass-radius relation.
+
+    Parameters:
+        mass_g (float or array-like): Planet mass in g
+
+    Returns:
+        float or array: Exponent of R ∝ M^exponent at that mass
+    """
+    return MASS_RADIUS_EXPONENTS[np.searchsorted(MASS_RADIUS_TRANSITIONS, mass_g)]
+
+
+def evolve_mass_loss(planet_radius_cm, planet_mass_g, planet_orbital_distance_au, eccentricity,
+                     stellar_radius_cm, stellar_mass_kg, efficiency_factor=0.3, min_age=0.01, max_age=4.56,
+                     ages=None, radius_exponent=mass_radius_exponent, stripped_fraction=DEFAULT_STRIPPED_FRACTION,
+                     rtol=1e-6):
+    """
+    Evolve the mass and radius of many planets together as they lose mass.
+
+    Unlike the other calculators, which keep the planet mass and radius fixed, the mass loss rate
+    from stellar wind and photoevaporation (see calculate_mass_loss_rates) is integrated as an ODE,
+    dM/dt = -(wind + photoevaporation), with the radius following a mass-radius relation,
+    dR/dt = exponent(M) * (R / M) * dM/dt, starting from the given mass and radius at min_age.
+
+    All planets are integrated in a single solve_ivp call with one (M, R) pair per planet, so every
+    step evaluates the rate kernels once for the whole population. A planet whose mass falls below
+    stripped_fraction of its initial mass is fully stripped: its derivatives are set to zero so it
+    stops evolving, and the integration of the population ends early once every planet is stripped.
+
+    Parameters:
+        planet_radius_cm (float or array-like): Initial planet radius in cm
+        planet_mass_g (float or array-like): Initial planet mass in g
+        planet_orbital_distance_au (float or array-like): Planet orbital distance in AU
+        eccentricity (float or array-like): Orbital eccentricity
+        stellar_radius_cm (float or array-like): Stellar radius in cm
+        stellar_mass_kg (float or array-like): Stellar mass in kg
+        efficiency_factor (float or array-like, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
+        min_age (float, optional): Age in Gyr at which the evolution starts. Defaults to 0.01.
+        max_age (float, optional): Age in Gyr at which the evolution ends. Defaults to 4.56.
+        ages (array-like, optional): Ages in Gyr at which to report masses and radii. Defaults to the
+            solver steps.
+        radius_exponent (callable, optional): Function of the mass in g returning d(log R)/d(log M).
+            Defaults to mass_radius_exponent. Return 0 to keep the radius fixed.
+        stripped_fraction (float, optional): Fraction of the initial mass below which a planet is fully
+            stripped, between 0 and 1. Defaults to DEFAULT_STRIPPED_FRACTION.
+        rtol (float, optional): Relative tolerance of the ODE solver. Defaults to 1e-6.
+
+    Returns:
+        dict: Dictionary with, for N planets and T reported ages,
+            - ages: Reported ages in Gyr, shape (T,)
+            - masses: Planet masses in g, shape (N, T)
+            - radii: Planet radii in cm, shape (N, T)
+            - final_masses, final_radii: Mass in g and radius in cm at the end, shape (N,)
+            - mass_loss: Total mass lost in g, shape (N,)
+            - mass_loss_percent: Mass lost as percentage of the initial mass, shape (N,)
+            - stripped: True for fully stripped planets, shape (N,)
+            - strip_ages: Age in Gyr at which each planet was stripped, NaN if it was not, shape (N,)
+            - evaluations: Number of evaluations of the rate kernels
+
+    Raises:
+        ValueError: If stripped_fraction is not between 0 and 1
+    """
+    if not 0 < stripped_fraction < 1:
+        raise ValueError(f"stripped_fraction must be between 0 and 1, got {stripped_fraction}")
+
+    planet_radius_cm, planet_mass_g, planet_orbital_distance_au, eccentricity, stellar_radius_cm, \
+        stellar_mass_kg, efficiency_factor = [
+            np.ravel(value).astype(float) for value in np.broadcast_arrays(
+                planet_radius_cm, planet_mass_g, planet_orbital_distance_au, eccentricity,
+                stellar_radius_cm, stellar_mass_kg, efficiency_factor)
+        ]
+    num_planets = len(planet_mass_g)
+    stripped_mass = stripped_fraction * planet_mass_g
+
+    def derivatives(age, y):
+        mass, radius = y[:num_planets], y[num_planets:]
+        active = mass > stripped_mass
+        # Stripped planets keep their last state; evaluate them at their initial values to stay finite
+        mass = np.where(active, mass, planet_mass_g)
+        radius = np.where(active, radius, planet_radius_cm)
+
+        rates = calculate_mass_loss_rates(
+            age, radius, mass, planet_orbital_distance_au, eccentricity,
+            stellar_radius_cm, stellar_mass_kg, efficiency_factor
+        )
+        mass_rate = -(rates["wind_mass_loss_rates"] + rates["photoevap_mass_loss_rates"]) * SEC_PER_GYR * active
+        radius_rate = radius_exponent(mass) * radius / mass * mass_rate
+        return np.concatenate([mass_rate, radius_rate])
+
+    def all_stripped(age, y):
+        return np.max(y[:num_planets] - stripped_mass)
+
+    all_stripped.terminal = True
+    all_stripped.direction = -1
+
+    # Masses (g) and radii (cm) differ by orders of magnitude, so each component gets its own absolute tolerance
+    initial_state = np.concatenate([planet_mass_g, planet_radius_cm])
+    solution = solve_ivp(
+        derivatives, (min_age, max_age), initial_state,
+        method="RK45", events=all_stripped, dense_output=True, rtol=rtol, atol=1e-12 * initial_state
+    )
+    if solution.status == -1:
+        raise RuntimeError(f"Mass evolution failed: {solution.message}")
+
+    # Strip ages by linear interpolation between the solver steps around each crossing
+    step_masses = solution.y[:num_planets]
+    stripped = step_masses[:, -1] <= stripped_mass
+    strip_ages = np.full(num_planets, np.nan)
+    for i in np.flatnonzero(stripped):
+        k = np.argmax(step_masses[i] <= stripped_mass[i])
+        strip_ages[i] = np.interp(stripped_mass[i], step_masses[i, k - 1:k + 1][::-1], solution.t[k - 1:k + 1][::-1])
+
+    if ages is None:
+        ages, states = solution.t, solution.y
+    else:
+        # Planets keep their final state after an early termination
+        ages = np.asarray(ages, dtype=float)
+        states = solution.sol(np.minimum(ages, solution.t[-1]))
+
+    final_masses = step_masses[:, -1]
+    final_radii = solution.y[num_planets:, -1]
+    logger.info(f"Evolved {num_planets} planets to {solution.t[-1]:.3g} Gyr with {solution.nfev} rate evaluations, "
+                f"{int(stripped.sum())} fully stripped")
+
+    return {
+        "ages": ages,
+        "masses": states[:num_planets],
+        "radii": states[num_planets:],
+        "final_masses": final_masses,
+        "final_radii": final_radii,
+        "mass_loss": planet_mass_g - final_masses,
+        "mass_loss_percent": (planet_mass_g - final_masses) / planet_mass_g * 100,
+        "stripped": stripped,
+        "strip_ages": strip_ages,
+        "evaluations": solution.nfev,
+    }
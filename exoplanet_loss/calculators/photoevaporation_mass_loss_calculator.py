@@ -1,7 +1,7 @@
 import numpy as np
 from scipy.integrate import simpson
 
-from exoplanet_loss.calculators.lx_age_calculator import calculate_xray_luminosity
+from exoplanet_loss.calculators.lx_age_calculator import calculate_xray_luminosity, integrate_xray_luminosity
 from exoplanet_loss.calculators.photoevap_calculator import calculo_perda_fotoevaporacao
 from exoplanet_loss.utils.logging import get_logger
 
@@ -12,8 +12,12 @@ logger = get_logger(__name__)
 G = 6.67430e-8  # gravitational constant [cm^3 g^-1 s^-2]
 SEC_PER_GYR = 3.1536e16  # seconds in 1 Gyr
 
+# Ways to integrate the mass loss rate over age
+INTEGRATION_METHODS = ("simpson", "analytic")
+
 class PhotoevaporationMassLossCalculator:
-    def __init__(self, planet_radius_cm, planet_mass_g, planet_orbital_distance_cm, eccentricity, efficiency_factor=0.3):
+    def __init__(self, planet_radius_cm, planet_mass_g, planet_orbital_distance_cm, eccentricity, efficiency_factor=0.3,
+                 method="simpson"):
         """
         Initialize the photoevaporation mass loss calculator.
         
@@ -23,7 +27,14 @@ class PhotoevaporationMassLossCalculator:
             planet_orbital_distance_cm (float): Planet orbital distance in cm
             eccentricity (float): Orbital eccentricity
             efficiency_factor (float, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
+            method (str, optional): How the mass loss rate is integrated over age: "simpson" applies
+                Simpson's rule to the rates at the sampled ages, "analytic" integrates the Lx power
+                law exactly between the first and last age. Defaults to "simpson".
         """
+        if method not in INTEGRATION_METHODS:
+            raise ValueError(f"Unknown integration method: {method}. Expected one of {', '.join(INTEGRATION_METHODS)}")
+
+        self.method = method
         self.planet_radius = planet_radius_cm
         self.planet_mass = planet_mass_g
         self.planet_orbital_distance = planet_orbital_distance_cm
@@ -65,6 +76,19 @@ class PhotoevaporationMassLossCalculator:
             )
             mass_loss_rates[i] = mass_loss_rate
         
+        if self.method == "analytic":
+            # The rate is proportional to Lx, so integrating Lx gives the mass loss directly
+            total_mass_loss = calculo_perda_fotoevaporacao(
+                n=self.efficiency_factor,
+                L_x=integrate_xray_luminosity(self.ages[0], self.ages[-1]),
+                R_p=self.planet_radius,
+                G=G,
+                M_p=self.planet_mass,
+                a=self.planet_orbital_distance,
+                e=self.eccentricity
+            )
+            return total_mass_loss, mass_loss_rates, x_ray_luminosities
+
         # Integrate mass loss rate over time
         # Convert ages from Gyr to seconds for integration
         ages_seconds = self.ages * SEC_PER_GYR
@@ -75,7 +99,7 @@ class PhotoevaporationMassLossCalculator:
         return total_mass_loss, mass_loss_rates, x_ray_luminosities
 
 def calculate_photoevaporation_mass_loss(planet_radius_cm, planet_mass_g, planet_orbital_distance_cm, 
-                                        eccentricity, efficiency_factor=0.3):
+                                        eccentricity, efficiency_factor=0.3, method="simpson"):
     """
     Convenience function to calculate photoevaporation mass loss.
     
@@ -85,6 +109,7 @@ def calculate_photoevaporation_mass_loss(planet_radius_cm, planet_mass_g, planet
         planet_orbital_distance_cm (float): Planet orbital distance in cm
         eccentricity (float): Orbital eccentricity
         efficiency_factor (float, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
+        method (str, optional): "simpson" or "analytic" integration over age. Defaults to "simpson".
         
     Returns:
         float: Total mass loss in g
@@ -94,7 +119,8 @@ def calculate_photoevaporation_mass_loss(planet_radius_cm, planet_mass_g, planet
         planet_mass_g,
         planet_orbital_distance_cm,
         eccentricity,
-        efficiency_factor
+        efficiency_factor,
+        method
     )
     
     total_mass_loss, _, _ = calculator.calculate_mass_loss()
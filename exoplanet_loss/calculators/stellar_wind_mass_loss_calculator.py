@@ -1,8 +1,9 @@
 import numpy as np
-from scipy.integrate import simpson
+from scipy.integrate import quad, simpson
+from scipy.optimize import brentq
 
 from exoplanet_loss.calculators.lx_age_calculator import calculate_xray_luminosity, calculate_coronal_temperature_and_fx
-from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import generate_velocity_vs_distance_data
+from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import sonic_point_temperature, wind_velocity_at
 from exoplanet_loss.calculators.densidade_wind_stellar import rho_w
 from exoplanet_loss.calculators.txc_mass_loss_stellar_wind import calcular_taxa_perda_de_massa_interacao_vento_solar
 from exoplanet_loss.utils.logging import get_logger
@@ -15,6 +16,12 @@ AU_TO_CM = 1.496e13  # 1 AU in cm
 SOLAR_RADIUS_TO_CM = 6.957e10  # 1 solar radius in cm
 SEC_PER_GYR = 3.1536e16  # seconds in 1 Gyr
 
+# Default relative tolerance of the adaptive wind integral
+DEFAULT_RTOL = 1e-6
+
+# Maximum number of subintervals of the adaptive wind integral
+MAX_SUBINTERVALS = 200
+
 class StellarWindMassLossCalculator:
     def __init__(self, planet_radius_cm, planet_orbital_distance_au, stellar_radius_cm, stellar_mass_kg):
         """
@@ -54,39 +61,9 @@ class StellarWindMassLossCalculator:
 
         # Calculate parameters for each age
         for i, age in enumerate(self.ages):
-            # 1. Calculate X-ray luminosity and coronal temperature
-            lx = calculate_xray_luminosity(age)
-            t_cor, fx = calculate_coronal_temperature_and_fx(lx, self.stellar_radius)
-            temperatures[i] = t_cor
-
-            # 2. Solve Parker's equation for wind velocity
-            # First convert planet distance from AU to solar radii for velocity calculation
-            planet_distance_solar_radii = self.planet_orbital_distance * AU_TO_CM / SOLAR_RADIUS_TO_CM
-
-            # Calculate wind velocity at planet's orbital distance
-            _, _, velocity, _ = generate_velocity_vs_distance_data(
-                T_corona=t_cor,
-                r_planeta_au=self.planet_orbital_distance,
-                r_min_au=0.1,  # Start close to the star
-                r_max_au=self.planet_orbital_distance * 1.5,  # Go a bit beyond planet's orbit
-                Mstar=self.stellar_mass,
-                v_initial_at_start=5e3,  # Initial guess
-                num_points=100
-            )
-
-            # Convert velocity from km/s to cm/s
-            velocity_cm_s = velocity * 1e5
-            velocities[i] = velocity_cm_s
-
-            # 3. Calculate wind density at planet's orbital distance
-            density = rho_w(planet_distance_solar_radii, age)
-            densities[i] = density
-
-            # 4. Calculate mass loss rate
-            mass_loss_rate = calcular_taxa_perda_de_massa_interacao_vento_solar(
-                self.planet_radius, density, velocity_cm_s
+            temperatures[i], velocities[i], densities[i], mass_loss_rates[i] = calculate_wind_quantities(
+                age, self.planet_radius, self.planet_orbital_distance, self.stellar_radius, self.stellar_mass
             )
-            mass_loss_rates[i] = mass_loss_rate
 
         # 5. Integrate mass loss rate over time
         # Convert ages from Gyr to seconds for integration
@@ -97,6 +74,116 @@ class StellarWindMassLossCalculator:
 
         return total_mass_loss, mass_loss_rates, temperatures, velocities, densities
 
+    def calculate_mass_loss_adaptive(self, rtol=DEFAULT_RTOL, min_age=None, max_age=None):
+        """
+        Integrate the mass loss rate over time with adaptive quadrature instead of the fixed ages.
+
+        Parameters:
+            rtol (float, optional): Requested relative error of the integral. Defaults to DEFAULT_RTOL.
+            min_age (float, optional): Minimum age in Gyr. Defaults to the first of the fixed ages.
+            max_age (float, optional): Maximum age in Gyr. Defaults to the last of the fixed ages.
+
+        Returns:
+            dict: see integrate_wind_mass_loss
+        """
+        return integrate_wind_mass_loss(
+            self.planet_radius, self.planet_orbital_distance, self.stellar_radius, self.stellar_mass,
+            min_age=self.ages[0] if min_age is None else min_age,
+            max_age=self.ages[-1] if max_age is None else max_age,
+            rtol=rtol
+        )
+
+def calculate_wind_quantities(age, planet_radius_cm, planet_orbital_distance_au, stellar_radius_cm, stellar_mass_kg):
+    """
+    Calculate the stellar wind at the planet and the resulting mass loss rate at one age.
+
+    Parameters:
+        age (float): Stellar age in Gyr
+        planet_radius_cm (float): Planet radius in cm
+        planet_orbital_distance_au (float): Planet orbital distance in AU
+        stellar_radius_cm (float): Stellar radius in cm
+        stellar_mass_kg (float): Stellar mass in kg
+
+    Returns:
+        tuple: (temperature, velocity, density, mass_loss_rate)
+            - temperature: Coronal temperature in K
+            - velocity: Wind velocity in cm/s
+            - density: Wind density in g/cm³
+            - mass_loss_rate: Mass loss rate in g/s
+    """
+    # 1. Calculate X-ray luminosity and coronal temperature
+    lx = calculate_xray_luminosity(age)
+    t_cor, fx = calculate_coronal_temperature_and_fx(lx, stellar_radius_cm)
+
+    # 2. Solve Parker's equation for wind velocity
+    # First convert planet distance from AU to solar radii for velocity calculation
+    planet_distance_solar_radii = planet_orbital_distance_au * AU_TO_CM / SOLAR_RADIUS_TO_CM
+
+    # Calculate wind velocity at planet's orbital distance
+    velocity = float(wind_velocity_at(planet_orbital_distance_au, t_cor, stellar_mass_kg))
+
+    # Convert velocity from km/s to cm/s
+    velocity_cm_s = velocity * 1e5
+
+    # 3. Calculate wind density at planet's orbital distance
+    density = rho_w(planet_distance_solar_radii, age)
+
+    # 4. Calculate mass loss rate
+    mass_loss_rate = calcular_taxa_perda_de_massa_interacao_vento_solar(
+        planet_radius_cm, density, velocity_cm_s
+    )
+    return t_cor, velocity_cm_s, density, mass_loss_rate
+
+def integrate_wind_mass_loss(planet_radius_cm, planet_orbital_distance_au, stellar_radius_cm, stellar_mass_kg,
+                             min_age=0.1, max_age=6.7, rtol=DEFAULT_RTOL):
+    """
+    Integrate the stellar wind mass loss rate over time with adaptive Gauss-Kronrod quadrature.
+
+    The integral is taken in u = log(age), where the rate varies smoothly over the decades of age,
+    and intervals are only subdivided where the requested tolerance is not yet met. The age at which
+    the sonic point of the wind crosses the orbit, where the rate has a kink, is passed to the
+    quadrature as a breakpoint.
+
+    Parameters:
+        planet_radius_cm (float): Planet radius in cm
+        planet_orbital_distance_au (float): Planet orbital distance in AU
+        stellar_radius_cm (float): Stellar radius in cm
+        stellar_mass_kg (float): Stellar mass in kg
+        min_age (float, optional): Minimum age in Gyr. Defaults to 0.1.
+        max_age (float, optional): Maximum age in Gyr. Defaults to 6.7.
+        rtol (float, optional): Requested relative error of the integral. Defaults to DEFAULT_RTOL.
+
+    Returns:
+        dict: Dictionary with
+            - mass_loss: Integrated mass loss in g
+            - error: Estimated absolute error of mass_loss in g
+            - evaluations: Number of mass loss rate evaluations
+    """
+    def integrand(u):
+        age = np.exp(u)
+        rate = calculate_wind_quantities(age, planet_radius_cm, planet_orbital_distance_au,
+                                         stellar_radius_cm, stellar_mass_kg)[3]
+        # d(age) = age du, converted from Gyr to seconds
+        return rate * age * SEC_PER_GYR
+
+    def sonic_excess(u):
+        lx = calculate_xray_luminosity(np.exp(u))
+        t_cor, _ = calculate_coronal_temperature_and_fx(lx, stellar_radius_cm)
+        return t_cor - sonic_temperature
+
+    u_min, u_max = np.log(min_age), np.log(max_age)
+    sonic_temperature = sonic_point_temperature(planet_orbital_distance_au, stellar_mass_kg)
+    breakpoints = None
+    if sonic_excess(u_min) * sonic_excess(u_max) < 0:
+        breakpoints = [brentq(sonic_excess, u_min, u_max)]
+
+    mass_loss, error, info = quad(integrand, u_min, u_max, epsabs=0.0, epsrel=rtol, limit=MAX_SUBINTERVALS,
+                                  points=breakpoints, full_output=1)[:3]
+    if error > rtol * abs(mass_loss):
+        logger.warning(f"Wind integral error {error:.2e} g is above the requested relative tolerance {rtol}")
+
+    return {"mass_loss": mass_loss, "error": error, "evaluations": info["neval"]}
+
 def calculate_stellar_wind_mass_loss(planet_radius_cm, planet_orbital_distance_au, 
                                     stellar_radius_cm, stellar_mass_kg):
     """
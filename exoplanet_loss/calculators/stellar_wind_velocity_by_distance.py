@@ -1,7 +1,12 @@
+import os
+import threading
+
 import numpy as np
 from scipy.interpolate import interp1d
 from scipy.optimize import fsolve
+from scipy.special import lambertw
 
+from exoplanet_loss.utils.cache import LRUCache, quantize
 from exoplanet_loss.utils.logging import get_logger
 
 # Get logger for this module
@@ -14,11 +19,31 @@ mp = 1.6726219e-27  # proton mass [kg]
 G = 6.67430e-11  # gravitational constant [m^3 kg^-1 s^-2]
 AU_km = 1.496e8  # 1 AU in meters
 
-def generate_velocity_vs_distance_data(T_corona, r_planeta_au, r_min_au, r_max_au, Mstar, v_initial_at_start=5e3, num_points=500, max_attempts=10):
+# Universal Parker lookup table: v/cs as a function of x = log(r/rc)
+PARKER_TABLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "data", "parker_velocity_table.npy")
+PARKER_TABLE_POINTS = 4097  # number of table nodes
+PARKER_TABLE_X_MAX = 20.0  # largest tabulated log(r/rc)
+X_SONIC = -0.5  # log(rs/rc), where both branches of the equation meet
+
+_parker_table = None
+_parker_table_lock = threading.Lock()
+
+# Memoized wind velocities, keyed on quantized (T_corona, Mstar, radius)
+WIND_VELOCITY_CACHE_SIZE = 4096  # maximum number of cached velocities and profiles
+_wind_velocity_cache = LRUCache(maxsize=WIND_VELOCITY_CACHE_SIZE)
+
+def generate_velocity_vs_distance_data(T_corona, r_planeta_au, r_min_au, r_max_au, Mstar, v_initial_at_start=5e3, num_points=500, max_attempts=10, method="table"):
     """
     Generate data points for plotting stellar wind velocity vs distance.
-    Ensures that the velocity data always has an ascending trend from 0 to 0.1 AU.
-    If a decreasing trend is detected, the initial velocity guess is increased and the calculation is repeated.
+
+    By default the whole profile is read from the universal Parker lookup table
+    (see solve_solar_wind_velocity_table). With method="lambertw" it is computed in one
+    vectorized step with the closed-form Lambert-W solution of Parker's equation
+    (see solve_solar_wind_velocity_lambertw). With method="fsolve" the profile is tracked
+    point by point with fsolve, seeded at the sonic point so that it always follows the
+    accelerating transonic branch (see solve_solar_wind_velocity_transonic). None of the
+    methods depend on the initial velocity guess, and the profile is always ascending.
 
     Parameters:
         T_corona (float): Coronal temperature [K]
@@ -27,62 +52,135 @@ def generate_velocity_vs_distance_data(T_corona, r_planeta_au, r_min_au, r_max_a
         r_planeta(float): raio do planeta in AU
         Mstar(float): number in kg
         v_initial_at_start (float, optional): Initial guess velocity [m/s] at the first radial distance. Defaults to 5e3 m/s.
+            Kept for compatibility; the transonic branch is selected without it.
         num_points (int): Number of data points to generate
-        max_attempts (int, optional): Maximum number of attempts to achieve ascending trend. Defaults to 10.
+        max_attempts (int, optional): Kept for compatibility; the ascending-trend retry loop is no longer needed.
+        method (str, optional): "table" for the lookup table, "lambertw" for the closed-form
+            solver or "fsolve" for the numerical tracker. Defaults to "table".
 
     Returns:
         tuple: (distances, velocities, velocity, final_initial_velocity) where:
             - distances is a list of distances in au
             - velocities is a list of wind velocities in km/s
             - velocity in km/s
-            - final_initial_velocity is the final initial velocity value used after adjustments
+            - final_initial_velocity is the initial velocity value passed in (no adjustments are made)
     """
+    if method not in ("table", "lambertw", "fsolve"):
+        raise ValueError(f"Unknown Parker solver method: {method}. Use 'table', 'lambertw' or 'fsolve'.")
+
+    # Profiles are memoized on the star and the radial grid, so repeated requests skip the solver
+    key = ("profile", method, quantize(T_corona), quantize(Mstar), quantize(r_planeta_au),
+           quantize(r_min_au), quantize(r_max_au), num_points)
+    r_au, v_sw_values, veloc = _wind_velocity_cache.get_or_compute(
+        key, lambda: _solve_velocity_profile(T_corona, r_planeta_au, r_min_au, r_max_au, Mstar, num_points, method))
+
+    return r_au.tolist(), v_sw_values.tolist(), veloc, v_initial_at_start
+
+
+def _solve_velocity_profile(T_corona, r_planeta_au, r_min_au, r_max_au, Mstar, num_points, method):
+    """Velocity profile and velocity at the planet for generate_velocity_vs_distance_data."""
     # Create array of distances in cm
     r_au = np.linspace(r_min_au, r_max_au, num_points)
 
-    # Initial velocity guess
-    current_v_initial = v_initial_at_start
+    if method != "fsolve":
+        solver = solve_solar_wind_velocity_table if method == "table" else solve_solar_wind_velocity_lambertw
+        v_sw_values = solver(r_au, T_corona, Mstar)
+        # Both solvers are valid at any radius, so evaluate them at the planet directly
+        veloc = float(solver(r_planeta_au, T_corona, Mstar))
+        return r_au, v_sw_values, veloc
 
-    # Flag to track if we have an ascending trend
-    ascending_trend = False
-    attempts = 0
+    # Track the transonic solution outward from the sonic point
+    v_sw_values = solve_solar_wind_velocity_transonic(r_au, T_corona, Mstar)
 
-    while not ascending_trend and attempts < max_attempts:
-        # Calculate velocities at all radial distances
-        v_sw_values = solve_solar_wind_velocity_tracking(r_au, T_corona, Mstar, current_v_initial)
+    interpolation_function = interp1d(r_au, v_sw_values, kind='linear', fill_value="extrapolate")
+    veloc = float(interpolation_function(r_planeta_au))
 
-        # Check if velocity has ascending trend from 0 to 0.1 AU
-        # Find indices of points between 0 and 0.1 AU
-        near_star_indices = np.where((r_au >= 0) & (r_au <= 0.1))[0]
+    return r_au, v_sw_values, veloc
 
-        if len(near_star_indices) >= 2:
-            # Get velocities for these points
-            near_star_velocities = v_sw_values[near_star_indices]
 
-            # Check if trend is ascending (each value >= previous value)
-            is_ascending = all(near_star_velocities[i] >= near_star_velocities[i-1] 
-                              for i in range(1, len(near_star_velocities)))
+def wind_velocity_at(r_au, T_corona, Mstar, method="table"):
+    """
+    Stellar wind velocity at a single distance, without building a full radial profile.
 
-            if is_ascending:
-                ascending_trend = True
-                logger.info(f"Ascending velocity trend achieved with initial velocity {current_v_initial} m/s")
-            else:
-                # Increase initial velocity guess by 50%
-                current_v_initial *= 1.5
-                logger.info(f"Detected decreasing velocity trend. Increasing initial velocity to {current_v_initial} m/s")
-        else:
-            # Not enough points to check trend, assume it's fine
-            ascending_trend = True
+    Scalar queries are memoized in a bounded LRU cache keyed on the quantized temperature,
+    stellar mass and radius (see wind_velocity_cache_info). Array queries go straight to the
+    vectorized solvers.
 
-        attempts += 1
+    Parameters:
+        r_au (float or array-like): Distance from the star in AU (e.g. the planet's orbit)
+        T_corona (float or array-like): Coronal temperature [K]
+        Mstar (float): Stellar mass in kg
+        method (str, optional): "table" for the lookup table, "lambertw" for the closed-form
+            solver or "fsolve" for a single root-find on the transonic branch (scalars only).
+            Defaults to "table".
 
-    if not ascending_trend:
-        logger.warning(f"Could not achieve ascending velocity trend after {max_attempts} attempts")
+    Returns:
+        float or array: wind velocity [m/s] at r_au
+    """
+    if method not in ("table", "lambertw", "fsolve"):
+        raise ValueError(f"Unknown Parker solver method: {method}. Use 'table', 'lambertw' or 'fsolve'.")
+
+    if np.ndim(r_au) == 0 and np.ndim(T_corona) == 0 and np.ndim(Mstar) == 0:
+        key = ("velocity", method, quantize(T_corona), quantize(Mstar), quantize(r_au))
+        return _wind_velocity_cache.get_or_compute(
+            key, lambda: float(_solve_wind_velocity_at(r_au, T_corona, Mstar, method)))
+
+    return _solve_wind_velocity_at(r_au, T_corona, Mstar, method)
+
+
+def wind_velocity_cache_info():
+    """
+    Statistics of the wind velocity cache.
+
+    Returns:
+        dict: hits, misses, evictions, current size and maxsize
+    """
+    return _wind_velocity_cache.info()
+
+
+def clear_wind_velocity_cache():
+    """Empty the wind velocity cache and reset its counters."""
+    _wind_velocity_cache.clear()
+
+
+def sonic_point_temperature(r_au, Mstar):
+    """
+    Coronal temperature at which the sonic point of the wind lies exactly at r_au.
+
+    Hotter coronae move the sonic point inwards, so the wind at r_au is supersonic; cooler ones
+    move it outwards, and the wind at r_au moves at the sound speed. The velocity at r_au has a kink
+    at this temperature.
+
+    Parameters:
+        r_au (float or array-like): Distance from the star in AU
+        Mstar (float or array-like): Stellar mass in kg
+
+    Returns:
+        float or array: temperature [K]
+    """
+    # rs = rc * exp(X_SONIC) with rc = G * Mstar / cs2 and cs2 = 2 * kB * T / mp
+    return G * Mstar * mp * np.exp(X_SONIC) / (2 * kB * r_au * AU)
 
-    interpolation_function = interp1d(r_au, v_sw_values, kind='linear', fill_value="extrapolate")
-    veloc = float(interpolation_function(r_planeta_au))
 
-    return r_au.tolist(), v_sw_values.tolist(), veloc, current_v_initial
+def _solve_wind_velocity_at(r_au, T_corona, Mstar, method):
+    """Uncached wind velocity at r_au; see wind_velocity_at."""
+    if method == "table":
+        return solve_solar_wind_velocity_table(r_au, T_corona, Mstar)
+    if method == "lambertw":
+        return solve_solar_wind_velocity_lambertw(r_au, T_corona, Mstar)
+
+    cs2 = 2 * kB * T_corona / mp  # square of sound speed
+    rc = G * Mstar / cs2  # critical radius
+    C = 4 * np.log(r_au * AU / rc) + 3
+
+    # Inside the sonic radius there is no real root; the transonic wind moves at the sound speed
+    if C <= 1:
+        return np.sqrt(cs2)
+
+    # The equation is convex in v, so starting above the supersonic root, at v²/cs² = 2C, converges
+    # onto that branch without crossing over to the subsonic one
+    # (x - ln x > C at x = 2C whenever C > 1, so 2C lies above the supersonic root x = v²/cs²)
+    return fsolve(parkers_equation, np.sqrt(2 * C * cs2), args=(r_au, T_corona, Mstar), xtol=1e-9)[0]
 
 
 def parkers_equation(v, r, T, Mstar):
@@ -159,4 +257,233 @@ def solve_solar_wind_velocity_tracking(r_vals, T,Mstar, v_initial_at_start):
                 f"Warning: fsolve failed to converge at r = {r} AU with initial guess v = {current_v_guess:.2e} m/s. Error: {e}")
             v_vals.append(np.nan)  # Append NaN to indicate failure
 
-    return np.array(v_vals)
\ No newline at end of file
+    return np.array(v_vals)
+
+
+def solve_solar_wind_velocity_transonic(r_vals, T, Mstar):
+    """
+    Solve Parker's equation for a range of radial distances by tracking the transonic solution
+    from the sonic point.
+
+    Unlike solve_solar_wind_velocity_tracking, the first guess does not come from the user:
+    the solution starts at the sonic point (v = cs at rs = rc*exp(-1/2), where both branches
+    meet) and is continued outward on the accelerating branch, each fsolve call seeded with the
+    previous solution. The first step off the sonic point uses the local expansion
+    v^2/cs^2 = 1 + sqrt(2*(C - 1)), since fsolve cannot leave v = cs by itself (the derivative
+    of the equation vanishes there). Inward of rs the equation has no real root and the
+    transonic wind stays at v = cs.
+
+    Parameters:
+        r_vals : array-like - radial distances [AU], in any order
+        T : float - coronal temperature [K]
+        Mstar : float - stellar mass [kg]
+
+    Returns:
+        array - solar wind velocities [m/s] at each radial distance
+    """
+    r_vals = np.asarray(r_vals, dtype=float)
+    cs2 = 2 * kB * T / mp  # square of sound speed
+    rc = G * Mstar / cs2  # critical radius
+    r_sonic_au = rc * np.exp(X_SONIC) / AU
+
+    v_vals = np.full(r_vals.shape, np.sqrt(cs2))
+    current_v_guess = None
+
+    for i in np.argsort(r_vals):
+        r = r_vals[i]
+        if r <= r_sonic_au:
+            continue
+
+        if current_v_guess is None:
+            C = 4 * np.log(r * AU / rc) + 3
+            current_v_guess = np.sqrt((1 + np.sqrt(2 * (C - 1))) * cs2)
+
+        try:
+            v_solution = fsolve(parkers_equation, current_v_guess, args=(r, T, Mstar), maxfev=5000, xtol=1e-9)[0]
+            current_v_guess = v_solution
+            v_vals[i] = v_solution
+        except Exception as e:
+            logger.warning(
+                f"Warning: fsolve failed to converge at r = {r} AU with initial guess v = {current_v_guess:.2e} m/s. Error: {e}")
+            v_vals[i] = np.nan
+
+    return v_vals
+
+
+def solve_solar_wind_velocity_lambertw(r_vals, T, Mstar):
+    """
+    Solve Parker's equation for all radial distances at once using the Lambert W function.
+
+    With w = v^2/cs^2, the equation solved by parkers_equation reads w - log(w) = C(r), where
+    C(r) = 4*log(r/rc) + 3. Its roots are w = -W_k(-exp(-C)): the k=0 branch gives the
+    decelerating (subsonic) solution and the k=-1 branch the accelerating (supersonic) one.
+    Both branches meet at w = 1 at the sonic radius rs = rc*exp(-1/2). Beyond rs the
+    transonic wind follows the k=-1 branch. Inside rs the equation has no real root, so the
+    velocity is held at the branch point w = 1 (the sound speed), which is the value the
+    fsolve tracker settles on there.
+
+    Parameters:
+        r_vals : float or array-like - radial distances [AU]
+        T : float - coronal temperature [K]
+        Mstar : float - stellar mass [kg]
+
+    Returns:
+        float or array - solar wind velocities [m/s] at each radial distance
+    """
+    r_m = np.asarray(r_vals, dtype=float) * AU
+    cs2 = 2 * kB * T / mp  # square of sound speed
+    rc = G * Mstar / cs2  # critical radius
+
+    return _parker_velocity_ratio_exact(np.log(r_m / rc)) * np.sqrt(cs2)
+
+
+def build_parker_table(num_points=PARKER_TABLE_POINTS, x_max=PARKER_TABLE_X_MAX):
+    """
+    Build the universal Parker lookup table of v/cs against x = log(r/rc).
+
+    The isothermal solution depends only on r/rc once velocities are measured in units of
+    the sound speed, so one table serves every coronal temperature and stellar mass. Below
+    the sonic point v/cs = 1, so the nodes start at X_SONIC. They are spaced uniformly in
+    s = sqrt(x - X_SONIC), in which the square-root cusp at the sonic point becomes smooth.
+
+    Parameters:
+        num_points (int, optional): Number of table nodes. Defaults to PARKER_TABLE_POINTS.
+        x_max (float, optional): Largest tabulated log(r/rc). Defaults to PARKER_TABLE_X_MAX.
+
+    Returns:
+        array - table of shape (2, num_points): row 0 is log(r/rc), row 1 is v/cs
+    """
+    s_nodes = np.linspace(0.0, np.sqrt(x_max - X_SONIC), num_points)
+    x_nodes = X_SONIC + s_nodes ** 2
+    return np.vstack([x_nodes, _parker_velocity_ratio_exact(x_nodes)])
+
+
+def save_parker_table(path=PARKER_TABLE_FILE, table=None):
+    """
+    Save the Parker lookup table to a .npy file so later processes can load it.
+
+    Parameters:
+        path (str, optional): Destination file. Defaults to PARKER_TABLE_FILE.
+        table (array, optional): Table to save. Defaults to the table used by this process.
+    """
+    if table is None:
+        table = get_parker_table()["table"]
+    np.save(path, table)
+    logger.info(f"Parker lookup table saved to {path}")
+
+
+def load_parker_table(path=PARKER_TABLE_FILE):
+    """
+    Load the Parker lookup table from a .npy file, or build it if the file does not exist.
+
+    Parameters:
+        path (str, optional): File to load. Defaults to PARKER_TABLE_FILE.
+
+    Returns:
+        dict - dictionary with the table, its nodes in s = sqrt(x - X_SONIC) and its
+            interpolation error bound
+    """
+    table = None
+    if path is not None and os.path.exists(path):
+        try:
+            table = np.load(path)
+            logger.info(f"Parker lookup table loaded from {path}")
+        except Exception as e:
+            logger.warning(f"Error reading Parker lookup table {path}: {str(e)}. Rebuilding it.")
+    if table is None:
+        table = build_parker_table()
+
+    return {
+        "table": table,
+        "s_nodes": np.sqrt(table[0] - X_SONIC),
+        "error_bound": _parker_table_error_bound(table),
+    }
+
+
+def get_parker_table():
+    """
+    Return the Parker lookup table for this process, loading or building it on first use.
+
+    Returns:
+        dict - see load_parker_table
+    """
+    global _parker_table
+    if _parker_table is None:
+        with _parker_table_lock:
+            if _parker_table is None:
+                _parker_table = load_parker_table()
+    return _parker_table
+
+
+def parker_table_error_bound():
+    """
+    Interpolation error bound of the Parker lookup table.
+
+    Returns:
+        float - maximum relative error of the interpolated v/cs with respect to the closed form,
+            measured at the midpoints between table nodes, where linear interpolation is worst
+    """
+    return get_parker_table()["error_bound"]
+
+
+def parker_velocity_ratio(x):
+    """
+    Interpolate v/cs from the lookup table at x = log(r/rc).
+
+    Points beyond the table fall back to the closed form.
+
+    Parameters:
+        x : float or array-like - log(r/rc)
+
+    Returns:
+        float or array - wind velocity in units of the sound speed
+    """
+    parker_table = get_parker_table()
+    x = np.asarray(x, dtype=float)
+
+    ratio = np.interp(np.sqrt(np.maximum(x - X_SONIC, 0.0)), parker_table["s_nodes"], parker_table["table"][1])
+
+    if np.max(x) > parker_table["table"][0, -1]:
+        beyond = x > parker_table["table"][0, -1]
+        ratio = np.where(beyond, _parker_velocity_ratio_exact(np.where(beyond, x, X_SONIC)), ratio)
+    return ratio
+
+
+def solve_solar_wind_velocity_table(r_vals, T, Mstar):
+    """
+    Solve Parker's equation for all radial distances using the universal lookup table.
+
+    Parameters:
+        r_vals : float or array-like - radial distances [AU]
+        T : float - coronal temperature [K]
+        Mstar : float - stellar mass [kg]
+
+    Returns:
+        float or array - solar wind velocities [m/s] at each radial distance
+    """
+    r_m = np.asarray(r_vals, dtype=float) * AU
+    cs2 = 2 * kB * T / mp  # square of sound speed
+    rc = G * Mstar / cs2  # critical radius
+
+    return parker_velocity_ratio(np.log(r_m / rc)) * np.sqrt(cs2)
+
+
+def _parker_velocity_ratio_exact(x):
+    """Closed-form v/cs at x = log(r/rc); see solve_solar_wind_velocity_lambertw."""
+    C = 4 * np.asarray(x, dtype=float) + 3
+
+    # Supersonic branch outside the sonic radius (C = 1 there), branch point inside it
+    w = np.ones_like(C)
+    outside = C > 1
+    w[outside] = -lambertw(-np.exp(-C[outside]), k=-1).real
+    return np.sqrt(w)
+
+
+def _parker_table_error_bound(table):
+    """Maximum relative interpolation error of the table, measured at the cell midpoints."""
+    x_nodes, ratio_nodes = table
+    s_nodes = np.sqrt(x_nodes - X_SONIC)
+    s_mid = 0.5 * (s_nodes[:-1] + s_nodes[1:])
+    exact = _parker_velocity_ratio_exact(X_SONIC + s_mid ** 2)
+    interpolated = 0.5 * (ratio_nodes[:-1] + ratio_nodes[1:])
+    return float(np.max(np.abs(interpolated - exact) / exact))
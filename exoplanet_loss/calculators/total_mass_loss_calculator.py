@@ -1,8 +1,14 @@
 import numpy as np
+from scipy.integrate import cumulative_trapezoid
 from scipy.interpolate import interp1d
 
-from exoplanet_loss.calculators.lx_age_calculator import calculate_xray_luminosity, calculate_coronal_temperature_and_fx
-from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import generate_velocity_vs_distance_data
+from exoplanet_loss.calculators.lx_age_calculator import (
+    calculate_xray_luminosity,
+    calculate_coronal_temperature_and_fx,
+    integrate_xray_luminosity,
+)
+from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import wind_velocity_at
+from exoplanet_loss.calculators.stellar_wind_mass_loss_calculator import DEFAULT_RTOL, integrate_wind_mass_loss
 from exoplanet_loss.calculators.densidade_wind_stellar import rho_w
 from exoplanet_loss.calculators.txc_mass_loss_stellar_wind import calcular_taxa_perda_de_massa_interacao_vento_solar
 from exoplanet_loss.calculators.photoevap_calculator import calculo_perda_fotoevaporacao
@@ -17,6 +23,10 @@ SOLAR_RADIUS_TO_CM = 6.957e10  # 1 solar radius in cm
 SEC_PER_GYR = 3.1536e16  # seconds in 1 Gyr
 G = 6.67430e-8  # gravitational constant [cm^3 g^-1 s^-2]
 
+# Ways to integrate the photoevaporation and stellar wind mass loss rates over age
+PHOTOEVAP_METHODS = ("trapezoid", "linear", "analytic")
+WIND_METHODS = ("trapezoid", "linear", "adaptive")
+
 class TotalMassLossCalculator:
     """
     Calculator for total mass loss due to stellar wind and photoevaporation over time.
@@ -41,7 +51,8 @@ class TotalMassLossCalculator:
     ])
     def __init__(self, planet_radius_cm, planet_mass_g, planet_orbital_distance_au, 
                  eccentricity, stellar_radius_cm, stellar_mass_kg, 
-                 efficiency_factor=0.3, initial_velocity=5e3, min_age=0.01, max_age=None, age_step=0.1):
+                 efficiency_factor=0.3, initial_velocity=5e3, min_age=0.01, max_age=None, age_step=0.1,
+                 photoevap_method="trapezoid", wind_method="trapezoid", rtol=DEFAULT_RTOL, cumulative=False):
         """
         Initialize the total mass loss calculator with custom age steps.
 
@@ -54,10 +65,35 @@ class TotalMassLossCalculator:
             stellar_mass_kg (float): Stellar mass in kg
             efficiency_factor (float, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
             initial_velocity (float, optional): Initial guess velocity [m/s] for stellar wind calculation. Defaults to 5e3 m/s.
+                Kept for compatibility: the wind velocity is taken directly from the transonic branch
+                and does not depend on it.
             min_age (float, optional): Minimum age in Gyr. Defaults to 0.01.
             max_age (float, optional): Maximum age in Gyr. If None, uses the default ages. Defaults to None.
             age_step (float, optional): Age step in Gyr. Defaults to 0.1.
+            photoevap_method (str, optional): How photoevaporation is integrated over age: "trapezoid"
+                resamples the linearly interpolated rates on a 5000-point grid, "linear" integrates the
+                linear interpolant exactly on the age points, "analytic" integrates the Lx power law
+                exactly over the age range. Defaults to "trapezoid".
+            wind_method (str, optional): How the stellar wind is integrated over age: "trapezoid" and
+                "linear" as for photoevap_method, "adaptive" uses adaptive quadrature in log-age (see
+                integrate_wind_mass_loss) and adds its error estimate and number of rate evaluations
+                to the results. Defaults to "trapezoid".
+            rtol (float, optional): Relative tolerance of the adaptive wind integral. Defaults to DEFAULT_RTOL.
+            cumulative (bool, optional): Add the mass lost from the first age up to each age to the
+                results, as cumulative_wind_mass_loss, cumulative_photoevap_mass_loss and
+                cumulative_total_mass_loss. These integrate the linear interpolant exactly (or the Lx
+                power law, with photoevap_method="analytic"). Defaults to False.
         """
+        if photoevap_method not in PHOTOEVAP_METHODS:
+            raise ValueError(f"Unknown photoevaporation method: {photoevap_method}. "
+                             f"Expected one of {', '.join(PHOTOEVAP_METHODS)}")
+        if wind_method not in WIND_METHODS:
+            raise ValueError(f"Unknown wind method: {wind_method}. Expected one of {', '.join(WIND_METHODS)}")
+
+        self.photoevap_method = photoevap_method
+        self.wind_method = wind_method
+        self.rtol = rtol
+        self.cumulative = cumulative
         self.planet_radius = planet_radius_cm
         self.planet_mass = planet_mass_g
         self.planet_orbital_distance_au = planet_orbital_distance_au
@@ -101,82 +137,40 @@ class TotalMassLossCalculator:
                 - photoevap_mass_loss: Total integrated mass loss due to photoevaporation in g
                 - results_data: Dictionary containing detailed results for each age
         """
-        # Arrays to store results for each age
-        wind_mass_loss_rates = np.zeros_like(self.ages)
-        photoevap_mass_loss_rates = np.zeros_like(self.ages)
-        temperatures = np.zeros_like(self.ages)
-        wind_velocities = np.zeros_like(self.ages)
-        wind_densities = np.zeros_like(self.ages)
-        x_ray_luminosities = np.zeros_like(self.ages)
-        fx_values = np.zeros_like(self.ages)
-
-        # Calculate parameters for each age
-        for i, age in enumerate(self.ages):
-            # 1. Calculate X-ray luminosity and coronal temperature
-            lx = calculate_xray_luminosity(age)
-            t_cor, fx = calculate_coronal_temperature_and_fx(lx, self.stellar_radius)
-            temperatures[i] = t_cor
-            x_ray_luminosities[i] = lx
-            fx_values[i] = fx
-
-            # 2. Solve Parker's equation for wind velocity
-            # First convert planet distance from AU to solar radii for velocity calculation
-            planet_distance_solar_radii = self.planet_orbital_distance_au * AU_TO_CM / SOLAR_RADIUS_TO_CM
-
-            # Calculate wind velocity at planet's orbital distance
-            _, _, velocity, _ = generate_velocity_vs_distance_data(
-                T_corona=t_cor,
-                r_planeta_au=self.planet_orbital_distance_au,
-                r_min_au=0.1,  # Start close to the star
-                r_max_au=self.planet_orbital_distance_au * 1.5,  # Go a bit beyond planet's orbit
-                Mstar=self.stellar_mass,
-                v_initial_at_start=self.initial_velocity,  # Use the provided initial velocity
-                num_points=100
-            )
-
-            # Convert velocity from km/s to cm/s
-            velocity_cm_s = velocity * 1e5
-            wind_velocities[i] = velocity_cm_s
-
-            # 3. Calculate wind density at planet's orbital distance
-            density = rho_w(planet_distance_solar_radii, age)
-            wind_densities[i] = density
-
-            # 4. Calculate stellar wind mass loss rate
-            wind_mass_loss_rate = calcular_taxa_perda_de_massa_interacao_vento_solar(
-                self.planet_radius, density, velocity_cm_s
-            )
-            wind_mass_loss_rates[i] = wind_mass_loss_rate
-
-            # 5. Calculate photoevaporation mass loss rate
-            photoevap_mass_loss_rate = calculo_perda_fotoevaporacao(
-                n=self.efficiency_factor,
-                L_x=lx,
-                R_p=self.planet_radius,
-                G=G,
-                M_p=self.planet_mass,
-                a=self.planet_orbital_distance_cm,
-                e=self.eccentricity
+        # Calculate every quantity for all ages at once
+        rates = calculate_mass_loss_rates(
+            self.ages,
+            planet_radius_cm=self.planet_radius,
+            planet_mass_g=self.planet_mass,
+            planet_orbital_distance_au=self.planet_orbital_distance_au,
+            eccentricity=self.eccentricity,
+            stellar_radius_cm=self.stellar_radius,
+            stellar_mass_kg=self.stellar_mass,
+            efficiency_factor=self.efficiency_factor
+        )
+        x_ray_luminosities = rates["x_ray_luminosities"]
+        fx_values = rates["fx_values"]
+        temperatures = rates["temperatures"]
+        wind_velocities = rates["wind_velocities"]
+        wind_densities = rates["wind_densities"]
+        wind_mass_loss_rates = rates["wind_mass_loss_rates"]
+        photoevap_mass_loss_rates = rates["photoevap_mass_loss_rates"]
+
+        # Integrate mass loss rates over time
+        if self.wind_method == "adaptive":
+            wind_integral = integrate_wind_mass_loss(
+                self.planet_radius, self.planet_orbital_distance_au, self.stellar_radius, self.stellar_mass,
+                min_age=self.ages.min(), max_age=self.ages.max(), rtol=self.rtol
             )
-            photoevap_mass_loss_rates[i] = photoevap_mass_loss_rate
-
-        # 6. Integrate mass loss rates over time
-        # Create a fixed, fine-grained age grid for integration to ensure consistent results
-        # regardless of the user-provided age step - using 5000 points for higher accuracy
-        fine_age_grid = np.linspace(self.ages.min(), self.ages.max(), 5000)
-        fine_ages_seconds = fine_age_grid * SEC_PER_GYR
-
-        # Interpolate mass loss rates onto the fine grid
-        # Using linear interpolation to avoid artificial oscillations that can occur with cubic interpolation
-        wind_interp = interp1d(self.ages, wind_mass_loss_rates, kind='linear', bounds_error=False, fill_value='extrapolate')
-        photoevap_interp = interp1d(self.ages, photoevap_mass_loss_rates, kind='linear', bounds_error=False, fill_value='extrapolate')
-
-        fine_wind_rates = wind_interp(fine_age_grid)
-        fine_photoevap_rates = photoevap_interp(fine_age_grid)
+            wind_mass_loss = wind_integral["mass_loss"]
+        else:
+            wind_mass_loss = self._integrate_rates(wind_mass_loss_rates, self.wind_method)
 
-        # Use trapezoidal rule for integration on the fine grid
-        wind_mass_loss = np.trapz(fine_wind_rates, fine_ages_seconds)
-        photoevap_mass_loss = np.trapz(fine_photoevap_rates, fine_ages_seconds)
+        if self.photoevap_method == "analytic":
+            # The rate is proportional to Lx = A * t^B, which has an exact antiderivative
+            photoevap_mass_loss = self._photoevap_mass_loss_analytic(self.ages.max())
+        else:
+            photoevap_mass_loss = self._integrate_rates(photoevap_mass_loss_rates, self.photoevap_method)
         total_mass_loss = wind_mass_loss + photoevap_mass_loss
 
         # Create results data dictionary
@@ -192,12 +186,130 @@ class TotalMassLossCalculator:
             "total_mass_loss_rates": (wind_mass_loss_rates + photoevap_mass_loss_rates).tolist(),
             "user_age_step": self.user_age_step
         }
+        if self.wind_method == "adaptive":
+            results_data["wind_integration_error"] = wind_integral["error"]
+            results_data["wind_integration_evaluations"] = wind_integral["evaluations"]
+
+        if self.cumulative:
+            # Mass lost from the first age up to each age, integrating the linear interpolant exactly
+            ages_seconds = self.ages * SEC_PER_GYR
+            cumulative_wind = cumulative_trapezoid(wind_mass_loss_rates, ages_seconds, initial=0)
+            if self.photoevap_method == "analytic":
+                cumulative_photoevap = self._photoevap_mass_loss_analytic(self.ages)
+            else:
+                cumulative_photoevap = cumulative_trapezoid(photoevap_mass_loss_rates, ages_seconds, initial=0)
+            results_data["cumulative_wind_mass_loss"] = cumulative_wind.tolist()
+            results_data["cumulative_photoevap_mass_loss"] = cumulative_photoevap.tolist()
+            results_data["cumulative_total_mass_loss"] = (cumulative_wind + cumulative_photoevap).tolist()
 
         return total_mass_loss, wind_mass_loss, photoevap_mass_loss, results_data
 
+    def _integrate_rates(self, rates, method):
+        """
+        Integrate mass loss rates sampled at self.ages over time, in g.
+
+        With "linear" the piecewise-linear interpolant of the rates is integrated exactly on the age
+        nodes. With "trapezoid" it is resampled on a fine grid first.
+        """
+        if method == "linear":
+            return np.trapz(rates, self.ages * SEC_PER_GYR)
+
+        # Create a fixed, fine-grained age grid for integration to ensure consistent results
+        # regardless of the user-provided age step - using 5000 points for higher accuracy
+        fine_age_grid = np.linspace(self.ages.min(), self.ages.max(), 5000)
+        fine_ages_seconds = fine_age_grid * SEC_PER_GYR
+
+        # Interpolate mass loss rates onto the fine grid
+        # Using linear interpolation to avoid artificial oscillations that can occur with cubic interpolation
+        interp = interp1d(self.ages, rates, kind='linear', bounds_error=False, fill_value='extrapolate')
+
+        # Use trapezoidal rule for integration on the fine grid
+        return np.trapz(interp(fine_age_grid), fine_ages_seconds)
+
+    def _photoevap_mass_loss_analytic(self, max_age):
+        """Photoevaporation mass loss in g from the first age to max_age (float or array), in closed form."""
+        return calculo_perda_fotoevaporacao(
+            n=self.efficiency_factor,
+            L_x=integrate_xray_luminosity(self.ages.min(), max_age),
+            R_p=self.planet_radius,
+            G=G,
+            M_p=self.planet_mass,
+            a=self.planet_orbital_distance_cm,
+            e=self.eccentricity
+        )
+
+def calculate_mass_loss_rates(ages, planet_radius_cm, planet_mass_g, planet_orbital_distance_au,
+                              eccentricity, stellar_radius_cm, stellar_mass_kg, efficiency_factor=0.3):
+    """
+    Calculate the stellar and mass loss quantities for many ages in a single vectorized pass.
+
+    All parameters are combined with NumPy broadcasting rules, with ages running along the last
+    axis. A 1-D array of ages gives 1-D results for one planet; passing the planet and star
+    parameters as column vectors of shape (N, 1) gives (N, n_ages) results for N planets, and
+    passing the orbital distance as a column vector evaluates one star at N radii.
+
+    Parameters:
+        ages (array-like): Stellar ages in Gyr
+        planet_radius_cm (float or array-like): Planet radius in cm
+        planet_mass_g (float or array-like): Planet mass in g
+        planet_orbital_distance_au (float or array-like): Planet orbital distance in AU
+        eccentricity (float or array-like): Orbital eccentricity
+        stellar_radius_cm (float or array-like): Stellar radius in cm
+        stellar_mass_kg (float or array-like): Stellar mass in kg
+        efficiency_factor (float or array-like, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
+
+    Returns:
+        dict: Dictionary of arrays with the same keys as results_data in TotalMassLossCalculator:
+            x_ray_luminosities (erg/s), fx_values, temperatures (K), wind_velocities (cm/s),
+            wind_densities (g/cm³), wind_mass_loss_rates (g/s) and photoevap_mass_loss_rates (g/s)
+    """
+    ages = np.asarray(ages, dtype=float)
+    planet_orbital_distance_au = np.asarray(planet_orbital_distance_au, dtype=float)
+
+    # 1. X-ray luminosity and coronal temperature
+    lx = calculate_xray_luminosity(ages)
+    t_cor, fx = calculate_coronal_temperature_and_fx(lx, stellar_radius_cm)
+
+    # 2. Wind velocity at the planet's orbital distance, converted from km/s to cm/s
+    velocity_cm_s = wind_velocity_at(planet_orbital_distance_au, t_cor, stellar_mass_kg) * 1e5
+
+    # 3. Wind density at the planet's orbital distance
+    planet_distance_solar_radii = planet_orbital_distance_au * AU_TO_CM / SOLAR_RADIUS_TO_CM
+    density = rho_w(planet_distance_solar_radii, ages)
+
+    # 4. Stellar wind mass loss rate
+    wind_mass_loss_rates = calcular_taxa_perda_de_massa_interacao_vento_solar(
+        planet_radius_cm, density, velocity_cm_s
+    )
+
+    # 5. Photoevaporation mass loss rate
+    photoevap_mass_loss_rates = calculo_perda_fotoevaporacao(
+        n=efficiency_factor,
+        L_x=lx,
+        R_p=planet_radius_cm,
+        G=G,
+        M_p=planet_mass_g,
+        a=planet_orbital_distance_au * AU_TO_CM,
+        e=eccentricity
+    )
+
+    shape = np.broadcast(ages, planet_radius_cm, planet_mass_g, planet_orbital_distance_au, eccentricity,
+                         stellar_radius_cm, stellar_mass_kg, efficiency_factor).shape
+    return {
+        "x_ray_luminosities": np.broadcast_to(lx, shape),
+        "fx_values": np.broadcast_to(fx, shape),
+        "temperatures": np.broadcast_to(t_cor, shape),
+        "wind_velocities": np.broadcast_to(velocity_cm_s, shape),
+        "wind_densities": np.broadcast_to(density, shape),
+        "wind_mass_loss_rates": np.broadcast_to(wind_mass_loss_rates, shape),
+        "photoevap_mass_loss_rates": np.broadcast_to(photoevap_mass_loss_rates, shape),
+    }
+
 def calculate_total_mass_loss(planet_radius_cm, planet_mass_g, planet_orbital_distance_au, 
                              eccentricity, stellar_radius_cm, stellar_mass_kg, 
-                             efficiency_factor=0.3, initial_velocity=5e3, min_age=0.01, max_age=None, age_step=0.1):
+                             efficiency_factor=0.3, initial_velocity=5e3, min_age=0.01, max_age=None, age_step=0.1,
+                             photoevap_method="trapezoid", wind_method="trapezoid", rtol=DEFAULT_RTOL,
+                             cumulative=False):
     """
     Convenience function to calculate total mass loss with custom age steps.
 
@@ -227,6 +339,12 @@ def calculate_total_mass_loss(planet_radius_cm, planet_mass_g, planet_orbital_di
         min_age (float, optional): Minimum age in Gyr. Defaults to 0.01.
         max_age (float, optional): Maximum age in Gyr. If None, uses the default ages. Defaults to None.
         age_step (float, optional): Age step in Gyr. Defaults to 0.1.
+        photoevap_method (str, optional): "trapezoid", "linear" or "analytic" integration of
+            photoevaporation over age. Defaults to "trapezoid".
+        wind_method (str, optional): "trapezoid", "linear" or "adaptive" integration of the stellar
+            wind over age. Defaults to "trapezoid".
+        rtol (float, optional): Relative tolerance of the adaptive wind integral. Defaults to DEFAULT_RTOL.
+        cumulative (bool, optional): Add the cumulative mass loss at each age to results_data. Defaults to False.
 
     Returns:
         tuple: (total_mass_loss, wind_mass_loss, photoevap_mass_loss, results_data)
@@ -242,7 +360,11 @@ def calculate_total_mass_loss(planet_radius_cm, planet_mass_g, planet_orbital_di
         initial_velocity,
         min_age,
         max_age,
-        age_step
+        age_step,
+        photoevap_method,
+        wind_method,
+        rtol,
+        cumulative
     )
 
     return calculator.calculate_mass_loss()
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from exoplanet_loss.batch import DEFAULT_CHUNK_SIZE, RESULT_COLUMNS, run_parallel
+from exoplanet_loss.calculador_final import BATCH_COLUMNS
+from exoplanet_loss.data.archive_mirror import MIRROR_TABLES
+from exoplanet_loss.data.exoplanet import NASA_TAP_URL, get_archive_mirror, get_exoplanet_data_many, sync_archive_mirror
+from exoplanet_loss.pipeline import read_chunks
+from exoplanet_loss.utils.logging import configure_logging, get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+
+def split_planet_name(full_name):
+    """
+    Split a full planet name into star name and planet designation at the last space.
+
+    Parameters:
+        full_name (str): Full planet name (e.g., 'Kepler 7b' or 'TRAPPIST-1 e')
+
+    Returns:
+        tuple: (star_name, planet_name)
+
+    Raises:
+        ValueError: If the name has no space separating star and planet
+    """
+    star_name, _, planet_name = full_name.strip().rpartition(" ")
+    if not star_name:
+        raise ValueError(f"Invalid planet name format: {full_name}. Expected format: 'Star PlanetDesignation'")
+    return star_name, planet_name
+
+
+def load_planet_names(names):
+    """
+    Look up star and planet data for a list of planet names.
+
+    The names are resolved together with get_exoplanet_data_many, so the planets missing from the
+    cache cost one archive query per chunk of names instead of one per planet.
+
+    Parameters:
+        names (list): Full planet names (e.g., ['Kepler 7b'])
+
+    Returns:
+        pandas.DataFrame: One row per name, with a "name" column, the host star in a "hostname"
+            column, the data returned by get_exoplanet_data and an "error" column for names that
+            could not be found
+    """
+    rows = []
+    for name in names:
+        row = {"name": name}
+        try:
+            row["hostname"], row["planet_name"] = split_planet_name(name)
+        except ValueError as e:
+            logger.warning(f"Could not get data for {name}: {str(e)}")
+            row["error"] = str(e)
+        rows.append(row)
+
+    found = get_exoplanet_data_many([(row["hostname"], row["planet_name"]) for row in rows if "error" not in row])
+    for row in rows:
+        if "error" in row:
+            continue
+        data = found[(row["hostname"], row.pop("planet_name"))]
+        if data:
+            row.update(data)
+        else:
+            row["error"] = f"No data found for {row['name']}"
+            logger.warning(f"Could not get data for {row['name']}: {row['error']}")
+    return pd.DataFrame(rows)
+
+
+def run_batch(inputs, output_path, checkpoint_path=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+              efficiency_factor=0.3, min_age=0.01, input_id=None):
+    """
+    Calculate the total mass loss of every planet in inputs, with checkpointing.
+
+    Planets are processed in rounds of workers * chunk_size rows. After each round the results are
+    appended to output_path and the checkpoint records how many rows and output bytes are complete.
+    If a checkpoint for the same input exists, the run resumes after the last completed round,
+    discarding any output written after it.
+
+    Parameters:
+        inputs (pandas.DataFrame): Planets to process, one per row
+        output_path (str): CSV file for the results
+        checkpoint_path (str, optional): Checkpoint file. Defaults to output_path + '.checkpoint'.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        chunk_size (int, optional): Number of planets per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation. Defaults to 0.3.
+        min_age (float, optional): Minimum age in Gyr. Defaults to 0.01.
+        input_id (str, optional): Identifies the input, so a checkpoint of another run is not resumed.
+
+    Returns:
+        int: Number of planets processed by this call (not counting resumed rows)
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    workers = workers or os.cpu_count() or 1
+    total = len(inputs)
+
+    columns = [column for column in inputs.columns if column != "error"] + RESULT_COLUMNS + ["error"]
+
+    checkpoint = read_checkpoint(checkpoint_path)
+    if checkpoint and checkpoint.get("input_id") == input_id and os.path.exists(output_path):
+        completed = checkpoint["completed"]
+        # Drop anything written after the last checkpoint
+        with open(output_path, "r+") as f:
+            f.truncate(checkpoint["output_bytes"])
+        logger.info(f"Resuming from checkpoint: {completed}/{total} planets already done")
+    else:
+        completed = 0
+
+    round_size = workers * chunk_size
+    start_time = time.time()
+    processed = 0
+
+    while completed < total:
+        records = inputs.iloc[completed:completed + round_size].to_dict("records")
+
+        # Rows whose input could not be loaded keep their error and are not calculated
+        pending = [i for i, record in enumerate(records) if pd.isna(record.get("error"))]
+        results = run_parallel([{key: value for key, value in records[i].items() if key != "error"} for i in pending],
+                               workers=workers, chunk_size=chunk_size, efficiency_factor=efficiency_factor,
+                               min_age=min_age)
+        for i, result in zip(pending, results):
+            records[i] = result
+
+        pd.DataFrame(records).reindex(columns=columns).to_csv(
+            output_path, mode="a" if completed else "w", header=(completed == 0), index=False)
+
+        completed += len(records)
+        processed += len(records)
+        write_checkpoint(checkpoint_path, {
+            "input_id": input_id,
+            "completed": completed,
+            "output_bytes": os.path.getsize(output_path),
+        })
+
+        elapsed = time.time() - start_time
+        logger.info(f"{completed}/{total} planets done ({processed / elapsed:.1f} planets/s)")
+
+    return processed
+
+
+def read_checkpoint(path):
+    """
+    Read a checkpoint file.
+
+    Parameters:
+        path (str): Checkpoint file
+
+    Returns:
+        dict: The checkpoint, or None if there is no valid checkpoint
+    """
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+    except Exception as e:
+        logger.warning(f"Error reading checkpoint file: {str(e)}. Starting from the beginning.")
+    return None
+
+
+def write_checkpoint(path, checkpoint):
+    """
+    Write a checkpoint file atomically, so an interrupted write never leaves it half written.
+
+    Parameters:
+        path (str): Checkpoint file
+        checkpoint (dict): Checkpoint data
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_path, path)
+
+
+def batch_command(args):
+    """Run the 'batch' command."""
+    if args.catalog:
+        inputs = pd.concat(list(read_chunks(args.catalog)), ignore_index=True)
+        stat = os.stat(args.catalog)
+        input_id = f"{os.path.abspath(args.catalog)}:{stat.st_size}:{stat.st_mtime}"
+    else:
+        inputs = load_planet_names(args.planets)
+        input_id = "names:" + "|".join(args.planets)
+
+    missing_fields = [field for field in BATCH_COLUMNS if field not in inputs]
+    if missing_fields and "error" not in inputs:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    run_batch(inputs, args.output, checkpoint_path=args.checkpoint, workers=args.workers,
+              chunk_size=args.chunk_size, efficiency_factor=args.efficiency_factor,
+              min_age=args.min_age, input_id=input_id)
+    logger.info(f"Results written to {args.output}")
+
+
+def sync_archive_command(args):
+    """Run the 'sync-archive' command."""
+    rows = sync_archive_mirror(table=args.table, full=args.full, tap_url=args.tap_url)
+    info = get_archive_mirror().info()
+    logger.info(f"{rows} rows downloaded; the mirror has {info['rows']} planets, "
+                f"updated up to {info['last_rowupdate'] or 'unknown'}")
+
+
+def build_parser():
+    """Build the argument parser of the exoplanet-loss command."""
+    parser = argparse.ArgumentParser(prog="exoplanet-loss", description="Exoplanet mass loss calculations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="calculate the total mass loss of many planets in parallel")
+    source = batch.add_mutually_exclusive_group(required=True)
+    source.add_argument("--catalog", help="CSV or Parquet file with one planet per row")
+    source.add_argument("--planets", nargs="+", metavar="NAME", help="planet names, e.g. 'Kepler 7b'")
+    batch.add_argument("-o", "--output", required=True, help="CSV file for the results")
+    batch.add_argument("--checkpoint", help="checkpoint file (default: OUTPUT.checkpoint)")
+    batch.add_argument("--workers", type=int, help="number of worker processes (default: number of CPUs)")
+    batch.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="planets per chunk")
+    batch.add_argument("--efficiency-factor", type=float, default=0.3, help="photoevaporation efficiency factor")
+    batch.add_argument("--min-age", type=float, default=0.01, help="minimum age in Gyr")
+    batch.set_defaults(func=batch_command)
+
+    sync = subparsers.add_parser("sync-archive",
+                                 help="download the NASA Exoplanet Archive rows changed since the last sync")
+    sync.add_argument("--table", choices=list(MIRROR_TABLES), default="ps", help="archive table to mirror")
+    sync.add_argument("--full", action="store_true", help="download the whole table again")
+    sync.add_argument("--tap-url", default=NASA_TAP_URL, help="TAP endpoint of the archive")
+    sync.set_defaults(func=sync_archive_command)
+
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the exoplanet-loss command."""
+    configure_logging()
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except KeyboardInterrupt:
+        logger.info("Interrupted. Run the same command again to resume from the last checkpoint.")
+        return 130
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
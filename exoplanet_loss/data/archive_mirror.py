@@ -0,0 +1,210 @@
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+from exoplanet_loss.data.journal_cache import file_signature
+from exoplanet_loss.utils.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Text columns every mirror keeps: the names used for lookups and the date of the last change of a row
+KEY_COLUMNS = ("pl_name", "hostname", "pl_letter", "rowupdate")
+
+# Archive tables that can be mirrored, with the condition selecting one row per planet
+MIRROR_TABLES = {
+    "ps": "default_flag = 1",
+    "pscomppars": None,
+}
+
+
+class ArchiveMirror:
+    """
+    Local copy of a NASA Exoplanet Archive table, stored as a compressed .npz file with one array per column.
+
+    sync() downloads the rows of the table with one TAP request; later syncs only request the rows
+    whose rowupdate is on or after the newest rowupdate already mirrored, and replace the mirrored
+    rows of the same planets. find() looks planets up in memory, so catalog-wide runs need no
+    network calls. The file is loaded on first use and again whenever it changes on disk.
+
+    Parameters:
+        path (str): Mirror file
+        columns (list): Numeric columns to mirror, besides KEY_COLUMNS
+    """
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self._lock = threading.Lock()
+        self._signature = None
+        self._data = None
+        self._index = {}
+
+    def _load(self):
+        """
+        Columns of the mirror file, reloaded if the file changed, and the lookup index of its rows.
+
+        Returns None for the columns if there is no usable mirror.
+        """
+        with self._lock:
+            signature = file_signature(self.path)
+            if signature == self._signature:
+                return self._data, self._index
+
+            data = None
+            if signature is not None:
+                try:
+                    with np.load(self.path, allow_pickle=False) as f:
+                        data = {name: f[name] for name in f.files}
+                except Exception as e:
+                    logger.warning(f"Error reading archive mirror {self.path}: {str(e)}")
+                    data = None
+            if data is not None and list(data.get("columns", [])) != self.columns:
+                logger.warning(f"Archive mirror {self.path} has other columns than {self.columns}. Run a full sync.")
+                data = None
+
+            self._data = data
+            self._index = self._build_index(data) if data is not None else {}
+            self._signature = signature
+            return data, self._index
+
+    @staticmethod
+    def _build_index(data):
+        """Row of each lookup name: the planet name and '<hostname> <pl_letter>', in lower case."""
+        index = {}
+        for i, (host, letter) in enumerate(zip(data["hostname"], data["pl_letter"])):
+            index[f"{host} {letter}".lower()] = i
+        # Planet names take precedence over host star and letter
+        for i, name in enumerate(data["pl_name"]):
+            index[name.lower()] = i
+        return index
+
+    def find(self, planet_name):
+        """
+        Look up a planet in the mirror.
+
+        Parameters:
+            planet_name (str): Full planet name (e.g., 'Kepler-7 b'), or host star and planet letter
+
+        Returns:
+            dict: The mirrored row, with None for missing values, or None if the planet is not mirrored
+        """
+        data, index = self._load()
+        if data is None:
+            return None
+        i = index.get(planet_name.strip().lower())
+        if i is None:
+            return None
+
+        row = {column: str(data[column][i]) for column in KEY_COLUMNS}
+        for column in self.columns:
+            value = float(data[column][i])
+            row[column] = None if np.isnan(value) else value
+        return row
+
+    def info(self):
+        """
+        Describe the mirror file.
+
+        Returns:
+            dict: "rows", "table", "last_rowupdate" and "synced_at" (Unix time), or None if there is no mirror
+        """
+        data, _ = self._load()
+        if data is None:
+            return None
+        return {
+            "rows": len(data["pl_name"]),
+            "table": str(data["table"]),
+            "last_rowupdate": str(data["last_rowupdate"]),
+            "synced_at": float(data["synced_at"]),
+        }
+
+    def sync(self, tap_url, table="ps", full=False, timeout=(10, 300)):
+        """
+        Download new and changed rows of the archive table into the mirror.
+
+        Parameters:
+            tap_url (str): Synchronous TAP endpoint of the archive
+            table (str, optional): Table to mirror, one of MIRROR_TABLES. Defaults to "ps".
+            full (bool, optional): Download every row even if a mirror of the table exists. Defaults to False.
+            timeout (tuple, optional): (connect timeout, read timeout) in seconds. Defaults to (10, 300).
+
+        Returns:
+            int: Number of rows downloaded
+
+        Raises:
+            ValueError: If the table cannot be mirrored
+            ConnectionError: If the archive does not answer the query
+        """
+        if table not in MIRROR_TABLES:
+            raise ValueError(f"Unknown archive table: {table}. Expected one of {', '.join(MIRROR_TABLES)}")
+
+        current, _ = self._load()
+        if current is not None and str(current["table"]) != table:
+            current = None
+        if full:
+            current = None
+
+        conditions = [MIRROR_TABLES[table]] if MIRROR_TABLES[table] else []
+        if current is not None:
+            # rowupdate is a date, so rows changed later on the same day are requested again
+            conditions.append(f"rowupdate >= '{current['last_rowupdate']}'")
+        query = f"SELECT {','.join(list(KEY_COLUMNS) + self.columns)} FROM {table}"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+
+        logger.info(f"Syncing archive mirror {self.path}: {query}")
+        response = requests.get(tap_url, params={"query": query, "format": "json"}, timeout=timeout)
+        try:
+            if response.status_code != 200:
+                raise ConnectionError(f"Archive query failed with status {response.status_code}: {response.text[:200]}")
+            rows = response.json()
+        finally:
+            # Close the response to release the connection back to the pool
+            response.close()
+
+        fetched = self._to_columns(rows)
+        merged = self._merge(current, fetched)
+        rowupdates = [value for value in merged["rowupdate"] if value]
+        merged["last_rowupdate"] = np.array(max(rowupdates) if rowupdates else "")
+        merged["table"] = np.array(table)
+        merged["columns"] = np.array(self.columns, dtype=str)
+        merged["synced_at"] = np.array(time.time())
+        self._write(merged)
+
+        logger.info(f"Archive mirror {self.path}: {len(rows)} rows downloaded, {len(merged['pl_name'])} planets")
+        return len(rows)
+
+    def _to_columns(self, rows):
+        """Turn the rows of a JSON TAP response into one array per column."""
+        columns = {column: np.array([row.get(column) or "" for row in rows], dtype=str) for column in KEY_COLUMNS}
+        for column in self.columns:
+            columns[column] = np.array([row.get(column) for row in rows], dtype=float)
+        return columns
+
+    def _merge(self, current, fetched):
+        """Mirrored rows (if any) updated with the fetched rows, keeping one row per planet."""
+        merged = {}
+        for column in list(KEY_COLUMNS) + self.columns:
+            merged[column] = np.concatenate([current[column], fetched[column]]) if current is not None else fetched[column]
+        # The last row of each planet wins, and the fetched rows come last
+        last = {name.lower(): i for i, name in enumerate(merged["pl_name"])}
+        keep = np.sort(np.fromiter(last.values(), dtype=int, count=len(last)))
+        return {column: values[keep] for column, values in merged.items()}
+
+    def _write(self, data):
+        """Write the mirror file atomically."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".npz")
+        os.close(fd)
+        try:
+            np.savez_compressed(temp_path, **data)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
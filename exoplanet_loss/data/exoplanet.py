@@ -1,10 +1,14 @@
 import json
 import os
+import threading
 
 import pyvo
 import pyvo.dal.exceptions
 import requests
 
+from exoplanet_loss.data.archive_mirror import ArchiveMirror
+from exoplanet_loss.data.journal_cache import JournalCache, file_signature, write_json_atomic
+from exoplanet_loss.data.sqlite_cache import SQLiteCache
 from exoplanet_loss.utils.logging import get_logger
 
 # Get logger for this module
@@ -13,26 +17,184 @@ logger = get_logger(__name__)
 # Define cache file path
 CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
 CACHE_FILE = os.path.join(CACHE_DIR, "exoplanet_cache.json")
+CACHE_DB_FILE = os.path.join(CACHE_DIR, "exoplanet_cache.sqlite3")
+
+# Local copy of the NASA Exoplanet Archive, written by sync_archive_mirror
+MIRROR_FILE = os.path.join(CACHE_DIR, "nasa_archive_mirror.npz")
+
+# Storage of the cache: "json" keeps it in CACHE_FILE, "journal" in CACHE_FILE plus an append-only
+# journal next to it, "sqlite" in CACHE_DB_FILE, importing CACHE_FILE the first time the database is opened
+CACHE_BACKENDS = ("json", "journal", "sqlite")
+CACHE_BACKEND = os.environ.get("EXOPLANET_CACHE_BACKEND", "json")
+
+_sqlite_cache = None
+_sqlite_cache_lock = threading.Lock()
+_journal_cache = None
+_journal_cache_lock = threading.Lock()
+_archive_mirror = None
+_archive_mirror_lock = threading.Lock()
+
+# Parsed contents of the JSON cache, reused until the file's mtime, size or inode changes
+_json_cache = {"signature": None, "data": {}}
+_json_cache_lock = threading.Lock()
 
 # Ensure cache directory exists
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Synchronous TAP endpoint of the NASA Exoplanet Archive
+NASA_TAP_URL = "https://exoplanetarchive.ipac.caltech.edu/TAP/sync"
+
+# NASA Exoplanet Archive column of each exoplanet data field
+NASA_ARCHIVE_COLUMNS = {
+    "Restrela": "st_rad",
+    "Mestrela": "st_mass",
+    "RplanetaEarth": "pl_rade",
+    "MplanetaEarth": "pl_bmasse",
+    "EixoMaiorPlaneta": "pl_orbsmax",
+    "Excentricidade": "pl_orbeccen",
+    "t_gyr": "st_age"
+}
+
+# Archive columns of the exoplanet data fields, with their upper (err1) and lower (err2) uncertainties
+NASA_ARCHIVE_VALUE_COLUMNS = [f"{column}{suffix}" for column in NASA_ARCHIVE_COLUMNS.values()
+                              for suffix in ("", "err1", "err2")]
+
+# Number of planet names per archive query of get_exoplanet_data_many
+ARCHIVE_QUERY_CHUNK_SIZE = 100
+
+# TAP service of exoplanet.eu
+EXOPLANET_EU_TAP_URL = "http://voparis-tap-planeto.obspm.fr/tap"
+
+
+def get_sqlite_cache():
+    """
+    Return the SQLite cache at CACHE_DB_FILE, opening it and migrating CACHE_FILE into it on first use.
+
+    Returns:
+        SQLiteCache: The cache database
+    """
+    global _sqlite_cache
+    with _sqlite_cache_lock:
+        if _sqlite_cache is None or _sqlite_cache.path != CACHE_DB_FILE:
+            cache = SQLiteCache(CACHE_DB_FILE)
+            cache.migrate_from_json(CACHE_FILE)
+            _sqlite_cache = cache
+        return _sqlite_cache
+
+
+def get_journal_cache():
+    """
+    Return the journaled cache whose snapshot is CACHE_FILE.
+
+    Returns:
+        JournalCache: The cache snapshot and journal
+    """
+    global _journal_cache
+    with _journal_cache_lock:
+        if _journal_cache is None or _journal_cache.path != CACHE_FILE:
+            _journal_cache = JournalCache(CACHE_FILE)
+        return _journal_cache
+
+
+def get_archive_mirror():
+    """
+    Return the local copy of the NASA Exoplanet Archive at MIRROR_FILE.
+
+    Returns:
+        ArchiveMirror: The mirror; find() returns None for every planet until it has been synced
+    """
+    global _archive_mirror
+    with _archive_mirror_lock:
+        if _archive_mirror is None or _archive_mirror.path != MIRROR_FILE:
+            _archive_mirror = ArchiveMirror(MIRROR_FILE, NASA_ARCHIVE_VALUE_COLUMNS)
+        return _archive_mirror
+
+
+def sync_archive_mirror(table="ps", full=False, tap_url=NASA_TAP_URL):
+    """
+    Download the NASA Exoplanet Archive rows that changed since the last sync into MIRROR_FILE.
+
+    get_exoplanet_data looks planets up in the mirror before querying the archive, so after a
+    sync batch runs over the whole catalog need no per-planet network calls.
+
+    Parameters:
+        table (str, optional): Archive table, "ps" (default parameter set of each planet) or "pscomppars". Defaults to "ps".
+        full (bool, optional): Download the whole table again. Defaults to False.
+        tap_url (str, optional): TAP endpoint. Defaults to NASA_TAP_URL.
+
+    Returns:
+        int: Number of rows downloaded
+    """
+    return get_archive_mirror().sync(tap_url, table=table, full=full)
+
+
+def compact_cache():
+    """
+    Merge the cache journal into the CACHE_FILE snapshot.
+
+    Writes compact the journal on their own once it grows large; this forces it, e.g. before
+    copying CACHE_FILE. It does nothing for the other backends.
+    """
+    if _cache_backend() == "journal":
+        get_journal_cache().compact()
+
+
+def _cache_backend():
+    """CACHE_BACKEND, checked against CACHE_BACKENDS."""
+    if CACHE_BACKEND not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend: {CACHE_BACKEND}. Expected one of {', '.join(CACHE_BACKENDS)}")
+    return CACHE_BACKEND
+
 
 def read_cache():
     """
-    Read the exoplanet data cache from the JSON file.
+    Read the whole exoplanet data cache.
 
     Returns:
-        dict: Dictionary containing cached exoplanet data, or empty dict if cache doesn't exist
+        dict: Dictionary containing cached exoplanet data keyed on "<star>_<planet>", or empty dict
+            if cache doesn't exist
     """
-    try:
-        if os.path.exists(CACHE_FILE):
+    backend = _cache_backend()
+    if backend == "sqlite":
+        return {f"{star}_{planet}": data for (star, planet), data in get_sqlite_cache().items()}
+    if backend == "journal":
+        return get_journal_cache().items()
+
+    # Entries are copied too, so changing them cannot alter the parsed cache
+    return {cache_key: dict(data) for cache_key, data in _read_json_cache().items()}
+
+
+def _read_json_cache():
+    """
+    Parsed JSON cache, shared by all callers; it must not be modified.
+
+    The file is only read and parsed again when its mtime, size or inode changed since the last read.
+    A file that cannot be parsed is moved to <CACHE_FILE>.corrupt, so the next write does not
+    overwrite what is left of it.
+    """
+    with _json_cache_lock:
+        signature = file_signature(CACHE_FILE)
+        if signature is None:
+            return {}
+        if signature == _json_cache["signature"]:
+            return _json_cache["data"]
+
+        try:
             with open(CACHE_FILE, 'r') as f:
-                return json.load(f)
-        return {}
-    except Exception as e:
-        logger.warning(f"Error reading cache file: {str(e)}. Starting with empty cache.")
-        return {}
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error reading cache file: {str(e)}. Moving it to {CACHE_FILE}.corrupt "
+                           f"and starting with empty cache.")
+            try:
+                os.replace(CACHE_FILE, f"{CACHE_FILE}.corrupt")
+            except OSError as move_error:
+                # Another process may have moved or replaced the file already
+                logger.warning(f"Could not move cache file to {CACHE_FILE}.corrupt: {str(move_error)}")
+            return {}
+
+        _json_cache["signature"] = signature
+        _json_cache["data"] = data
+        return data
 
 
 def write_cache(cache_data):
@@ -40,11 +202,29 @@ def write_cache(cache_data):
     Write exoplanet data to the cache file.
 
     Parameters:
-        cache_data (dict): Dictionary containing exoplanet data to cache
+        cache_data (dict): Dictionary containing exoplanet data to cache, keyed on "<star>_<planet>"
     """
+    backend = _cache_backend()
+    if backend == "sqlite":
+        entries = {}
+        for cache_key, data in cache_data.items():
+            star_name, _, planet_name = cache_key.partition('_')
+            entries[(star_name, planet_name)] = data
+        get_sqlite_cache().replace(entries)
+        logger.info(f"Cache updated successfully at {CACHE_DB_FILE}")
+        return
+    if backend == "journal":
+        get_journal_cache().replace(cache_data)
+        logger.info(f"Cache updated successfully at {CACHE_FILE}")
+        return
+
     try:
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(cache_data, f, indent=2)
+        with _json_cache_lock:
+            # Written to a temporary file and moved into place, so a crash cannot leave a partial file
+            write_json_atomic(CACHE_FILE, cache_data)
+            # Keep what was just written, so the next read does not parse the file again
+            _json_cache["signature"] = file_signature(CACHE_FILE)
+            _json_cache["data"] = {cache_key: dict(data) for cache_key, data in cache_data.items()}
         logger.info(f"Cache updated successfully at {CACHE_FILE}")
     except Exception as e:
         logger.error(f"Error writing to cache file: {str(e)}")
@@ -61,9 +241,15 @@ def get_from_cache(star_name, planet_name):
     Returns:
         dict: Dictionary with exoplanet data or None if not found in cache
     """
-    cache = read_cache()
+    backend = _cache_backend()
+    if backend == "sqlite":
+        return get_sqlite_cache().get(star_name, planet_name)
+
     cache_key = f"{star_name.lower()}_{planet_name.lower()}"
-    return cache.get(cache_key)
+    if backend == "journal":
+        return get_journal_cache().get(cache_key)
+    data = _read_json_cache().get(cache_key)
+    return dict(data) if data is not None else None
 
 
 def add_to_cache(star_name, planet_name, data):
@@ -75,12 +261,47 @@ def add_to_cache(star_name, planet_name, data):
         planet_name (str): Name or designation of the planet
         data (dict): Exoplanet data to cache
     """
-    cache = read_cache()
+    backend = _cache_backend()
+    if backend == "sqlite":
+        get_sqlite_cache().put(star_name, planet_name, data)
+        return
+
     cache_key = f"{star_name.lower()}_{planet_name.lower()}"
+    if backend == "journal":
+        # One appended line instead of rewriting the whole file
+        get_journal_cache().put(cache_key, data)
+        return
+
+    cache = read_cache()
+    if cache.get(cache_key) == data:
+        return
     cache[cache_key] = data
     write_cache(cache)
 
 
+def add_many_to_cache(entries):
+    """
+    Add the data of several exoplanets to the cache, writing the JSON cache file at most once.
+
+    Parameters:
+        entries (dict): Exoplanet data keyed on (star_name, planet_name) tuples
+    """
+    if _cache_backend() != "json":
+        for (star_name, planet_name), data in entries.items():
+            add_to_cache(star_name, planet_name, data)
+        return
+
+    cache = read_cache()
+    changed = False
+    for (star_name, planet_name), data in entries.items():
+        cache_key = f"{star_name.lower()}_{planet_name.lower()}"
+        if cache.get(cache_key) != data:
+            cache[cache_key] = data
+            changed = True
+    if changed:
+        write_cache(cache)
+
+
 def add_custom_exoplanet_data(star_name, planet_name, data):
     """
     Add custom exoplanet data to the cache.
@@ -135,6 +356,10 @@ def list_cached_exoplanets():
               - planet_name: Name or designation of the planet
               - full_name: Full name of the exoplanet (star_name + planet_name)
     """
+    if _cache_backend() == "sqlite":
+        return [{'star_name': star_name, 'planet_name': planet_name, 'full_name': f"{star_name} {planet_name}"}
+                for star_name, planet_name in get_sqlite_cache().names()]
+
     cache = read_cache()
     exoplanets = []
 
@@ -164,12 +389,20 @@ def remove_from_cache(star_name, planet_name):
     Returns:
         bool: True if the exoplanet was removed, False if it wasn't in the cache
     """
-    cache = read_cache()
-    cache_key = f"{star_name.lower()}_{planet_name.lower()}"
-
-    if cache_key in cache:
-        del cache[cache_key]
-        write_cache(cache)
+    backend = _cache_backend()
+    if backend == "sqlite":
+        removed = get_sqlite_cache().delete(star_name, planet_name)
+    elif backend == "journal":
+        removed = get_journal_cache().delete(f"{star_name.lower()}_{planet_name.lower()}")
+    else:
+        cache = read_cache()
+        cache_key = f"{star_name.lower()}_{planet_name.lower()}"
+        removed = cache_key in cache
+        if removed:
+            del cache[cache_key]
+            write_cache(cache)
+
+    if removed:
         logger.info(f"Removed {star_name} {planet_name} from cache")
         return True
     else:
@@ -186,7 +419,13 @@ def clear_cache():
     """
     try:
         # Create an empty cache
-        write_cache({})
+        backend = _cache_backend()
+        if backend == "sqlite":
+            get_sqlite_cache().clear()
+        elif backend == "journal":
+            get_journal_cache().clear()
+        else:
+            write_cache({})
         logger.info("Cache cleared successfully")
         return True
     except Exception as e:
@@ -211,6 +450,8 @@ def get_exoplanet_data(star_name, planet_name):
             - EixoMaiorPlaneta: Semi-major axis in AU
             - Excentricidade: Orbital eccentricity
             - t_gyr: Age of the system in Gyr
+            - <field>_err1, <field>_err2: Upper and lower uncertainties of the fields above, when
+              the NASA Exoplanet Archive provides them
 
     Raises:
         ValueError: If the planet cannot be found or required data is missing
@@ -240,6 +481,12 @@ def get_exoplanet_data(star_name, planet_name):
     # Construct the full planet name
     full_planet_name = f"{star_name} {planet_name}"
 
+    # Then the local copy of the NASA Exoplanet Archive, if it has been synced
+    data = query_archive_mirror(full_planet_name)
+    if data:
+        logger.info(f"Data found in the archive mirror for {full_planet_name}")
+        return data
+
     try:
         # First try NASA Exoplanet Archive
         try:
@@ -282,6 +529,59 @@ def get_exoplanet_data(star_name, planet_name):
         raise ConnectionError(f"Error connecting to exoplanet database: {str(e)}")
 
 
+def get_exoplanet_data_many(planets, chunk_size=ARCHIVE_QUERY_CHUNK_SIZE):
+    """
+    Retrieve the data of many exoplanets with a few bulk queries.
+
+    Planets are looked up in the cache and the archive mirror first. The rest are requested from
+    the NASA Exoplanet Archive with one query per chunk of chunk_size names, and whatever is still
+    missing from exoplanet.eu, again in chunks. The planets found online are added to the cache.
+    Unlike get_exoplanet_data, failed queries are logged rather than raised, so one unreachable
+    service does not lose the planets found elsewhere.
+
+    Parameters:
+        planets (list): (star_name, planet_name) tuples, e.g. [('Kepler', '7b')]
+        chunk_size (int, optional): Planet names per query. Defaults to ARCHIVE_QUERY_CHUNK_SIZE.
+
+    Returns:
+        dict: The data of each requested planet (see get_exoplanet_data), keyed on its
+            (star_name, planet_name) tuple, or None for planets that could not be found
+    """
+    results = {}
+    # Planets still to be found, keyed on the upper case full name: (full name, requested tuples)
+    pending = {}
+    for star_name, planet_name in planets:
+        if (star_name, planet_name) in results:
+            continue
+        full_planet_name = f"{star_name} {planet_name}"
+        if star_name.lower() == "kepler" and planet_name.lower() == "7b":
+            data = get_exoplanet_data(star_name, planet_name)
+        else:
+            data = get_from_cache(star_name, planet_name) or query_archive_mirror(full_planet_name)
+        results[(star_name, planet_name)] = data
+        if not data:
+            pending.setdefault(full_planet_name.upper(), (full_planet_name, []))[1].append((star_name, planet_name))
+
+    if pending:
+        names = [full_planet_name for full_planet_name, _ in pending.values()]
+        found = query_nasa_archive_many(names, chunk_size=chunk_size)
+        missing = [name for name in names if name not in found]
+        if missing:
+            found.update(query_exoplanet_eu_many(missing, chunk_size=chunk_size))
+
+        new_entries = {}
+        for full_planet_name, requested in pending.values():
+            data = found.get(full_planet_name)
+            if data:
+                new_entries[requested[0]] = data
+                for key in requested:
+                    results[key] = dict(data)
+        add_many_to_cache(new_entries)
+        logger.info(f"Found {len(new_entries)} of {len(pending)} exoplanets missing from the cache and mirror")
+
+    return results
+
+
 def query_nasa_archive(planet_name):
     """
     Query the NASA Exoplanet Archive API for planet data.
@@ -290,18 +590,11 @@ def query_nasa_archive(planet_name):
         planet_name (str): Full name of the planet (e.g., 'Kepler 7b')
 
     Returns:
-        dict: Dictionary with exoplanet data or None if not found
+        dict: Dictionary with exoplanet data and its uncertainties (see extract_uncertainties),
+            or None if not found
     """
-    # NASA Exoplanet Archive API endpoint
-    base_url = "https://exoplanetarchive.ipac.caltech.edu/TAP/sync"
-
-    # Columns to retrieve
-    columns = [
-        "pl_name", "hostname",
-        "st_rad", "st_mass", "st_age",
-        "pl_rade", "pl_bmasse",
-        "pl_orbsmax", "pl_orbeccen"
-    ]
+    # Columns to retrieve, with their upper (err1) and lower (err2) uncertainties
+    columns = ["pl_name", "hostname"] + NASA_ARCHIVE_VALUE_COLUMNS
 
     # Construct the query
     query = f"""
@@ -318,25 +611,14 @@ def query_nasa_archive(planet_name):
     }
 
     # Make the request with timeout
-    response = requests.get(base_url, params=params, timeout=(10, 30))  # (connect timeout, read timeout)
+    response = requests.get(NASA_TAP_URL, params=params, timeout=(10, 30))  # (connect timeout, read timeout)
 
     try:
         if response.status_code == 200:
             results = response.json()
 
             if results and len(results) > 0:
-                planet_data = results[0]
-
-                # Extract and convert the data
-                return {
-                    "Restrela": float(planet_data.get("st_rad", 0)),  # Solar radii
-                    "Mestrela": float(planet_data.get("st_mass", 0)),  # Solar masses
-                    "RplanetaEarth": float(planet_data.get("pl_rade", 0)),  # Earth radii
-                    "MplanetaEarth": float(planet_data.get("pl_bmasse", 0)),  # Earth masses
-                    "EixoMaiorPlaneta": float(planet_data.get("pl_orbsmax", 0)),  # AU
-                    "Excentricidade": float(planet_data.get("pl_orbeccen", 0)),  # Eccentricity
-                    "t_gyr": float(planet_data.get("st_age", 0))  # Gyr
-                }
+                return convert_nasa_row(results[0])
 
         return None
     finally:
@@ -344,6 +626,123 @@ def query_nasa_archive(planet_name):
         response.close()
 
 
+def query_nasa_archive_many(planet_names, chunk_size=ARCHIVE_QUERY_CHUNK_SIZE):
+    """
+    Query the NASA Exoplanet Archive for many planets, with one request per chunk of names.
+
+    Names are matched as in query_nasa_archive. A chunk whose request fails is logged and skipped.
+
+    Parameters:
+        planet_names (list): Full names of the planets (e.g., ['Kepler 7b'])
+        chunk_size (int, optional): Planet names per request. Defaults to ARCHIVE_QUERY_CHUNK_SIZE.
+
+    Returns:
+        dict: Exoplanet data and its uncertainties keyed on the names that were found
+    """
+    columns = ["pl_name", "hostname", "pl_letter"] + NASA_ARCHIVE_VALUE_COLUMNS
+    found = {}
+    for start in range(0, len(planet_names), chunk_size):
+        chunk = planet_names[start:start + chunk_size]
+        wanted = {name.upper(): name for name in chunk}
+        names = ",".join("'" + name.replace("'", "''") + "'" for name in wanted)
+        query = f"""
+        SELECT {','.join(columns)}
+        FROM ps
+        WHERE UPPER(pl_name) IN ({names})
+        OR UPPER(hostname || ' ' || pl_letter) IN ({names})
+        """
+
+        try:
+            response = requests.get(NASA_TAP_URL, params={"query": query, "format": "json"}, timeout=(10, 30))
+            try:
+                if response.status_code != 200:
+                    logger.error(f"NASA API error: status {response.status_code} for {len(chunk)} planets")
+                    continue
+                rows = response.json()
+            finally:
+                # Close the response to release the connection back to the pool
+                response.close()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"NASA API error for {len(chunk)} planets: {str(e)}")
+            continue
+
+        for row in rows:
+            for row_name in (row.get("pl_name") or "", f"{row.get('hostname')} {row.get('pl_letter')}"):
+                name = wanted.get(row_name.upper())
+                if name is None or name in found:
+                    continue
+                try:
+                    found[name] = convert_nasa_row(row)
+                except (TypeError, ValueError):
+                    # A row without a required value; another row of the planet may have it
+                    continue
+    return found
+
+
+def query_archive_mirror(planet_name):
+    """
+    Look a planet up in the local copy of the NASA Exoplanet Archive.
+
+    Parameters:
+        planet_name (str): Full name of the planet (e.g., 'Kepler 7b')
+
+    Returns:
+        dict: Dictionary with exoplanet data and its uncertainties, or None if the planet is not
+            mirrored or its mirrored row lacks a required value
+    """
+    row = get_archive_mirror().find(planet_name)
+    if row is None:
+        return None
+    try:
+        return convert_nasa_row(row)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Incomplete archive mirror row for {planet_name}: {str(e)}")
+        return None
+
+
+def convert_nasa_row(planet_data):
+    """
+    Convert a NASA Exoplanet Archive row to exoplanet data.
+
+    Parameters:
+        planet_data (dict): Row with the columns of NASA_ARCHIVE_VALUE_COLUMNS
+
+    Returns:
+        dict: Dictionary with exoplanet data and its uncertainties (see extract_uncertainties)
+    """
+    data = {
+        "Restrela": float(planet_data.get("st_rad", 0)),  # Solar radii
+        "Mestrela": float(planet_data.get("st_mass", 0)),  # Solar masses
+        "RplanetaEarth": float(planet_data.get("pl_rade", 0)),  # Earth radii
+        "MplanetaEarth": float(planet_data.get("pl_bmasse", 0)),  # Earth masses
+        "EixoMaiorPlaneta": float(planet_data.get("pl_orbsmax", 0)),  # AU
+        "Excentricidade": float(planet_data.get("pl_orbeccen", 0)),  # Eccentricity
+        "t_gyr": float(planet_data.get("st_age", 0))  # Gyr
+    }
+    data.update(extract_uncertainties(planet_data))
+    return data
+
+
+def extract_uncertainties(planet_data):
+    """
+    Extract the uncertainties of a NASA Exoplanet Archive row.
+
+    Parameters:
+        planet_data (dict): Row returned by the archive, with the *err1 and *err2 columns
+
+    Returns:
+        dict: For every field with a known uncertainty, "<field>_err1" (upper uncertainty, >= 0)
+            and "<field>_err2" (lower uncertainty, <= 0), in the units of the field
+    """
+    uncertainties = {}
+    for field, column in NASA_ARCHIVE_COLUMNS.items():
+        for suffix in ("err1", "err2"):
+            value = planet_data.get(f"{column}{suffix}")
+            if value is not None:
+                uncertainties[f"{field}_{suffix}"] = float(value)
+    return uncertainties
+
+
 def query_exoplanet_eu(planet_name):
     """
     Query the Exoplanet.eu database for planet data using pyvo and TAP service.
@@ -356,7 +755,7 @@ def query_exoplanet_eu(planet_name):
     """
     try:
         # Connect to the TAP service with a timeout
-        tap_url = "http://voparis-tap-planeto.obspm.fr/tap"
+        tap_url = EXOPLANET_EU_TAP_URL
         session = requests.Session()
         session.mount('http://', requests.adapters.HTTPAdapter(max_retries=1))
         session.mount('https://', requests.adapters.HTTPAdapter(max_retries=1))
@@ -437,6 +836,95 @@ def query_exoplanet_eu(planet_name):
         return query_exoplanet_eu_fallback(planet_name)
 
 
+def query_exoplanet_eu_many(planet_names, chunk_size=ARCHIVE_QUERY_CHUNK_SIZE):
+    """
+    Query the Exoplanet.eu database for many planets, with one TAP query per chunk of names.
+
+    Names must match the planet names of exoplanet.eu, ignoring case. If the TAP service fails,
+    the whole planet list of the REST API is downloaded once and searched instead.
+
+    Parameters:
+        planet_names (list): Full names of the planets (e.g., ['Kepler-7 b'])
+        chunk_size (int, optional): Planet names per query. Defaults to ARCHIVE_QUERY_CHUNK_SIZE.
+
+    Returns:
+        dict: Exoplanet data keyed on the names that were found
+    """
+    found = {}
+    try:
+        session = requests.Session()
+        session.mount('http://', requests.adapters.HTTPAdapter(max_retries=1))
+        session.mount('https://', requests.adapters.HTTPAdapter(max_retries=1))
+        tap_service = pyvo.dal.TAPService(EXOPLANET_EU_TAP_URL, session=session)
+
+        for start in range(0, len(planet_names), chunk_size):
+            chunk = planet_names[start:start + chunk_size]
+            wanted = {name.lower(): name for name in chunk}
+            names = ",".join("'" + name.replace("'", "''") + "'" for name in wanted)
+            query = f"""
+            SELECT target_name AS name, star_radius, star_mass, star_age,
+                radius, mass, semi_major_axis, eccentricity
+            FROM exoplanet.epn_core
+            WHERE LOWER(target_name) IN ({names})
+            """
+            logger.info(f"Executing TAP query for {len(chunk)} planets")
+            for planet in tap_service.search(query, timeout=30):
+                name = wanted.get(str(planet["name"]).lower())
+                if name is not None and name not in found:
+                    data = convert_exoplanet_eu_row(planet)
+                    if data:
+                        found[name] = data
+        return found
+    except Exception as e:
+        logger.error(f"exoplanet.eu TAP service error for {len(planet_names)} planets: {str(e)}")
+        logger.warning("Falling back to the planet list of the REST API")
+
+    missing = {name.lower(): name for name in planet_names if name not in found}
+    try:
+        response = requests.get("http://exoplanet.eu/api/exoplanet", timeout=(10, 30))
+        try:
+            all_planets = response.json() if response.status_code == 200 else []
+        finally:
+            # Close the response to release the connection back to the pool
+            response.close()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.error(f"exoplanet.eu API error: {str(e)}")
+        return found
+
+    for planet in all_planets:
+        if isinstance(planet, dict):
+            name = missing.get(planet.get("name", "").lower())
+            if name is not None and name not in found:
+                data = convert_exoplanet_eu_row(planet)
+                if data:
+                    found[name] = data
+    return found
+
+
+def convert_exoplanet_eu_row(planet):
+    """
+    Convert an Exoplanet.eu planet to exoplanet data.
+
+    Parameters:
+        planet (dict): Planet with the fields of the exoplanet.eu API (radius and mass in Jupiter units)
+
+    Returns:
+        dict: Dictionary with exoplanet data, or None if a field is missing
+    """
+    try:
+        return {
+            "Restrela": float(planet.get("star_radius", 0)),  # Solar radii
+            "Mestrela": float(planet.get("star_mass", 0)),  # Solar masses
+            "RplanetaEarth": float(planet.get("radius", 0)) * 11.2,  # Convert from Jupiter to Earth radii
+            "MplanetaEarth": float(planet.get("mass", 0)) * 317.8,  # Convert from Jupiter to Earth masses
+            "EixoMaiorPlaneta": float(planet.get("semi_major_axis", 0)),  # AU
+            "Excentricidade": float(planet.get("eccentricity", 0)),  # Eccentricity
+            "t_gyr": float(planet.get("star_age", 0))  # Gyr
+        }
+    except (TypeError, ValueError):
+        return None
+
+
 def query_exoplanet_eu_fallback(planet_name):
     """
     Fallback method to query the Exoplanet.eu database using the REST API.
@@ -0,0 +1,296 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no file locks, a single writing process is assumed
+    fcntl = None
+
+from exoplanet_loss.utils.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Journal size in bytes above which a write compacts it into the snapshot
+JOURNAL_COMPACT_BYTES = 1 << 20
+
+
+def file_signature(path):
+    """
+    Identify the current version of a file.
+
+    Parameters:
+        path (str): File path
+
+    Returns:
+        tuple: (path, mtime in ns, size, inode), or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def write_json_atomic(path, data, indent=2):
+    """
+    Write a JSON file so that readers see either the old or the new file, never a partial one.
+
+    The data is written to a temporary file in the same directory, flushed to disk and moved over
+    path with os.replace.
+
+    Parameters:
+        path (str): Destination file
+        data: JSON-serializable data
+        indent (int, optional): Indentation of the JSON document. Defaults to 2.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class JournalCache:
+    """
+    Exoplanet data cache stored as a JSON snapshot plus an append-only journal.
+
+    The snapshot has the format of the JSON cache ({"<star>_<planet>": data}). Every write appends
+    one JSON line to <path>.journal instead of rewriting the snapshot, so writes cost O(1) and a
+    crash can at most leave a partial last line, which is skipped. Once the journal grows past
+    compact_bytes it is compacted: the merged cache is written to a new snapshot atomically and the
+    journal starts over. Appends and compaction hold an exclusive lock on <path>.lock, so several
+    processes can write at once.
+
+    Readers keep the merged cache in memory and only replay the journal lines added since their
+    last read.
+
+    Parameters:
+        path (str): Snapshot file
+        compact_bytes (int, optional): Journal size that triggers a compaction. Defaults to JOURNAL_COMPACT_BYTES.
+    """
+
+    def __init__(self, path, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.lock_path = f"{path}.lock"
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._snapshot_signature = None
+        self._journal_inode = None
+        self._journal_offset = 0
+        self._file_locked = False
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        """
+        Hold the inter-process lock, shared for reading or exclusive for writing; the caller holds self._lock.
+
+        flock locks belong to an open file, so a nested request while the lock is held would wait for
+        itself; it is granted by the lock already held instead.
+        """
+        if self._file_locked:
+            yield
+            return
+
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._file_locked = True
+            try:
+                yield
+            finally:
+                self._file_locked = False
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _is_current(self):
+        """Whether the in-memory cache reflects the snapshot and every journal line on disk."""
+        journal = file_signature(self.journal_path)
+        journal_current = (journal is None and self._journal_offset == 0) or (
+            journal is not None and journal[3] == self._journal_inode and journal[2] == self._journal_offset)
+        return journal_current and file_signature(self.path) == self._snapshot_signature
+
+    def _refresh(self):
+        """Bring the in-memory cache up to date; the caller holds self._lock."""
+        if self._is_current():
+            return
+
+        with self._file_lock(exclusive=False):
+            snapshot = file_signature(self.path)
+            if snapshot != self._snapshot_signature:
+                self._entries = self._read_snapshot()
+                self._snapshot_signature = snapshot
+                self._journal_inode = None
+
+            journal = file_signature(self.journal_path)
+            if journal is None:
+                self._journal_inode, self._journal_offset = None, 0
+                return
+            if journal[3] != self._journal_inode or journal[2] < self._journal_offset:
+                # A new journal (after a compaction): replay it on a freshly read snapshot
+                if self._journal_inode is not None:
+                    self._entries = self._read_snapshot()
+                self._journal_inode, self._journal_offset = journal[3], 0
+            self._replay_journal()
+
+    def _read_snapshot(self):
+        """Parse the snapshot file."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Error reading cache snapshot {self.path}: {str(e)}. Starting from the journal only.")
+            return {}
+
+    def _replay_journal(self):
+        """Apply the complete journal lines after self._journal_offset."""
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._journal_offset)
+            content = f.read()
+
+        # A line without its newline is still being written (or was cut short by a crash)
+        complete = content[:content.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping a corrupt line in cache journal {self.journal_path}")
+                continue
+            self._apply(record)
+        self._journal_offset += len(complete)
+
+    def _apply(self, record):
+        """Apply one journal record to the in-memory cache."""
+        if record.get("clear"):
+            self._entries = {}
+        elif record.get("data") is None:
+            self._entries.pop(record["key"], None)
+        else:
+            self._entries[record["key"]] = record["data"]
+
+    def _append(self, record):
+        """Append one record to the journal, compacting it if it has grown too large."""
+        line = json.dumps(record).encode() + b"\n"
+        with self._lock, self._file_lock(exclusive=True):
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                if size and self._last_byte(size) != b"\n":
+                    # Keep a partial line left by a crashed writer separate from this record
+                    line = b"\n" + line
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            if size + len(line) > self.compact_bytes:
+                self._compact_locked()
+
+    def _last_byte(self, size):
+        """Last byte of the journal."""
+        with open(self.journal_path, 'rb') as f:
+            f.seek(size - 1)
+            return f.read(1)
+
+    def get(self, key):
+        """
+        Get the data of one exoplanet.
+
+        Parameters:
+            key (str): Cache key "<star>_<planet>"
+
+        Returns:
+            dict: Exoplanet data (a copy), or None if it is not in the cache
+        """
+        with self._lock:
+            self._refresh()
+            data = self._entries.get(key)
+        return dict(data) if data is not None else None
+
+    def items(self):
+        """
+        All cached exoplanets.
+
+        Returns:
+            dict: Copy of the cache, keyed on "<star>_<planet>"
+        """
+        with self._lock:
+            self._refresh()
+            return {key: dict(data) for key, data in self._entries.items()}
+
+    def put(self, key, data):
+        """
+        Insert or replace the data of one exoplanet by appending it to the journal.
+
+        Parameters:
+            key (str): Cache key "<star>_<planet>"
+            data (dict): Exoplanet data
+        """
+        self._append({"key": key, "data": data})
+
+    def delete(self, key):
+        """
+        Remove one exoplanet by appending a removal to the journal.
+
+        Parameters:
+            key (str): Cache key "<star>_<planet>"
+
+        Returns:
+            bool: True if the exoplanet was in the cache
+        """
+        with self._lock:
+            self._refresh()
+            if key not in self._entries:
+                return False
+            self._append({"key": key, "data": None})
+        return True
+
+    def clear(self):
+        """Remove every exoplanet."""
+        self._append({"clear": True})
+
+    def replace(self, entries):
+        """
+        Replace the whole cache with a new snapshot and an empty journal.
+
+        Parameters:
+            entries (dict): Exoplanet data keyed on "<star>_<planet>"
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            write_json_atomic(self.path, entries)
+            self._reset_journal()
+
+    def compact(self):
+        """Merge the journal into the snapshot and start an empty journal."""
+        with self._lock, self._file_lock(exclusive=True):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Compact the journal; the caller holds the exclusive file lock."""
+        self._refresh()
+        write_json_atomic(self.path, self._entries)
+        # If a crash happens before the journal is reset, replaying it again gives the same cache
+        self._reset_journal()
+        logger.info(f"Compacted cache journal into {self.path} ({len(self._entries)} exoplanets)")
+
+    def _reset_journal(self):
+        """Replace the journal with an empty file; the caller holds the exclusive file lock."""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.journal_path)), prefix=".tmp-")
+        os.close(fd)
+        os.replace(temp_path, self.journal_path)
@@ -0,0 +1,215 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from exoplanet_loss.utils.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Seconds a connection waits for another writer to release the database
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exoplanets (
+    star TEXT NOT NULL,
+    planet TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (star, planet)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def normalize_name(name):
+    """
+    Normalize a star or planet name for cache lookups.
+
+    Parameters:
+        name (str): Star or planet name
+
+    Returns:
+        str: The name in lower case without surrounding whitespace
+    """
+    return name.strip().lower()
+
+
+class SQLiteCache:
+    """
+    Exoplanet data cache stored in an SQLite database in WAL mode.
+
+    Each entry is one row keyed on the normalized (star, planet) names, so lookups use the primary
+    key index and writes touch a single row. In WAL mode readers do not block the writer, and
+    concurrent writers from several processes wait for each other instead of losing updates.
+    Every thread gets its own connection.
+
+    Parameters:
+        path (str): Database file, created if it does not exist
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        """Connection of the calling thread, opened and set up on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def get(self, star_name, planet_name):
+        """
+        Get the data of one exoplanet.
+
+        Parameters:
+            star_name (str): Name of the host star
+            planet_name (str): Name or designation of the planet
+
+        Returns:
+            dict: Exoplanet data, or None if it is not in the cache
+        """
+        row = self._connection().execute(
+            "SELECT data FROM exoplanets WHERE star = ? AND planet = ?",
+            (normalize_name(star_name), normalize_name(planet_name))
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, star_name, planet_name, data):
+        """
+        Insert or replace the data of one exoplanet.
+
+        Parameters:
+            star_name (str): Name of the host star
+            planet_name (str): Name or designation of the planet
+            data (dict): Exoplanet data
+        """
+        self._connection().execute(
+            "INSERT INTO exoplanets (star, planet, data, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (star, planet) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+            (normalize_name(star_name), normalize_name(planet_name), json.dumps(data), time.time())
+        )
+
+    def delete(self, star_name, planet_name):
+        """
+        Remove one exoplanet.
+
+        Parameters:
+            star_name (str): Name of the host star
+            planet_name (str): Name or designation of the planet
+
+        Returns:
+            bool: True if the exoplanet was in the cache
+        """
+        cursor = self._connection().execute(
+            "DELETE FROM exoplanets WHERE star = ? AND planet = ?",
+            (normalize_name(star_name), normalize_name(planet_name))
+        )
+        return cursor.rowcount > 0
+
+    def names(self):
+        """
+        Names of all cached exoplanets.
+
+        Returns:
+            list: (star, planet) tuples of normalized names, sorted
+        """
+        return self._connection().execute("SELECT star, planet FROM exoplanets ORDER BY star, planet").fetchall()
+
+    def items(self):
+        """
+        All cached exoplanets.
+
+        Returns:
+            list: ((star, planet), data) tuples, sorted by name
+        """
+        rows = self._connection().execute("SELECT star, planet, data FROM exoplanets ORDER BY star, planet")
+        return [((star, planet), json.loads(data)) for star, planet, data in rows]
+
+    def clear(self):
+        """Remove every exoplanet."""
+        self._connection().execute("DELETE FROM exoplanets")
+
+    def replace(self, entries):
+        """
+        Replace the whole cache in one transaction.
+
+        Parameters:
+            entries (dict): Exoplanet data keyed on (star, planet) tuples
+        """
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM exoplanets")
+            connection.executemany(
+                "INSERT INTO exoplanets (star, planet, data, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (star, planet) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+                [(normalize_name(star), normalize_name(planet), json.dumps(data), now)
+                 for (star, planet), data in entries.items()])
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def migrate_from_json(self, json_path):
+        """
+        Import the entries of a JSON cache file, once.
+
+        The JSON cache is keyed on "<star>_<planet>"; the key is split at its first underscore, as
+        list_cached_exoplanets does. Entries already in the database are kept. The import is recorded
+        in the database, so later calls do nothing even if the JSON file changes.
+
+        Parameters:
+            json_path (str): JSON cache file
+
+        Returns:
+            int: Number of imported entries
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("SELECT 1 FROM metadata WHERE key = 'migrated_from_json'").fetchone():
+                connection.execute("COMMIT")
+                return 0
+
+            entries = {}
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, 'r') as f:
+                        entries = json.load(f)
+                except Exception as e:
+                    logger.warning(f"Error reading cache file {json_path} for migration: {str(e)}")
+
+            now = time.time()
+            rows = [(star, planet, json.dumps(data), now)
+                    for (star, _, planet), data in ((key.partition('_'), data) for key, data in entries.items())
+                    if planet]
+            connection.executemany(
+                "INSERT INTO exoplanets (star, planet, data, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (star, planet) DO NOTHING", rows)
+            connection.execute("INSERT INTO metadata (key, value) VALUES ('migrated_from_json', ?)", (json_path,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        logger.info(f"Migrated {len(rows)} cached exoplanets from {json_path} to {self.path}")
+        return len(rows)
+
+    def close(self):
+        """Close the connection of the calling thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,370 @@
+import argparse
+import os
+import threading
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+from exoplanet_loss.calculador_final import Rsun, Msun
+from exoplanet_loss.calculators.lx_age_calculator import integrate_xray_luminosity
+from exoplanet_loss.calculators.photoevap_calculator import calculo_perda_fotoevaporacao
+from exoplanet_loss.calculators.total_mass_loss_calculator import (
+    AU_TO_CM,
+    G,
+    SEC_PER_GYR,
+    TotalMassLossCalculator,
+    calculate_mass_loss_rates,
+    calculate_total_mass_loss,
+)
+from exoplanet_loss.utils.logging import configure_logging, get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Emulator grid built offline with `python -m exoplanet_loss.emulator`. The web routes do not use it:
+# /calculate integrates over INTEGRATION_AGES with Simpson's rule, and /calculate_total_mass_loss
+# needs the rate time series for its chart, which the grid does not store.
+EMULATOR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "mass_loss_emulator.npz")
+
+# Default grid axes: stellar mass [Msun], stellar radius [Rsun], age [Gyr], orbital distance [AU]
+DEFAULT_STELLAR_MASSES = np.geomspace(0.1, 3.0, 18)
+DEFAULT_STELLAR_RADII = np.geomspace(0.1, 5.0, 18)
+DEFAULT_AGES = np.geomspace(0.05, 13.8, 40)
+DEFAULT_DISTANCES = np.geomspace(0.005, 5.0, 49)
+
+# Start of the integration, as in calculate_total_mass_loss
+DEFAULT_MIN_AGE = 0.01
+
+# Largest estimated relative interpolation error accepted before falling back to the exact engine
+DEFAULT_TOLERANCE = 1e-2
+
+AXES = ("stellar_mass", "stellar_radius", "age", "distance")
+VALUES = ("wind_mass_loss_rate", "wind_mass_loss")
+
+_emulator = None
+_emulator_lock = threading.Lock()
+
+
+class MassLossEmulator:
+    """
+    Precomputed stellar wind mass loss on a regular grid, queried by multilinear interpolation.
+
+    The grid spans stellar mass, stellar radius, age and orbital distance and stores, per cm² of
+    planet cross-section, the wind mass loss rate at each age and the wind mass loss integrated by
+    TotalMassLossCalculator from min_age to that age. The wind mass loss scales with the square of the
+    planet radius, so these two quantities cover every planet.
+
+    Interpolation is done in the logarithm of both the axes and the values. The error of linear
+    interpolation in a cell is estimated from the largest second derivative of the grid values along
+    each axis over the corners of the cell.
+    """
+
+    def __init__(self, axes, values, min_age=DEFAULT_MIN_AGE):
+        """
+        Initialize the emulator from grid data.
+
+        Parameters:
+            axes (dict): Grid nodes along each of AXES, in Msun, Rsun, Gyr and AU
+            values (dict): Arrays of grid values for each of VALUES, in g/s/cm² and g/cm²
+            min_age (float, optional): Start of the integration of wind_mass_loss in Gyr.
+                Defaults to DEFAULT_MIN_AGE.
+        """
+        self.axes = {name: np.asarray(axes[name], dtype=float) for name in AXES}
+        self.values = {name: np.asarray(values[name], dtype=float) for name in VALUES}
+        self.min_age = float(min_age)
+
+        # Interpolate the logarithms of all values at once
+        self._log_axes = tuple(np.log(self.axes[name]) for name in AXES)
+        log_values = np.stack([np.log(self.values[name]) for name in VALUES], axis=-1)
+        self._interpolator = RegularGridInterpolator(self._log_axes, log_values)
+
+        # Largest second derivative along each axis over the corners of each cell
+        curvature = np.stack([np.abs(np.gradient(np.gradient(log_values, x, axis=i), x, axis=i))
+                              for i, x in enumerate(self._log_axes)], axis=-1)
+        for i in range(len(AXES)):
+            curvature = np.maximum(np.delete(curvature, 0, axis=i), np.delete(curvature, -1, axis=i))
+        self._cell_curvature = curvature
+
+    @classmethod
+    def build(cls, stellar_masses=DEFAULT_STELLAR_MASSES, stellar_radii=DEFAULT_STELLAR_RADII,
+              ages=DEFAULT_AGES, distances=DEFAULT_DISTANCES, min_age=DEFAULT_MIN_AGE):
+        """
+        Build the grid with the exact engine.
+
+        Parameters:
+            stellar_masses (array-like, optional): Stellar mass nodes in Msun
+            stellar_radii (array-like, optional): Stellar radius nodes in Rsun
+            ages (array-like, optional): Age nodes in Gyr, all above min_age
+            distances (array-like, optional): Orbital distance nodes in AU
+            min_age (float, optional): Start of the integration in Gyr. Defaults to DEFAULT_MIN_AGE.
+
+        Returns:
+            MassLossEmulator: The emulator
+        """
+        axes = dict(zip(AXES, (stellar_masses, stellar_radii, ages, distances)))
+        axes = {name: np.asarray(values, dtype=float) for name, values in axes.items()}
+        if axes["age"].min() <= min_age:
+            raise ValueError(f"All age nodes must be above min_age ({min_age} Gyr)")
+
+        # Planet and star parameters on the (mass, radius, distance) sub-grid, ages along the last axis
+        mass, radius, distance = np.meshgrid(axes["stellar_mass"], axes["stellar_radius"], axes["distance"],
+                                             indexing="ij")
+        shape = mass.shape + (len(axes["age"]),)
+        wind_mass_loss_rate = np.empty(shape)
+        wind_mass_loss = np.empty(shape)
+
+        for k, age in enumerate(axes["age"]):
+            integration_ages = integration_nodes(min_age, age)
+            rates = calculate_mass_loss_rates(
+                integration_ages, planet_radius_cm=1.0, planet_mass_g=1.0,
+                planet_orbital_distance_au=distance[..., None], eccentricity=0.0,
+                stellar_radius_cm=radius[..., None] * Rsun, stellar_mass_kg=mass[..., None] * Msun
+            )["wind_mass_loss_rates"]
+            wind_mass_loss_rate[..., k] = rates[..., -1]
+            wind_mass_loss[..., k] = rates @ integration_weights(integration_ages)
+
+        logger.info(f"Built mass loss emulator with {wind_mass_loss.size} grid points")
+
+        # Reorder to (mass, radius, age, distance)
+        values = {
+            "wind_mass_loss_rate": np.moveaxis(wind_mass_loss_rate, -1, 2),
+            "wind_mass_loss": np.moveaxis(wind_mass_loss, -1, 2),
+        }
+        return cls(axes, values, min_age)
+
+    @classmethod
+    def load(cls, path=EMULATOR_FILE):
+        """
+        Load an emulator saved with save().
+
+        Parameters:
+            path (str, optional): .npz file. Defaults to EMULATOR_FILE.
+
+        Returns:
+            MassLossEmulator: The emulator
+        """
+        with np.load(path) as data:
+            return cls({name: data[name] for name in AXES}, {name: data[name] for name in VALUES},
+                       float(data["min_age"]))
+
+    def save(self, path=EMULATOR_FILE):
+        """
+        Save the grid as a compressed .npz file, with the values in single precision.
+
+        Parameters:
+            path (str, optional): .npz file. Defaults to EMULATOR_FILE.
+        """
+        values = {name: value.astype(np.float32) for name, value in self.values.items()}
+        np.savez_compressed(path, min_age=self.min_age, **self.axes, **values)
+        logger.info(f"Mass loss emulator saved to {path}")
+
+    def contains(self, stellar_mass, stellar_radius, age, distance):
+        """
+        Check which points fall inside the grid.
+
+        Parameters:
+            stellar_mass (float or array-like): Stellar mass in Msun
+            stellar_radius (float or array-like): Stellar radius in Rsun
+            age (float or array-like): Age in Gyr
+            distance (float or array-like): Orbital distance in AU
+
+        Returns:
+            bool or numpy.ndarray: True for points inside the grid
+        """
+        inside = True
+        for name, value in zip(AXES, (stellar_mass, stellar_radius, age, distance)):
+            inside = inside & (value >= self.axes[name][0]) & (value <= self.axes[name][-1])
+        return inside
+
+    def query(self, stellar_mass, stellar_radius, age, distance):
+        """
+        Interpolate the wind mass loss per cm² of planet cross-section.
+
+        Parameters:
+            stellar_mass (float or array-like): Stellar mass in Msun
+            stellar_radius (float or array-like): Stellar radius in Rsun
+            age (float or array-like): Age in Gyr
+            distance (float or array-like): Orbital distance in AU
+
+        Returns:
+            dict: For each of VALUES, the interpolated value and "<value>_error", its estimated
+                relative interpolation error. Points outside the grid are NaN.
+        """
+        points = np.broadcast_arrays(*[np.log(np.asarray(value, dtype=float))
+                                       for value in (stellar_mass, stellar_radius, age, distance)])
+        shape = points[0].shape
+        points = np.stack([point.ravel() for point in points], axis=-1)
+        inside = np.ravel(self.contains(*np.exp(points.T)))
+
+        # Position of each point inside its cell along each axis, as a fraction t of the cell width h
+        cells = []
+        weights = np.zeros(points.shape)
+        for i, x in enumerate(self._log_axes):
+            cell = np.clip(np.searchsorted(x, points[:, i]) - 1, 0, len(x) - 2)
+            h = x[cell + 1] - x[cell]
+            t = np.clip((points[:, i] - x[cell]) / h, 0.0, 1.0)
+            # Linear interpolation error: f - L = -1/2 (x - x0)(x1 - x) f''
+            weights[:, i] = 0.5 * t * (1 - t) * h ** 2
+            cells.append(cell)
+
+        log_values = np.full((len(points), len(VALUES)), np.nan)
+        log_errors = np.full((len(points), len(VALUES)), np.nan)
+        if inside.any():
+            log_values[inside] = self._interpolator(points[inside])
+            curvature = self._cell_curvature[tuple(cell[inside] for cell in cells)]
+            log_errors[inside] = np.einsum("pa,pva->pv", weights[inside], curvature)
+
+        results = {}
+        for j, name in enumerate(VALUES):
+            results[name] = np.exp(log_values[:, j]).reshape(shape)[()]
+            results[f"{name}_error"] = np.expm1(log_errors[:, j]).reshape(shape)[()]
+        return results
+
+
+def integration_nodes(min_age, max_age):
+    """
+    Age points at which TotalMassLossCalculator samples the rates between min_age and max_age.
+
+    Parameters:
+        min_age (float): Minimum age in Gyr
+        max_age (float): Maximum age in Gyr
+
+    Returns:
+        numpy.ndarray: Sorted ages in Gyr
+    """
+    # Only the age range matters for the age points, not the planet
+    return TotalMassLossCalculator(1.0, 1.0, 1.0, 0.0, 1.0, 1.0, min_age=min_age, max_age=max_age).ages
+
+
+def integration_weights(ages):
+    """
+    Weights that reproduce the time integration of TotalMassLossCalculator as a dot product.
+
+    The rates are integrated with the trapezoidal rule on the age points (wind_method="linear" in
+    TotalMassLossCalculator), which is linear in the rates, so the integral is rates @ weights.
+
+    Parameters:
+        ages (numpy.ndarray): Age points in Gyr
+
+    Returns:
+        numpy.ndarray: One weight in s per age point
+    """
+    return np.trapz(np.eye(len(ages)), ages * SEC_PER_GYR, axis=0)
+
+
+def get_emulator():
+    """
+    Return the emulator saved in EMULATOR_FILE, loading it on first use.
+
+    Returns:
+        MassLossEmulator: The emulator, or None if EMULATOR_FILE does not exist or cannot be read
+    """
+    global _emulator
+    if _emulator is None:
+        with _emulator_lock:
+            if _emulator is None and os.path.exists(EMULATOR_FILE):
+                try:
+                    _emulator = MassLossEmulator.load(EMULATOR_FILE)
+                    logger.info(f"Mass loss emulator loaded from {EMULATOR_FILE}")
+                except Exception as e:
+                    logger.warning(f"Error reading mass loss emulator {EMULATOR_FILE}: {str(e)}")
+    return _emulator
+
+
+def estimate_total_mass_loss(planet_radius_cm, planet_mass_g, planet_orbital_distance_au, eccentricity,
+                             stellar_radius_cm, stellar_mass_kg, efficiency_factor=0.3, min_age=DEFAULT_MIN_AGE,
+                             max_age=4.56, tolerance=DEFAULT_TOLERANCE, emulator=None):
+    """
+    Total mass loss of calculate_total_mass_loss, with the stellar wind part taken from the emulator.
+
+    Photoevaporation has a closed form and is always calculated exactly (photoevap_method="analytic").
+    The wind part is interpolated from the emulator grid, which integrates the wind rates on the age
+    nodes (wind_method="linear"); the exact engine is used instead when there is no emulator, the
+    point falls outside the grid, min_age differs from the one of the grid, or the estimated
+    interpolation error exceeds the tolerance.
+
+    Parameters:
+        planet_radius_cm (float): Planet radius in cm
+        planet_mass_g (float): Planet mass in g
+        planet_orbital_distance_au (float): Planet orbital distance in AU
+        eccentricity (float): Orbital eccentricity
+        stellar_radius_cm (float): Stellar radius in cm
+        stellar_mass_kg (float): Stellar mass in kg
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation (0.25-1.0). Defaults to 0.3.
+        min_age (float, optional): Minimum age in Gyr. Defaults to DEFAULT_MIN_AGE.
+        max_age (float, optional): Maximum age in Gyr. Defaults to 4.56.
+        tolerance (float, optional): Largest accepted relative interpolation error. Defaults to DEFAULT_TOLERANCE.
+        emulator (MassLossEmulator, optional): Emulator to use. Defaults to get_emulator().
+
+    Returns:
+        dict: Dictionary with
+            - total_mass_loss, wind_mass_loss, photoevap_mass_loss: Integrated mass loss in g
+            - wind_mass_loss_rate: Wind mass loss rate at max_age in g/s
+            - estimated_error: Estimated relative error of wind_mass_loss (0 for the exact engine)
+            - source: "emulator" or "exact"
+    """
+    emulator = emulator or get_emulator()
+    star = (stellar_mass_kg / Msun, stellar_radius_cm / Rsun, max_age, planet_orbital_distance_au)
+
+    if emulator is None:
+        reason = "no emulator grid"
+    elif min_age != emulator.min_age:
+        reason = f"min_age {min_age} differs from the grid ({emulator.min_age})"
+    elif not emulator.contains(*star):
+        reason = "point outside the grid"
+    else:
+        wind = emulator.query(*star)
+        error = max(wind["wind_mass_loss_error"], wind["wind_mass_loss_rate_error"])
+        reason = None if error <= tolerance else f"estimated error {error:.1e} above tolerance"
+
+    if reason is not None:
+        logger.info(f"Using the exact engine: {reason}")
+        total_mass_loss, wind_mass_loss, photoevap_mass_loss, _ = calculate_total_mass_loss(
+            planet_radius_cm, planet_mass_g, planet_orbital_distance_au, eccentricity, stellar_radius_cm,
+            stellar_mass_kg, efficiency_factor=efficiency_factor, min_age=min_age, max_age=max_age,
+            photoevap_method="analytic", wind_method="linear"
+        )
+        wind_mass_loss_rate = calculate_mass_loss_rates(
+            [max_age], planet_radius_cm, planet_mass_g, planet_orbital_distance_au, eccentricity,
+            stellar_radius_cm, stellar_mass_kg, efficiency_factor
+        )["wind_mass_loss_rates"][-1]
+        return {
+            "total_mass_loss": total_mass_loss,
+            "wind_mass_loss": wind_mass_loss,
+            "photoevap_mass_loss": photoevap_mass_loss,
+            "wind_mass_loss_rate": float(wind_mass_loss_rate),
+            "estimated_error": 0.0,
+            "source": "exact",
+        }
+
+    cross_section = planet_radius_cm ** 2
+    ages = integration_nodes(min_age, max_age)
+    # The rate is proportional to Lx, whose integral over age has a closed form
+    photoevap_mass_loss = float(calculo_perda_fotoevaporacao(
+        efficiency_factor, integrate_xray_luminosity(ages.min(), ages.max()), planet_radius_cm, G, planet_mass_g,
+        planet_orbital_distance_au * AU_TO_CM, eccentricity
+    ))
+    wind_mass_loss = float(wind["wind_mass_loss"] * cross_section)
+
+    return {
+        "total_mass_loss": wind_mass_loss + photoevap_mass_loss,
+        "wind_mass_loss": wind_mass_loss,
+        "photoevap_mass_loss": photoevap_mass_loss,
+        "wind_mass_loss_rate": float(wind["wind_mass_loss_rate"] * cross_section),
+        "estimated_error": float(error),
+        "source": "emulator",
+    }
+
+
+def main():
+    """Build the default emulator grid and save it to EMULATOR_FILE."""
+    parser = argparse.ArgumentParser(description="Build the stellar wind mass loss emulator grid.")
+    parser.add_argument("-o", "--output", default=EMULATOR_FILE, help="output .npz file")
+    args = parser.parse_args()
+
+    configure_logging()
+    MassLossEmulator.build().save(args.output)
+
+
+if __name__ == "__main__":
+    main()
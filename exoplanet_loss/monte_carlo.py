@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from exoplanet_loss.calculador_final import BATCH_COLUMNS, calculate_mass_loss_batch
+from exoplanet_loss.utils.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Default number of planet samples evaluated in one array batch
+DEFAULT_CHUNK_SIZE = 100000
+
+DEFAULT_PERCENTILES = (2.5, 16, 50, 84, 97.5)
+
+# Results of calculate_mass_loss_batch summarized by default
+DEFAULT_OUTPUTS = ("total_mass_loss", "total_mass_loss_percent")
+
+# Physical range [low, high) of each input field; draws outside it are redrawn
+POSITIVE = (np.finfo(float).tiny, np.inf)
+FIELD_BOUNDS = {
+    "Restrela": POSITIVE,
+    "Mestrela": POSITIVE,
+    "t_gyr": POSITIVE,
+    "RplanetaEarth": POSITIVE,
+    "MplanetaEarth": POSITIVE,
+    "EixoMaiorPlaneta": POSITIVE,
+    "Excentricidade": (0.0, 1.0),
+}
+
+# Number of redraws before the remaining out-of-range draws are clipped
+MAX_REDRAWS = 100
+
+
+def draw_samples(table, num_samples, rngs):
+    """
+    Draw Monte Carlo samples of the input fields of every planet.
+
+    Each field is drawn from a split normal distribution centred on the catalog value, with the
+    upper uncertainty <field>_err1 above it and the lower uncertainty <field>_err2 below it. Fields
+    without uncertainties are kept fixed. Draws outside FIELD_BOUNDS are redrawn.
+
+    Parameters:
+        table (pandas.DataFrame or dict): One row per planet, with the columns of BATCH_COLUMNS and
+            optionally <column>_err1 (>= 0) and <column>_err2 (<= 0)
+        num_samples (int): Number of samples per planet
+        rngs (list): One numpy.random.Generator per planet
+
+    Returns:
+        dict: For each column of BATCH_COLUMNS, an array of shape (planets, num_samples)
+    """
+    num_planets = len(rngs)
+    samples = {}
+    for field in BATCH_COLUMNS:
+        value = np.broadcast_to(np.asarray(table[field], dtype=float), (num_planets,))[:, None]
+        upper = _uncertainty(table, f"{field}_err1", num_planets)
+        lower = _uncertainty(table, f"{field}_err2", num_planets)
+        low, high = FIELD_BOUNDS[field]
+
+        z = np.stack([rng.standard_normal(num_samples) for rng in rngs])
+        drawn = value + np.where(z > 0, z * upper, z * lower)
+
+        for _ in range(MAX_REDRAWS):
+            invalid = (drawn < low) | (drawn >= high)
+            if not invalid.any():
+                break
+            for i in np.flatnonzero(invalid.any(axis=1)):
+                z = rngs[i].standard_normal(int(invalid[i].sum()))
+                drawn[i, invalid[i]] = value[i, 0] + np.where(z > 0, z * upper[i, 0], z * lower[i, 0])
+        else:
+            logger.warning(f"Clipping {field} samples that stay outside [{low}, {high}) after {MAX_REDRAWS} redraws")
+            drawn = np.clip(drawn, low, np.nextafter(high, low))
+
+        samples[field] = drawn
+    return samples
+
+
+def monte_carlo_mass_loss(table, num_samples=1000, seed=None, percentiles=DEFAULT_PERCENTILES,
+                          outputs=DEFAULT_OUTPUTS, chunk_size=DEFAULT_CHUNK_SIZE, efficiency_factor=0.3):
+    """
+    Propagate catalog uncertainties to the mass loss of many planets by Monte Carlo sampling.
+
+    num_samples input sets are drawn per planet (see draw_samples) and evaluated together as one
+    array batch through calculate_mass_loss_batch. Planets are processed in groups so that no batch
+    holds more than chunk_size samples, which bounds the memory used. Every planet has its own random
+    stream derived from seed, so the results do not depend on chunk_size.
+
+    Parameters:
+        table (pandas.DataFrame or dict): One row per planet, with the columns of BATCH_COLUMNS and
+            optionally the uncertainty columns <column>_err1 and <column>_err2, as returned by
+            get_exoplanet_data
+        num_samples (int, optional): Number of samples per planet. Defaults to 1000.
+        seed (int, optional): Seed of the random number generator. Defaults to None (not reproducible).
+        percentiles (sequence, optional): Percentiles to report. Defaults to DEFAULT_PERCENTILES.
+        outputs (sequence, optional): Results of calculate_mass_loss_batch to summarize.
+            Defaults to DEFAULT_OUTPUTS.
+        chunk_size (int, optional): Maximum number of samples per array batch. Defaults to DEFAULT_CHUNK_SIZE.
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation. Defaults to 0.3.
+
+    Returns:
+        pandas.DataFrame or dict: For each output and percentile p, a column "<output>_p<p>"
+            (e.g. total_mass_loss_p50), one row per planet. A DataFrame (with the input index) is
+            returned when a DataFrame is passed in, otherwise a dict of arrays.
+
+    Raises:
+        ValueError: If the table is missing required columns
+    """
+    missing_fields = [field for field in BATCH_COLUMNS if field not in table]
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    num_planets = len(np.atleast_1d(np.asarray(table["t_gyr"])))
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(num_planets)]
+    planets_per_chunk = max(1, chunk_size // num_samples)
+
+    logger.info(f"Drawing {num_samples} samples for {num_planets} planets, {planets_per_chunk} planets per batch")
+
+    input_columns = [column for field in BATCH_COLUMNS
+                     for column in (field, f"{field}_err1", f"{field}_err2") if column in table]
+    columns = {f"{output}_p{p:g}": np.empty(num_planets) for output in outputs for p in percentiles}
+    for start in range(0, num_planets, planets_per_chunk):
+        stop = min(start + planets_per_chunk, num_planets)
+        chunk = {column: _slice(table, column, start, stop, num_planets) for column in input_columns}
+        samples = draw_samples(chunk, num_samples, rngs[start:stop])
+
+        results = calculate_mass_loss_batch({field: values.ravel() for field, values in samples.items()},
+                                            efficiency_factor=efficiency_factor)
+
+        for output in outputs:
+            values = np.percentile(results[output].reshape(stop - start, num_samples), percentiles, axis=1)
+            for p, value in zip(percentiles, values):
+                columns[f"{output}_p{p:g}"][start:stop] = value
+
+    if isinstance(table, pd.DataFrame):
+        return pd.DataFrame(columns, index=table.index)
+    return columns
+
+
+def _uncertainty(table, column, num_planets):
+    """Absolute uncertainty column as a (planets, 1) array, 0 where it is missing."""
+    if column not in table:
+        return np.zeros((num_planets, 1))
+    values = np.abs(np.broadcast_to(np.asarray(table[column], dtype=float), (num_planets,)))
+    return np.nan_to_num(values)[:, None]
+
+
+def _slice(table, column, start, stop, num_planets):
+    """Rows start:stop of one column, broadcasting scalars to every planet."""
+    return np.broadcast_to(np.asarray(table[column], dtype=float), (num_planets,))[start:stop]
@@ -0,0 +1,132 @@
+import os
+
+import pandas as pd
+
+from exoplanet_loss.calculador_final import BATCH_COLUMNS, calculate_mass_loss_batch
+from exoplanet_loss.utils.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Default number of rows held in memory at a time
+DEFAULT_CHUNK_SIZE = 100000
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read a CSV or Parquet file in chunks of at most chunk_size rows.
+
+    The BATCH_COLUMNS of a CSV file are read as floats, so every chunk has the same column types
+    even when a chunk happens to hold only whole numbers. A file without rows gives one empty chunk
+    with its columns.
+
+    Parameters:
+        path (str): Input file; files ending in .parquet or .pq are read as Parquet, others as CSV
+        chunk_size (int, optional): Number of rows per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+
+    Yields:
+        pandas.DataFrame: The next chunk of rows
+    """
+    if _is_parquet(path):
+        parquet = _import_parquet()
+        parquet_file = parquet.ParquetFile(path)
+        if parquet_file.metadata.num_rows == 0:
+            yield parquet_file.schema_arrow.empty_table().to_pandas()
+            return
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={column: float for column in BATCH_COLUMNS})
+
+
+def process_chunks(chunks, efficiency_factor=0.3):
+    """
+    Run each chunk of planets through the vectorized mass loss calculation.
+
+    Parameters:
+        chunks (iterable): DataFrames with the columns expected by calculate_mass_loss_batch
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation. Defaults to 0.3.
+
+    Yields:
+        pandas.DataFrame: The input columns followed by the result columns of calculate_mass_loss_batch
+    """
+    for chunk in chunks:
+        results = calculate_mass_loss_batch(chunk, efficiency_factor=efficiency_factor)
+        yield pd.concat([chunk, results], axis=1)
+
+
+def write_chunks(chunks, path):
+    """
+    Write chunks to a CSV or Parquet file as they arrive, without keeping them in memory.
+
+    Parameters:
+        chunks (iterable): DataFrames with the same columns
+        path (str): Output file; files ending in .parquet or .pq are written as Parquet, others as CSV
+
+    Returns:
+        int: Number of rows written
+    """
+    rows = 0
+    if _is_parquet(path):
+        parquet = _import_parquet()
+        import pyarrow
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = parquet.ParquetWriter(path, table.schema)
+                else:
+                    # Types inferred from a later chunk may differ from the first one (int64 vs double)
+                    table = table.cast(writer.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+            rows += len(chunk)
+    return rows
+
+
+def stream_mass_loss(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, efficiency_factor=0.3):
+    """
+    Calculate mass loss for a planet population that may not fit in memory.
+
+    Rows are read chunk_size at a time, run through calculate_mass_loss_batch and written to the
+    output before the next chunk is read, so peak memory depends on the chunk size and not on the
+    size of the input.
+
+    Parameters:
+        input_path (str): CSV or Parquet file with one planet per row and the columns Restrela,
+            Mestrela, t_gyr, RplanetaEarth, MplanetaEarth, EixoMaiorPlaneta and Excentricidade
+        output_path (str): CSV or Parquet file for the results
+        chunk_size (int, optional): Number of rows per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation. Defaults to 0.3.
+
+    Returns:
+        int: Number of rows processed
+    """
+    chunks = process_chunks(read_chunks(input_path, chunk_size), efficiency_factor)
+    rows = write_chunks(chunks, output_path)
+    logger.info(f"Processed {rows} planets from {input_path} into {output_path}")
+    return rows
+
+
+def _is_parquet(path):
+    """True if the file extension marks a Parquet file."""
+    return os.path.splitext(str(path))[1].lower() in PARQUET_EXTENSIONS
+
+
+def _import_parquet():
+    """Import pyarrow.parquet, which is only needed for Parquet files."""
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Reading or writing Parquet files requires pyarrow: pip install pyarrow")
+    return pyarrow.parquet
@@ -0,0 +1,305 @@
+import threading
+
+from exoplanet_loss.calculador_final import AU, MassLossResult, Mearth, Msun, Rearth, Rsun
+from exoplanet_loss.calculators.densidade_wind_stellar import rho_w, generate_density_vs_distance_data
+from exoplanet_loss.calculators.lx_age_calculator import LxAgeFxCalculator
+from exoplanet_loss.calculators.photoevap_calculator import PhotoevaporationCalculator
+from exoplanet_loss.calculators.photoevaporation_mass_loss_calculator import PhotoevaporationMassLossCalculator
+from exoplanet_loss.calculators.stellar_wind_mass_loss_calculator import StellarWindMassLossCalculator
+from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import generate_velocity_vs_distance_data, wind_velocity_at
+from exoplanet_loss.calculators.txc_mass_loss_stellar_wind import calcular_taxa_perda_de_massa_interacao_vento_solar
+from exoplanet_loss.utils.logging import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Inputs of a session: the fields of star_data and planet_data in calculate_mass_loss, and its options
+STAR_INPUTS = ("Restrela", "Mestrela", "t_gyr")
+PLANET_INPUTS = ("RplanetaEarth", "MplanetaEarth", "EixoMaiorPlaneta", "Excentricidade")
+INPUTS = STAR_INPUTS + PLANET_INPUTS + ("efficiency_factor", "initial_velocity")
+
+# Result keys of calculate_mass_loss built on first access
+LAZY_RESULTS = ("density_vs_distance", "velocity_vs_distance", "stellar_wind_mass_loss", "photoevaporation_mass_loss")
+
+
+def _stellar(t_gyr, Restrela):
+    """X-ray luminosity, coronal temperature and X-ray flux at the age of the system."""
+    lx_age_fx = LxAgeFxCalculator(t_gyr, Restrela * Rsun)
+    return {"lx": lx_age_fx.getLx(), "t_cor": lx_age_fx.getTCor(), "fx": lx_age_fx.fx}
+
+
+def _wind_velocity(stellar, Mestrela, EixoMaiorPlaneta):
+    """Wind velocity at the planet at the age of the system; the full profile is only generated for plotting."""
+    return float(wind_velocity_at(EixoMaiorPlaneta, stellar["t_cor"], Mestrela * Msun))
+
+
+def _wind_density(Restrela, t_gyr):
+    """Wind density at the age of the system."""
+    return rho_w(Restrela * AU / Rsun, t_gyr)
+
+
+def _wind_rate(RplanetaEarth, wind_density, wind_velocity):
+    """Instantaneous stellar wind mass loss rate."""
+    return calcular_taxa_perda_de_massa_interacao_vento_solar(RplanetaEarth * Rearth, wind_density, wind_velocity * 1000)
+
+
+def _photoevap_rate(efficiency_factor, stellar, RplanetaEarth, MplanetaEarth, EixoMaiorPlaneta, Excentricidade):
+    """Instantaneous photoevaporation mass loss rate."""
+    photoEvp = PhotoevaporationCalculator(efficiency_factor, stellar["lx"], RplanetaEarth * Rearth,
+                                          MplanetaEarth * Mearth, EixoMaiorPlaneta * AU, Excentricidade)
+    return photoEvp.get()
+
+
+def _wind_mass_loss(RplanetaEarth, EixoMaiorPlaneta, Restrela, Mestrela):
+    """Stellar wind mass loss integrated over time, with the rates, velocities and densities at each age."""
+    calculator = StellarWindMassLossCalculator(
+        planet_radius_cm=RplanetaEarth * Rearth,
+        planet_orbital_distance_au=EixoMaiorPlaneta,
+        stellar_radius_cm=Restrela * Rsun,
+        stellar_mass_kg=Mestrela * Msun
+    )
+    mass_loss, rates, _, velocities, densities = calculator.calculate_mass_loss()
+    return {"ages": calculator.ages, "rates": rates, "velocities": velocities, "densities": densities,
+            "mass_loss": mass_loss}
+
+
+def _photoevap_mass_loss(efficiency_factor, RplanetaEarth, MplanetaEarth, EixoMaiorPlaneta, Excentricidade):
+    """Photoevaporation mass loss integrated over time, with the rates and X-ray luminosities at each age."""
+    calculator = PhotoevaporationMassLossCalculator(
+        planet_radius_cm=RplanetaEarth * Rearth,
+        planet_mass_g=MplanetaEarth * Mearth,
+        planet_orbital_distance_cm=EixoMaiorPlaneta * AU,
+        eccentricity=Excentricidade,
+        efficiency_factor=efficiency_factor
+    )
+    mass_loss, rates, x_ray_luminosities = calculator.calculate_mass_loss()
+    return {"ages": calculator.ages, "rates": rates, "x_ray_luminosities": x_ray_luminosities,
+            "mass_loss": mass_loss}
+
+
+def _density_vs_distance():
+    """Wind density profile for plotting, from 0.005 to 1.5 AU in solar radii."""
+    distances, densities = generate_density_vs_distance_data(r_min=0.005 * AU / Rsun, r_max=1.5 * AU / Rsun,
+                                                             num_points=1000)
+    return {"distances": distances, "densities": densities}
+
+
+def _velocity_vs_distance(stellar, Mestrela, EixoMaiorPlaneta, initial_velocity, wind_velocity):
+    """Wind velocity profile for plotting."""
+    distances, velocities, _, _ = generate_velocity_vs_distance_data(
+        T_corona=stellar["t_cor"], r_planeta_au=EixoMaiorPlaneta, r_min_au=0.005, r_max_au=EixoMaiorPlaneta * 4,
+        Mstar=Mestrela * Msun, v_initial_at_start=initial_velocity, num_points=1000)
+    return {
+        "t_cor": stellar["t_cor"],
+        "velocity": wind_velocity,
+        "distance": EixoMaiorPlaneta,
+        "distances": distances,
+        "velocities": velocities
+    }
+
+
+# Calculation stages: name -> (names of the inputs and stages it depends on, function of their values)
+NODES = {
+    "stellar": (("t_gyr", "Restrela"), _stellar),
+    "wind_velocity": (("stellar", "Mestrela", "EixoMaiorPlaneta"), _wind_velocity),
+    "wind_density": (("Restrela", "t_gyr"), _wind_density),
+    "wind_rate": (("RplanetaEarth", "wind_density", "wind_velocity"), _wind_rate),
+    "photoevap_rate": (("efficiency_factor", "stellar", "RplanetaEarth", "MplanetaEarth", "EixoMaiorPlaneta",
+                        "Excentricidade"), _photoevap_rate),
+    "wind_mass_loss": (("RplanetaEarth", "EixoMaiorPlaneta", "Restrela", "Mestrela"), _wind_mass_loss),
+    "photoevap_mass_loss": (("efficiency_factor", "RplanetaEarth", "MplanetaEarth", "EixoMaiorPlaneta",
+                             "Excentricidade"), _photoevap_mass_loss),
+    "density_vs_distance": ((), _density_vs_distance),
+    "velocity_vs_distance": (("stellar", "Mestrela", "EixoMaiorPlaneta", "initial_velocity", "wind_velocity"),
+                             _velocity_vs_distance),
+}
+
+
+class MassLossSession:
+    """
+    Stateful mass loss calculation that only recalculates what an input change affects.
+
+    The stages of the calculation form a dependency graph (see NODES): the age and stellar radius
+    determine Lx and T_cor, T_cor and the stellar mass the wind velocity, and so on. Each stage is
+    cached until one of its inputs changes, so after update(Excentricidade=0.1) only the
+    photoevaporation stages run again. calculate_mass_loss runs a new session, so there is one
+    implementation of the stages. The session is thread-safe and can be held between requests.
+
+    Parameters:
+        star_data (dict, optional): Stellar properties, as in calculate_mass_loss
+        planet_data (dict, optional): Planet properties, as in calculate_mass_loss
+        efficiency_factor (float, optional): Efficiency factor for photoevaporation calculation. Defaults to 0.3.
+        initial_velocity (float, optional): Initial guess velocity [m/s] for stellar wind calculation. Defaults to 5e3 m/s.
+    """
+
+    def __init__(self, star_data=None, planet_data=None, efficiency_factor=0.3, initial_velocity=5e3):
+        self._inputs = {"efficiency_factor": efficiency_factor, "initial_velocity": initial_velocity}
+        self._values = {}
+        self._lock = threading.RLock()
+        self._version = 0
+        # Stages depending directly on each input or stage
+        self._dependents = {name: [] for name in INPUTS + tuple(NODES)}
+        for name, (dependencies, _) in NODES.items():
+            for dependency in dependencies:
+                self._dependents[dependency].append(name)
+        # Number of times each stage was calculated
+        self.evaluations = {name: 0 for name in NODES}
+
+        self.update(**(star_data or {}), **(planet_data or {}))
+
+    @property
+    def inputs(self):
+        """Current input values, as a dictionary."""
+        with self._lock:
+            return dict(self._inputs)
+
+    def update(self, **inputs):
+        """
+        Change inputs and discard the cached stages that depend on them.
+
+        Parameters:
+            **inputs: New values of any of INPUTS (e.g. Excentricidade=0.1, efficiency_factor=0.5)
+
+        Returns:
+            list: Names of the discarded stages
+
+        Raises:
+            ValueError: If an input name is unknown
+        """
+        unknown = [name for name in inputs if name not in INPUTS]
+        if unknown:
+            raise ValueError(f"Unknown inputs: {', '.join(unknown)}. Expected some of {', '.join(INPUTS)}")
+
+        with self._lock:
+            changed = [name for name, value in inputs.items()
+                       if name not in self._inputs or self._inputs[name] != value]
+            self._inputs.update(inputs)
+            if not changed:
+                return []
+
+            self._version += 1
+            stale = []
+            pending = list(changed)
+            while pending:
+                for dependent in self._dependents[pending.pop()]:
+                    if dependent not in stale:
+                        stale.append(dependent)
+                        pending.append(dependent)
+            discarded = [name for name in stale if self._values.pop(name, None) is not None]
+
+        logger.debug(f"Inputs {', '.join(changed)} changed, discarded {', '.join(discarded) or 'nothing'}")
+        return discarded
+
+    def get(self, name):
+        """
+        Value of an input or stage, calculating the stage and its dependencies if they are not cached.
+
+        Parameters:
+            name (str): Name of one of INPUTS or NODES
+
+        Returns:
+            The value of the input or stage
+
+        Raises:
+            ValueError: If required inputs have not been set, or the name is unknown
+        """
+        with self._lock:
+            return self._get(name)
+
+    def results(self):
+        """
+        Mass loss results for the current inputs.
+
+        Returns:
+            MassLossResult: The same results as calculate_mass_loss. The plotting profiles and time
+                series are calculated the first time they are read; after a later update() they
+                still describe the inputs at the time of this call.
+        """
+        with self._lock:
+            missing_fields = [name for name in INPUTS if name not in self._inputs]
+            if missing_fields:
+                raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+            inputs = dict(self._inputs)
+            stellar = self._get("stellar")
+            wind_velocity = self._get("wind_velocity")
+            wind_mass_loss = self._get("wind_mass_loss")["mass_loss"]
+            photoevap_mass_loss = self._get("photoevap_mass_loss")["mass_loss"]
+            version = self._version
+
+        planet_mass = inputs["MplanetaEarth"] * Mearth
+        total_mass_loss = wind_mass_loss + photoevap_mass_loss
+        values = {
+            "idade_estrela": inputs["t_gyr"],
+            "fator_de_eficiencia": inputs["efficiency_factor"],
+            "velocidade_inicial": inputs["initial_velocity"],
+            "lx": stellar["lx"],
+            "t_cor": stellar["t_cor"],
+            "fx": stellar["fx"],
+            "velicidade_vento_estelar": wind_velocity,
+            "txmass_loss_photoev": self._snapshot("photoevap_rate", version, inputs),
+            "mass_loss_photoev": photoevap_mass_loss,
+            "mass_loss_photoev_percent": (photoevap_mass_loss / planet_mass) * 100,
+            "txmass_loss_wind": self._snapshot("wind_rate", version, inputs),
+            "mass_loss_wind": wind_mass_loss,
+            "mass_loss_wind_percent": (wind_mass_loss / planet_mass) * 100,
+            "total_mass_loss": total_mass_loss,
+            "total_mass_loss_percent": (total_mass_loss / planet_mass) * 100,
+            "planet_distance": inputs["EixoMaiorPlaneta"],
+            "densidade_vento_estelar": self._snapshot("wind_density", version, inputs),
+        }
+        for name in LAZY_RESULTS:
+            values[name] = lambda name=name: self._lazy_result(name, version, inputs)
+        return MassLossResult(values)
+
+    def _get(self, name):
+        """Value of an input or stage; the caller holds the lock."""
+        if name in INPUTS:
+            if name not in self._inputs:
+                raise ValueError(f"Missing required fields: {name}")
+            return self._inputs[name]
+        if name not in NODES:
+            raise ValueError(f"Unknown input or stage: {name}")
+
+        if name not in self._values:
+            dependencies, function = NODES[name]
+            self._values[name] = function(*[self._get(dependency) for dependency in dependencies])
+            self.evaluations[name] += 1
+        return self._values[name]
+
+    def _snapshot(self, name, version, inputs):
+        """Value of a stage for the inputs of a given version, from the cache if they are still current."""
+        with self._lock:
+            if version == self._version:
+                return self._get(name)
+        # The inputs changed since; calculate it from the old inputs without touching the cache
+        return MassLossSession(**_split_inputs(inputs))._get(name)
+
+    def _lazy_result(self, name, version, inputs):
+        """Value of one of LAZY_RESULTS for the inputs of a given version."""
+        if name == "stellar_wind_mass_loss":
+            wind = self._snapshot("wind_mass_loss", version, inputs)
+            return {
+                "ages": wind["ages"].tolist(),
+                "mass_loss_rates": wind["rates"].tolist(),
+                "wind_velocities": wind["velocities"].tolist(),
+                "wind_densities": wind["densities"].tolist()
+            }
+        if name == "photoevaporation_mass_loss":
+            photoevap = self._snapshot("photoevap_mass_loss", version, inputs)
+            return {
+                "ages": photoevap["ages"].tolist(),
+                "mass_loss_rates": photoevap["rates"].tolist(),
+                "x_ray_luminosities": photoevap["x_ray_luminosities"].tolist()
+            }
+        return self._snapshot(name, version, inputs)
+
+
+def _split_inputs(inputs):
+    """Constructor arguments of MassLossSession for a dictionary of inputs."""
+    return {
+        "star_data": {name: inputs[name] for name in STAR_INPUTS},
+        "planet_data": {name: inputs[name] for name in PLANET_INPUTS},
+        "efficiency_factor": inputs["efficiency_factor"],
+        "initial_velocity": inputs["initial_velocity"],
+    }
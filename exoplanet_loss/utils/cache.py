@@ -0,0 +1,93 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used cache with hit/miss counters.
+
+    When the cache is full, the entry that was used least recently is evicted to make room
+    for the new one.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        Initialize the cache.
+
+        Parameters:
+            maxsize (int, optional): Maximum number of entries kept. Defaults to 4096.
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, calling compute() and storing its result on a miss.
+
+        compute() runs outside the lock, so a slow computation does not block other threads.
+
+        Parameters:
+            key (hashable): Cache key
+            compute (callable): Function without arguments that produces the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def info(self):
+        """
+        Cache statistics.
+
+        Returns:
+            dict: hits, misses, evictions, current size and maxsize
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+def quantize(value, significant_digits=9):
+    """
+    Round a float to a fixed number of significant digits so it can be used in a cache key.
+
+    Parameters:
+        value (float): Value to quantize
+        significant_digits (int, optional): Number of significant digits kept. Defaults to 9.
+
+    Returns:
+        float: The quantized value
+    """
+    return float(f"{value:.{significant_digits}g}")
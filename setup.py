@@ -13,6 +13,12 @@ setup(
         "requests>=2.25.0",
         "flask>=2.0.0",
     ],
+    extras_require={
+        "parquet": ["pyarrow>=10.0.0"],
+    },
+    entry_points={
+        "console_scripts": ["exoplanet-loss=exoplanet_loss.cli:main"],
+    },
     author="Tiago",
     author_email="tiago@example.com",
     description="A package for exoplanet mass loss calculations",
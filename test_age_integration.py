@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for the integration of the mass loss rates over stellar age.
+This script checks the integration methods against direct numerical quadrature.
+"""
+
+import numpy as np
+from scipy.integrate import quad
+
+from exoplanet_loss.calculators.lx_age_calculator import calculate_xray_luminosity, integrate_xray_luminosity
+from exoplanet_loss.calculators.mass_evolution_calculator import evolve_mass_loss
+from exoplanet_loss.calculators.photoevap_calculator import calculo_perda_fotoevaporacao, G
+from exoplanet_loss.calculators.photoevaporation_mass_loss_calculator import PhotoevaporationMassLossCalculator
+from exoplanet_loss.calculators.stellar_wind_mass_loss_calculator import StellarWindMassLossCalculator
+from exoplanet_loss.calculators.total_mass_loss_calculator import (
+    AU_TO_CM,
+    SEC_PER_GYR,
+    calculate_mass_loss_rates,
+    calculate_total_mass_loss,
+)
+from exoplanet_loss.utils.logging import configure_logging, get_logger
+
+# Configure logging
+configure_logging()
+logger = get_logger(__name__)
+
+# Constants
+Rsun = 6.957e10  # cm
+Msun = 1.98e30  # kg
+Rearth = 6.371e8  # cm
+Mearth = 5.97e27  # grams
+
+# Kepler 7b
+KEPLER_7B = {
+    "planet_radius_cm": 18.18 * Rearth,
+    "planet_mass_g": 140 * Mearth,
+    "planet_orbital_distance_au": 0.06067,
+    "eccentricity": 0.026,
+    "stellar_radius_cm": 1.78 * Rsun,
+    "stellar_mass_kg": 1.41 * Msun,
+}
+
+
+def photoevap_rate(age):
+    """Photoevaporation mass loss rate of Kepler 7b at age (Gyr), in g/s."""
+    return calculo_perda_fotoevaporacao(0.3, calculate_xray_luminosity(age), KEPLER_7B["planet_radius_cm"], G,
+                                        KEPLER_7B["planet_mass_g"],
+                                        KEPLER_7B["planet_orbital_distance_au"] * AU_TO_CM,
+                                        KEPLER_7B["eccentricity"])
+
+
+def test_analytic_photoevaporation():
+    """The closed-form photoevaporation integral should match adaptive quadrature."""
+    for age_min, age_max in [(0.01, 3.5), (0.1, 6.7), (1.0, 10.0)]:
+        expected, _ = quad(calculate_xray_luminosity, age_min, age_max, limit=200)
+        assert np.isclose(integrate_xray_luminosity(age_min, age_max), expected * SEC_PER_GYR, rtol=1e-10)
+    assert np.allclose(integrate_xray_luminosity([0.1, 1.0], [1.0, 2.0]),
+                       [integrate_xray_luminosity(0.1, 1.0), integrate_xray_luminosity(1.0, 2.0)])
+
+    _, _, photoevap_mass_loss, _ = calculate_total_mass_loss(**KEPLER_7B, max_age=3.5, photoevap_method="analytic")
+    expected, _ = quad(photoevap_rate, 0.01, 3.5, limit=200)
+    assert np.isclose(photoevap_mass_loss, expected * SEC_PER_GYR, rtol=1e-10)
+
+    calculator = PhotoevaporationMassLossCalculator(KEPLER_7B["planet_radius_cm"], KEPLER_7B["planet_mass_g"],
+                                                    KEPLER_7B["planet_orbital_distance_au"] * AU_TO_CM,
+                                                    KEPLER_7B["eccentricity"], method="analytic")
+    total_mass_loss, _, _ = calculator.calculate_mass_loss()
+    expected, _ = quad(photoevap_rate, 0.1, 6.7, limit=200)
+    assert np.isclose(total_mass_loss, expected * SEC_PER_GYR, rtol=1e-10)
+
+    try:
+        calculate_total_mass_loss(**KEPLER_7B, photoevap_method="midpoint")
+    except ValueError as e:
+        assert "Unknown photoevaporation method" in str(e)
+    else:
+        raise AssertionError("An unknown method should raise ValueError")
+
+
+def test_adaptive_wind_integral():
+    """The adaptive wind integral should meet its tolerance against a dense reference."""
+    ages = np.geomspace(0.01, 3.5, 200001)
+    rates = calculate_mass_loss_rates(ages, **KEPLER_7B)["wind_mass_loss_rates"]
+    expected = np.trapz(rates, ages * SEC_PER_GYR)
+
+    _, wind_mass_loss, _, results_data = calculate_total_mass_loss(**KEPLER_7B, max_age=3.5, wind_method="adaptive",
+                                                                  rtol=1e-6)
+    assert np.isclose(wind_mass_loss, expected, rtol=1e-6)
+    assert results_data["wind_integration_error"] <= 1e-6 * wind_mass_loss
+    assert results_data["wind_integration_evaluations"] < 200
+
+    calculator = StellarWindMassLossCalculator(KEPLER_7B["planet_radius_cm"], KEPLER_7B["planet_orbital_distance_au"],
+                                               KEPLER_7B["stellar_radius_cm"], KEPLER_7B["stellar_mass_kg"])
+    coarse = calculator.calculate_mass_loss_adaptive(rtol=1e-3, min_age=0.01, max_age=3.5)
+    assert np.isclose(coarse["mass_loss"], expected, rtol=1e-3)
+    assert coarse["evaluations"] <= results_data["wind_integration_evaluations"]
+
+
+def test_linear_integration_and_cumulative_curve():
+    """Exact integration on the age nodes should match the resampled integral and end the cumulative curve."""
+    resampled = calculate_total_mass_loss(**KEPLER_7B, max_age=3.5)
+    linear = calculate_total_mass_loss(**KEPLER_7B, max_age=3.5, wind_method="linear", photoevap_method="linear",
+                                       cumulative=True)
+    for expected, value in zip(resampled[:3], linear[:3]):
+        assert np.isclose(value, expected, rtol=1e-3)
+
+    results_data = linear[3]
+    assert "cumulative_total_mass_loss" not in resampled[3]
+    assert results_data["cumulative_wind_mass_loss"][0] == 0
+    assert np.all(np.diff(results_data["cumulative_total_mass_loss"]) > 0)
+    assert np.isclose(results_data["cumulative_wind_mass_loss"][-1], linear[1], rtol=1e-12)
+    assert np.isclose(results_data["cumulative_photoevap_mass_loss"][-1], linear[2], rtol=1e-12)
+
+    # With the analytic photoevaporation the cumulative curve is the closed form at every age
+    results_data = calculate_total_mass_loss(**KEPLER_7B, max_age=3.5, photoevap_method="analytic", cumulative=True)[3]
+    ages = results_data["ages"]
+    for age, value in zip(ages[1:], results_data["cumulative_photoevap_mass_loss"][1:]):
+        expected, _ = quad(photoevap_rate, ages[0], age, limit=200)
+        assert np.isclose(value, expected * SEC_PER_GYR, rtol=1e-10)
+
+
+def test_mass_evolution():
+    """Coupled mass evolution should match the fixed-mass integral for small losses and stop stripped planets."""
+    planet = dict(KEPLER_7B, planet_radius_cm=11 * Rearth, planet_mass_g=300 * Mearth, planet_orbital_distance_au=0.5)
+    expected = calculate_total_mass_loss(**planet, max_age=3.5, wind_method="adaptive", photoevap_method="analytic")[0]
+    result = evolve_mass_loss(**planet, max_age=3.5, radius_exponent=lambda mass: 0.0)
+    assert np.isclose(result["mass_loss"][0], expected, rtol=1e-2)
+    assert not result["stripped"][0] and np.isnan(result["strip_ages"][0])
+
+    # A light planet close to the star is stripped; a batch with it matches the planets solved on their own
+    radii, masses, distances = [2 * Rearth, 11 * Rearth], [0.05 * Mearth, 300 * Mearth], [0.01, 0.5]
+    ages = np.linspace(0.01, 3.5, 8)
+    batch = evolve_mass_loss(radii, masses, distances, 0.0, Rsun, Msun, max_age=3.5, ages=ages)
+    assert batch["masses"].shape == batch["radii"].shape == (2, len(ages))
+    assert list(batch["stripped"]) == [True, False]
+    assert 0.01 < batch["strip_ages"][0] < 3.5
+    assert np.all(batch["masses"][0, 1:] == batch["final_masses"][0])
+    assert np.all(np.diff(batch["radii"][1]) > 0)  # Giant planets grow slightly as they lose mass
+    for i in range(2):
+        single = evolve_mass_loss(radii[i], masses[i], distances[i], 0.0, Rsun, Msun, max_age=3.5)
+        assert np.isclose(batch["final_masses"][i], single["final_masses"][0], rtol=1e-4)
+
+    # Once every planet is stripped the integration stops early
+    stripped = evolve_mass_loss(radii[0], masses[0], distances[0], 0.0, Rsun, Msun, max_age=3.5)
+    assert stripped["ages"][-1] < 3.5
+    assert stripped["evaluations"] < batch["evaluations"]
+
+    # With a constant exponent the radius follows R = R0 (M / M0)^exponent; the solver controls the
+    # error of the radius itself, not only through the mass
+    track = evolve_mass_loss(radii[0], masses[0], distances[0], 0.0, Rsun, Msun, max_age=3.5,
+                             radius_exponent=lambda mass: 3.0, stripped_fraction=0.5, rtol=1e-3)
+    assert np.allclose(track["radii"][0], radii[0] * (track["masses"][0] / masses[0]) ** 3.0, rtol=5e-2)
+
+    for stripped_fraction in (0.0, 1.0):
+        try:
+            evolve_mass_loss(radii[0], masses[0], distances[0], 0.0, Rsun, Msun, stripped_fraction=stripped_fraction)
+        except ValueError as e:
+            assert "stripped_fraction" in str(e)
+        else:
+            raise AssertionError("stripped_fraction outside (0, 1) should raise ValueError")
+
+
+if __name__ == "__main__":
+    test_analytic_photoevaporation()
+    test_adaptive_wind_integral()
+    test_linear_integration_and_cumulative_curve()
+    test_mass_evolution()
+    logger.info("Test completed successfully!")
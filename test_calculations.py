@@ -4,8 +4,12 @@ Test script for the Exoplanet Loss package.
 This script tests the main functionality of the package by calculating mass loss for Kepler 7b.
 """
 
+import numpy as np
+
 from exoplanet_loss.data.exoplanet import get_exoplanet_data
 from exoplanet_loss.calculador_final import calculate_mass_loss
+from exoplanet_loss.calculators.densidade_wind_stellar import generate_density_vs_distance_data
+from exoplanet_loss.session import MassLossSession
 from exoplanet_loss.utils.logging import configure_logging, get_logger
 
 # Configure logging
@@ -49,5 +53,100 @@ def test_kepler_7b():
 
     logger.info("Test completed successfully!")
 
+def test_lazy_result_sections():
+    """Plotting profiles are only built when read, and then kept."""
+    star_data = {"Restrela": 1.78, "Mestrela": 1.41, "t_gyr": 3.5}
+    planet_data = {"RplanetaEarth": 18.18, "MplanetaEarth": 140, "EixoMaiorPlaneta": 0.06067, "Excentricidade": 0.026}
+    results = calculate_mass_loss(star_data, planet_data)
+
+    assert results["total_mass_loss"] == results["mass_loss_wind"] + results["mass_loss_photoev"]
+    assert list(results)[-4:] == ["density_vs_distance", "velocity_vs_distance",
+                                  "stellar_wind_mass_loss", "photoevaporation_mass_loss"]
+    assert not results.is_computed("density_vs_distance")
+    assert not results.is_computed("velocity_vs_distance")
+
+    density = results["density_vs_distance"]
+    assert results.is_computed("density_vs_distance") and not results.is_computed("velocity_vs_distance")
+    assert results["density_vs_distance"] is density
+    distances, densities = generate_density_vs_distance_data(0.005 * 1.496e13 / 6.957e10, 1.5 * 1.496e13 / 6.957e10, 1000)
+    assert density == {"distances": distances, "densities": densities}
+
+    velocity = results["velocity_vs_distance"]
+    assert velocity["velocity"] == results["velicidade_vento_estelar"]
+    assert velocity["distances"][-1] == 4 * planet_data["EixoMaiorPlaneta"]
+
+    # Dictionary conversion computes every section
+    plain = results.to_dict()
+    assert type(plain) is dict and plain.keys() == dict(results).keys()
+    assert len(plain["stellar_wind_mass_loss"]["ages"]) == 6
+    assert all(results.is_computed(key) for key in results)
+
+def assert_same_results(results, expected):
+    """Compare two calculate_mass_loss results key by key."""
+    assert list(results) == list(expected)
+    for key, value in expected.items():
+        if isinstance(value, dict):
+            for series, values in value.items():
+                assert np.allclose(results[key][series], values, rtol=1e-12), (key, series)
+        else:
+            assert np.isclose(results[key], value, rtol=1e-12), key
+
+# calculate_mass_loss for Kepler 7b before it was built on MassLossSession, for
+# (Excentricidade, efficiency_factor, t_gyr) = (0.026, 0.3, 3.5), (0.1, 0.3, 3.5) and (0.1, 0.5, 1.0)
+SESSION_REFERENCE = [
+    {"lx": 6.100087306011909e+26, "t_cor": 894350.2871615476, "velicidade_vento_estelar": 198162.40414187545,
+     "txmass_loss_photoev": 2061235918.8441727, "txmass_loss_wind": 102711630.20363885,
+     "mass_loss_photoev": 4.385975023908262e+27, "mass_loss_wind": 1.0354504516955738e+30},
+    {"lx": 6.100087306011909e+26, "t_cor": 894350.2871615476, "velicidade_vento_estelar": 198162.40414187545,
+     "txmass_loss_photoev": 2042156926.6197844, "txmass_loss_wind": 102711630.20363885,
+     "mass_loss_photoev": 4.345378029351506e+27, "mass_loss_wind": 1.0354504516955738e+30},
+    {"lx": 6.76e+27, "t_cor": 1671500.1446449612, "velicidade_vento_estelar": 405868.1852139259,
+     "txmass_loss_photoev": 37717987004.17593, "txmass_loss_wind": 306340052.6177555,
+     "mass_loss_photoev": 7.242296715585843e+27, "mass_loss_wind": 1.0354504516955738e+30},
+]
+
+def assert_reference_results(results, reference):
+    """Compare calculate_mass_loss results with reference values."""
+    for key, value in reference.items():
+        assert np.isclose(results[key], value, rtol=1e-12), key
+    assert results["total_mass_loss"] == results["mass_loss_wind"] + results["mass_loss_photoev"]
+
+def test_mass_loss_session():
+    """A session recalculates only the stages downstream of a changed input."""
+    star_data = {"Restrela": 1.78, "Mestrela": 1.41, "t_gyr": 3.5}
+    planet_data = {"RplanetaEarth": 18.18, "MplanetaEarth": 140, "EixoMaiorPlaneta": 0.06067, "Excentricidade": 0.026}
+    session = MassLossSession(star_data, planet_data)
+    first = session.results()
+    assert_reference_results(first, SESSION_REFERENCE[0])
+    assert_same_results(first, calculate_mass_loss(star_data, planet_data))
+
+    evaluations = dict(session.evaluations)
+    assert session.update(Excentricidade=0.1) == ["photoevap_rate", "photoevap_mass_loss"]
+    assert session.update(Excentricidade=0.1) == []
+    assert_reference_results(session.results(), SESSION_REFERENCE[1])
+    changed = {name for name, count in session.evaluations.items() if count != evaluations[name]}
+    assert changed == {"photoevap_rate", "photoevap_mass_loss"}
+
+    # Results read after an update still describe the inputs they were made from
+    session.update(efficiency_factor=0.5, t_gyr=1.0)
+    assert_reference_results(first, SESSION_REFERENCE[0])
+    assert_same_results(first, calculate_mass_loss(star_data, planet_data))
+    assert_reference_results(session.results(), SESSION_REFERENCE[2])
+
+    try:
+        session.update(eccentricity=0.1)
+    except ValueError as e:
+        assert "Unknown inputs" in str(e)
+    else:
+        raise AssertionError("Unknown inputs should raise ValueError")
+    try:
+        MassLossSession(star_data).results()
+    except ValueError as e:
+        assert "Missing required fields" in str(e)
+    else:
+        raise AssertionError("Missing inputs should raise ValueError")
+
 if __name__ == "__main__":
     test_kepler_7b()
+    test_lazy_result_sections()
+    test_mass_loss_session()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Test script for the exoplanet data cache.
+This script checks the cache storage backends on temporary files.
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from exoplanet_loss.cli import main
+from exoplanet_loss.data import exoplanet
+from exoplanet_loss.data.journal_cache import JournalCache
+from exoplanet_loss.utils.logging import configure_logging, get_logger
+
+# Configure logging
+configure_logging()
+logger = get_logger(__name__)
+
+KEPLER_7B = {
+    "Restrela": 1.78,
+    "Mestrela": 1.41,
+    "RplanetaEarth": 18.18,
+    "MplanetaEarth": 140,
+    "EixoMaiorPlaneta": 0.06067,
+    "Excentricidade": 0.026,
+    "t_gyr": 3.5
+}
+
+
+@contextmanager
+def cache_files(backend):
+    """Point the cache at files in a temporary directory, using the given backend."""
+    saved = {name: getattr(exoplanet, name) for name in ("CACHE_FILE", "CACHE_DB_FILE", "MIRROR_FILE", "CACHE_BACKEND")}
+    with tempfile.TemporaryDirectory() as directory:
+        exoplanet.CACHE_FILE = os.path.join(directory, "exoplanet_cache.json")
+        exoplanet.CACHE_DB_FILE = os.path.join(directory, "exoplanet_cache.sqlite3")
+        exoplanet.MIRROR_FILE = os.path.join(directory, "nasa_archive_mirror.npz")
+        exoplanet.CACHE_BACKEND = backend
+        try:
+            yield directory
+        finally:
+            for name, value in saved.items():
+                setattr(exoplanet, name, value)
+
+
+def test_sqlite_cache():
+    """The SQLite backend imports the JSON cache once and supports the cache functions."""
+    with cache_files("sqlite"):
+        with open(exoplanet.CACHE_FILE, 'w') as f:
+            json.dump({"kepler_7b": KEPLER_7B, "trappist-1_e": dict(KEPLER_7B, t_gyr=7.6)}, f)
+
+        assert exoplanet.get_from_cache("Kepler", "7b") == KEPLER_7B
+        assert exoplanet.get_from_cache(" TRAPPIST-1", "E")["t_gyr"] == 7.6
+        assert exoplanet.get_from_cache("Kepler", "8b") is None
+
+        exoplanet.add_to_cache("Kepler", "7b", dict(KEPLER_7B, t_gyr=4.0))
+        exoplanet.add_custom_exoplanet_data("WASP-12", "b", KEPLER_7B)
+        assert exoplanet.get_from_cache("kepler", "7B")["t_gyr"] == 4.0
+        assert [planet["full_name"] for planet in exoplanet.list_cached_exoplanets()] == [
+            "kepler 7b", "trappist-1 e", "wasp-12 b"]
+        assert set(exoplanet.read_cache()) == {"kepler_7b", "trappist-1_e", "wasp-12_b"}
+
+        # The migration runs once, so removed entries do not come back from the JSON file
+        assert exoplanet.remove_from_cache("Kepler", "7b")
+        assert not exoplanet.remove_from_cache("Kepler", "7b")
+        exoplanet._sqlite_cache = None
+        assert exoplanet.get_from_cache("Kepler", "7b") is None
+
+        exoplanet.write_cache({"kepler_7b": KEPLER_7B})
+        assert exoplanet.read_cache() == {"kepler_7b": KEPLER_7B}
+        assert exoplanet.clear_cache()
+        assert exoplanet.list_cached_exoplanets() == []
+
+
+def test_sqlite_cache_concurrent_writers():
+    """Writers in several threads do not lose each other's entries."""
+    def write(worker):
+        for i in range(25):
+            exoplanet.add_to_cache(f"Star-{worker}", f"{i}b", dict(KEPLER_7B, t_gyr=i))
+
+    with cache_files("sqlite"):
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(exoplanet.list_cached_exoplanets()) == 8 * 25
+        assert exoplanet.get_from_cache("Star-3", "7b")["t_gyr"] == 7
+
+
+def test_json_cache_is_parsed_once():
+    """Repeated JSON cache lookups reuse the parsed file until it changes on disk."""
+    parses = []
+    json_load = json.load
+
+    def counting_load(f):
+        parses.append(f.name)
+        return json_load(f)
+
+    with cache_files("json"):
+        with open(exoplanet.CACHE_FILE, 'w') as f:
+            json.dump({"kepler_7b": KEPLER_7B}, f)
+
+        exoplanet.json.load = counting_load
+        try:
+            for _ in range(100):
+                assert exoplanet.get_exoplanet_data("Kepler", "7b") == KEPLER_7B
+            assert len(parses) == 1
+
+            # Writes through the cache functions keep the parsed copy current
+            exoplanet.add_to_cache("WASP-12", "b", KEPLER_7B)
+            assert exoplanet.get_from_cache("wasp-12", "b") == KEPLER_7B
+            assert len(parses) == 1
+
+            # A change by another process is picked up
+            with open(exoplanet.CACHE_FILE, 'w') as f:
+                json.dump({"kepler_8b": dict(KEPLER_7B, t_gyr=3.84)}, f)
+            assert exoplanet.get_from_cache("Kepler", "8b")["t_gyr"] == 3.84
+            assert exoplanet.get_from_cache("WASP-12", "b") is None
+            assert len(parses) == 2
+
+            # Changing a returned entry does not change the cache
+            exoplanet.get_from_cache("Kepler", "8b")["t_gyr"] = 1.0
+            exoplanet.read_cache()["kepler_8b"] = None
+            assert exoplanet.get_from_cache("Kepler", "8b")["t_gyr"] == 3.84
+        finally:
+            exoplanet.json.load = json_load
+
+
+def test_cache_entries_are_copied():
+    """Changing data passed to or returned by the cache does not change the cached entries."""
+    for backend in ("json", "journal"):
+        with cache_files(backend):
+            data = dict(KEPLER_7B)
+            exoplanet.add_to_cache("WASP-12", "b", data)
+            data["t_gyr"] = 99
+            assert exoplanet.get_from_cache("WASP-12", "b")["t_gyr"] == 3.5
+
+            exoplanet.read_cache()["wasp-12_b"]["t_gyr"] = -1
+            assert exoplanet.get_from_cache("WASP-12", "b")["t_gyr"] == 3.5
+
+            exoplanet.get_exoplanet_data("Kepler", "7b")["t_gyr"] = -1
+            assert exoplanet.get_exoplanet_data("Kepler", "7b")["t_gyr"] == 3.5
+            assert exoplanet.read_cache()["kepler_7b"]["t_gyr"] == 3.5
+
+
+def test_corrupt_json_cache_is_kept():
+    """An unreadable JSON cache is moved aside instead of being overwritten by the next write."""
+    with cache_files("json"):
+        with open(exoplanet.CACHE_FILE, 'w') as f:
+            f.write('{"kepler_7b": {"Restrela": 1.7')
+
+        exoplanet.add_to_cache("WASP-12", "b", KEPLER_7B)
+        assert exoplanet.read_cache() == {"wasp-12_b": KEPLER_7B}
+        with open(f"{exoplanet.CACHE_FILE}.corrupt") as f:
+            assert f.read().startswith('{"kepler_7b"')
+
+    # If the file cannot be moved aside, reads still fall back to an empty cache
+    with cache_files("json"):
+        with open(exoplanet.CACHE_FILE, 'w') as f:
+            f.write('{"kepler_7b": {"Restrela": 1.7')
+        os.makedirs(os.path.join(f"{exoplanet.CACHE_FILE}.corrupt", "taken"))
+        assert exoplanet.read_cache() == {}
+        assert exoplanet.get_from_cache("Kepler", "7b") is None
+
+
+def test_journal_cache():
+    """The journal backend appends writes and compacts them into the JSON snapshot."""
+    with cache_files("journal"):
+        with open(exoplanet.CACHE_FILE, 'w') as f:
+            json.dump({"kepler_7b": KEPLER_7B, "trappist-1_e": dict(KEPLER_7B, t_gyr=7.6)}, f)
+
+        exoplanet.add_to_cache("WASP-12", "b", KEPLER_7B)
+        exoplanet.add_to_cache("Kepler", "7b", dict(KEPLER_7B, t_gyr=4.0))
+        assert exoplanet.remove_from_cache("TRAPPIST-1", "e")
+        assert not exoplanet.remove_from_cache("TRAPPIST-1", "e")
+        assert exoplanet.read_cache() == {"kepler_7b": dict(KEPLER_7B, t_gyr=4.0), "wasp-12_b": KEPLER_7B}
+
+        # Writes only append to the journal; the snapshot is untouched until compaction
+        journal_path = exoplanet.get_journal_cache().journal_path
+        with open(journal_path) as f:
+            assert len(f.readlines()) == 3
+        with open(exoplanet.CACHE_FILE) as f:
+            assert "trappist-1_e" in json.load(f)
+
+        # A line cut short by a crash is skipped, and the next write starts on a new line
+        with open(journal_path, 'a') as f:
+            f.write('{"key": "kepler_8b", "da')
+        assert exoplanet.get_from_cache("Kepler", "8b") is None
+        exoplanet.add_to_cache("Kepler", "8b", KEPLER_7B)
+        exoplanet._journal_cache = None
+        assert exoplanet.get_from_cache("Kepler", "8b") == KEPLER_7B
+
+        exoplanet.compact_cache()
+        assert os.path.getsize(journal_path) == 0
+        with open(exoplanet.CACHE_FILE) as f:
+            assert json.load(f) == exoplanet.read_cache()
+        assert [planet["full_name"] for planet in exoplanet.list_cached_exoplanets()] == [
+            "kepler 7b", "wasp-12 b", "kepler 8b"]
+
+        assert exoplanet.clear_cache()
+        assert exoplanet.read_cache() == {}
+        exoplanet.write_cache({"kepler_7b": KEPLER_7B})
+        assert exoplanet.get_from_cache("Kepler", "7b") == KEPLER_7B
+
+
+def _journal_writer(cache_file, worker):
+    """Write 25 exoplanets to the journal at cache_file, compacting every few kilobytes."""
+    cache = JournalCache(cache_file, compact_bytes=4096)
+    for i in range(25):
+        cache.put(f"star-{worker}_{i}b", dict(KEPLER_7B, t_gyr=i))
+
+
+def test_journal_cache_concurrent_processes():
+    """Processes appending to and compacting the same journal do not lose each other's entries."""
+    with cache_files("journal"):
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=_journal_writer, args=(exoplanet.CACHE_FILE, worker))
+                     for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+
+        assert len(exoplanet.read_cache()) == 4 * 25
+        assert exoplanet.get_from_cache("Star-3", "7b")["t_gyr"] == 7
+
+
+def archive_row(name, host, letter, rowupdate, **values):
+    """NASA Exoplanet Archive row as returned by a JSON TAP query."""
+    row = {"pl_name": name, "hostname": host, "pl_letter": letter, "rowupdate": rowupdate,
+           "st_rad": 1.0, "st_mass": 1.0, "pl_rade": 1.0, "pl_bmasse": 1.0, "pl_orbsmax": 1.0,
+           "pl_orbeccen": 0.0, "st_age": 4.56}
+    row.update(values)
+    return row
+
+
+@contextmanager
+def tap_server(rows):
+    """
+    Local stand-in for the archive TAP endpoint.
+
+    It answers with the rows updated since the queried date, or with the rows of the planet names
+    listed in an IN (...) condition.
+    """
+    queries = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)["query"][0]
+            queries.append(query)
+            since = re.search(r"rowupdate >= '([^']*)'", query)
+            names = re.search(r"IN \(([^)]*)\)", query)
+            if names:
+                names = set(re.findall(r"'([^']*)'", names.group(1)))
+                selected = [row for row in rows if row["pl_name"].upper() in names
+                            or f"{row['hostname']} {row['pl_letter']}".upper() in names]
+            else:
+                selected = [row for row in rows if not since or row["rowupdate"] >= since.group(1)]
+            body = json.dumps(selected).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/TAP/sync", queries
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_archive_mirror_sync():
+    """The archive mirror downloads the table once, then only changed rows, and answers lookups locally."""
+    rows = [
+        archive_row("Kepler-7 b", "Kepler-7", "b", "2023-12-01", st_rad=1.84, pl_bmasse=140.0, st_raderr1=0.07),
+        archive_row("TRAPPIST-1 e", "TRAPPIST-1", "e", "2024-01-15", st_age=None),
+    ]
+    with cache_files("json"), tap_server(rows) as (url, queries):
+        assert exoplanet.query_archive_mirror("Kepler-7 b") is None
+        assert main(["sync-archive", "--tap-url", url]) == 0
+        assert queries == [f"SELECT pl_name,hostname,pl_letter,rowupdate,{','.join(exoplanet.NASA_ARCHIVE_VALUE_COLUMNS)} "
+                           f"FROM ps WHERE default_flag = 1"]
+
+        data = exoplanet.get_exoplanet_data("Kepler-7", "b")
+        assert data["Restrela"] == 1.84 and data["MplanetaEarth"] == 140.0
+        assert data["Restrela_err1"] == 0.07 and "Restrela_err2" not in data
+        assert exoplanet.query_archive_mirror("kepler-7 B") == data
+        assert exoplanet.get_from_cache("Kepler-7", "b") is None
+        # A row without a required value is left to the online archives
+        assert exoplanet.get_archive_mirror().find("TRAPPIST-1 e")["st_age"] is None
+        assert exoplanet.query_archive_mirror("TRAPPIST-1 e") is None
+
+        # Later syncs only fetch the rows updated since the newest mirrored one
+        rows[1] = archive_row("TRAPPIST-1 e", "TRAPPIST-1", "e", "2024-03-02", st_age=7.6)
+        rows.append(archive_row("WASP-12 b", "WASP-12", "b", "2024-03-01"))
+        assert exoplanet.sync_archive_mirror(tap_url=url) == 2
+        assert queries[-1].endswith("WHERE default_flag = 1 AND rowupdate >= '2024-01-15'")
+        assert exoplanet.query_archive_mirror("TRAPPIST-1 e")["t_gyr"] == 7.6
+        assert exoplanet.get_archive_mirror().info()["rows"] == 3
+        assert exoplanet.get_archive_mirror().info()["last_rowupdate"] == "2024-03-02"
+
+        assert exoplanet.sync_archive_mirror(tap_url=url, full=True) == 3
+        assert exoplanet.get_archive_mirror().info()["rows"] == 3
+
+
+def test_get_exoplanet_data_many():
+    """Planets missing from the cache are resolved with one archive query per chunk of names."""
+    rows = [archive_row(f"Star-{i} b", f"Star-{i}", "b", "2024-01-01", pl_bmasse=float(i)) for i in range(5)]
+    tap_url = exoplanet.NASA_TAP_URL
+    with cache_files("json"), tap_server(rows) as (url, queries):
+        exoplanet.NASA_TAP_URL = url
+        try:
+            exoplanet.add_to_cache("Star-0", "b", KEPLER_7B)
+            planets = [("Star-0", "b"), ("Kepler", "7b"), ("Star-1", "b"), ("Star-2", "b"),
+                       ("star-2", "B"), ("Star-3", "b"), ("Star-4", "b")]
+
+            results = exoplanet.get_exoplanet_data_many(planets, chunk_size=2)
+            assert list(results) == planets
+            assert results[("Star-0", "b")] == KEPLER_7B
+            assert results[("Kepler", "7b")] == KEPLER_7B
+            assert [results[planet]["MplanetaEarth"] for planet in planets[2:]] == [1.0, 2.0, 2.0, 3.0, 4.0]
+            # Star-2 b is requested once, whatever the case of its name
+            assert len(queries) == 2 and all("IN (" in query for query in queries)
+
+            # The planets found are cached, so a second call needs no query
+            assert exoplanet.get_exoplanet_data_many(planets) == results
+            assert len(queries) == 2
+            assert exoplanet.get_from_cache("Star-4", "b")["MplanetaEarth"] == 4.0
+
+            output = os.path.join(os.path.dirname(exoplanet.CACHE_FILE), "results.csv")
+            assert main(["batch", "--planets", "Star-1 b", "Star-4 b", "-o", output, "--workers", "1"]) == 0
+            assert len(queries) == 2
+            with open(output) as f:
+                assert len(f.readlines()) == 3
+        finally:
+            exoplanet.NASA_TAP_URL = tap_url
+
+
+if __name__ == "__main__":
+    test_sqlite_cache()
+    test_sqlite_cache_concurrent_writers()
+    test_json_cache_is_parsed_once()
+    test_cache_entries_are_copied()
+    test_corrupt_json_cache_is_kept()
+    test_journal_cache()
+    test_journal_cache_concurrent_processes()
+    test_archive_mirror_sync()
+    test_get_exoplanet_data_many()
+    logger.info("Test completed successfully!")
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized mass loss engines.
+This script checks the batched calculations against the per-planet calculators.
+"""
+
+import numpy as np
+import pandas as pd
+
+from exoplanet_loss.batch import calculate_total_mass_loss_row, run_parallel
+from exoplanet_loss.cli import run_batch, split_planet_name
+from exoplanet_loss.calculador_final import (
+    calculate_mass_loss,
+    calculate_mass_loss_batch,
+    calculate_system_mass_loss,
+    sweep,
+)
+from exoplanet_loss.data.exoplanet import extract_uncertainties
+from exoplanet_loss.emulator import MassLossEmulator, estimate_total_mass_loss
+from exoplanet_loss.monte_carlo import monte_carlo_mass_loss
+from exoplanet_loss.pipeline import read_chunks, stream_mass_loss
+from exoplanet_loss.calculators.densidade_wind_stellar import rho_w
+from exoplanet_loss.calculators.lx_age_calculator import calculate_xray_luminosity, calculate_coronal_temperature_and_fx
+from exoplanet_loss.calculators.photoevap_calculator import calculo_perda_fotoevaporacao
+from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import wind_velocity_at
+from exoplanet_loss.calculators.total_mass_loss_calculator import (
+    AU_TO_CM,
+    G,
+    SOLAR_RADIUS_TO_CM,
+    TotalMassLossCalculator,
+    calculate_total_mass_loss,
+    calculate_mass_loss_rates,
+)
+from exoplanet_loss.calculators.txc_mass_loss_stellar_wind import calcular_taxa_perda_de_massa_interacao_vento_solar
+from exoplanet_loss.utils.logging import configure_logging, get_logger
+
+# Configure logging
+configure_logging()
+logger = get_logger(__name__)
+
+# Constants
+Rsun = 6.957e10  # cm
+Msun = 1.98e30  # kg
+Rearth = 6.371e8  # cm
+Mearth = 5.97e27  # grams
+
+# Kepler 7b and two made-up planets
+PLANETS = {
+    "Restrela": np.array([1.78, 0.5, 1.0]),
+    "Mestrela": np.array([1.41, 0.4, 1.0]),
+    "t_gyr": np.array([3.5, 2.0, 4.56]),
+    "RplanetaEarth": np.array([18.18, 2.0, 1.0]),
+    "MplanetaEarth": np.array([140.0, 5.0, 1.0]),
+    "EixoMaiorPlaneta": np.array([0.06067, 0.02, 1.0]),
+    "Excentricidade": np.array([0.026, 0.1, 0.0167]),
+}
+
+
+def total_mass_loss_calculator(i, **kwargs):
+    """TotalMassLossCalculator for planet i of PLANETS."""
+    return TotalMassLossCalculator(
+        planet_radius_cm=PLANETS["RplanetaEarth"][i] * Rearth,
+        planet_mass_g=PLANETS["MplanetaEarth"][i] * Mearth,
+        planet_orbital_distance_au=PLANETS["EixoMaiorPlaneta"][i],
+        eccentricity=PLANETS["Excentricidade"][i],
+        stellar_radius_cm=PLANETS["Restrela"][i] * Rsun,
+        stellar_mass_kg=PLANETS["Mestrela"][i] * Msun,
+        **kwargs
+    )
+
+
+def scalar_rates(i, age, efficiency_factor=0.3):
+    """Rates of planet i of PLANETS at one age, from one scalar call per quantity."""
+    distance_au = PLANETS["EixoMaiorPlaneta"][i]
+    planet_radius = PLANETS["RplanetaEarth"][i] * Rearth
+    lx = calculate_xray_luminosity(age)
+    t_cor, fx = calculate_coronal_temperature_and_fx(lx, PLANETS["Restrela"][i] * Rsun)
+    velocity = float(wind_velocity_at(distance_au, t_cor, PLANETS["Mestrela"][i] * Msun)) * 1e5
+    density = rho_w(distance_au * AU_TO_CM / SOLAR_RADIUS_TO_CM, age)
+    return {
+        "x_ray_luminosities": lx,
+        "fx_values": fx,
+        "temperatures": t_cor,
+        "wind_velocities": velocity,
+        "wind_densities": density,
+        "wind_mass_loss_rates": calcular_taxa_perda_de_massa_interacao_vento_solar(planet_radius, density, velocity),
+        "photoevap_mass_loss_rates": calculo_perda_fotoevaporacao(
+            n=efficiency_factor, L_x=lx, R_p=planet_radius, G=G, M_p=PLANETS["MplanetaEarth"][i] * Mearth,
+            a=distance_au * AU_TO_CM, e=PLANETS["Excentricidade"][i]),
+    }
+
+
+def test_rates_broadcast_over_planets():
+    """(N, 1) planet parameters should give the same rates as scalar calculations at each age."""
+    ages = TotalMassLossCalculator.FIXED_AGE_POINTS
+    rates = calculate_mass_loss_rates(
+        ages,
+        planet_radius_cm=PLANETS["RplanetaEarth"][:, None] * Rearth,
+        planet_mass_g=PLANETS["MplanetaEarth"][:, None] * Mearth,
+        planet_orbital_distance_au=PLANETS["EixoMaiorPlaneta"][:, None],
+        eccentricity=PLANETS["Excentricidade"][:, None],
+        stellar_radius_cm=PLANETS["Restrela"][:, None] * Rsun,
+        stellar_mass_kg=PLANETS["Mestrela"][:, None] * Msun,
+    )
+
+    for i in range(len(PLANETS["t_gyr"])):
+        expected = [scalar_rates(i, age) for age in ages]
+        _, _, _, results_data = total_mass_loss_calculator(i, min_age=ages[0], max_age=ages[-1]).calculate_mass_loss()
+        for key, values in rates.items():
+            assert values.shape == (len(PLANETS["t_gyr"]), len(ages))
+            reference = [rates_at_age[key] for rates_at_age in expected]
+            assert np.allclose(values[i], reference, rtol=1e-12), key
+            assert np.allclose(results_data[key], reference, rtol=1e-12), key
+
+
+def planet_dicts(i):
+    """star_data and planet_data dictionaries for planet i of PLANETS."""
+    star_data = {key: float(PLANETS[key][i]) for key in ("Restrela", "Mestrela", "t_gyr")}
+    planet_data = {key: float(PLANETS[key][i]) for key in
+                   ("RplanetaEarth", "MplanetaEarth", "EixoMaiorPlaneta", "Excentricidade")}
+    return star_data, planet_data
+
+
+def test_batch_matches_calculate_mass_loss():
+    """calculate_mass_loss_batch should agree with calculate_mass_loss row by row."""
+    batch = calculate_mass_loss_batch(PLANETS, efficiency_factor=0.5)
+    frame = calculate_mass_loss_batch(pd.DataFrame(PLANETS, index=["a", "b", "c"]), efficiency_factor=0.5)
+    assert list(frame.index) == ["a", "b", "c"]
+
+    for i in range(len(PLANETS["t_gyr"])):
+        results = calculate_mass_loss(*planet_dicts(i), efficiency_factor=0.5)
+        for key, values in batch.items():
+            assert np.isclose(values[i], results[key], rtol=1e-10), key
+            assert frame[key].iloc[i] == values[i]
+
+    try:
+        calculate_mass_loss_batch({"Restrela": [1.0]})
+    except ValueError as e:
+        assert "Missing required fields" in str(e)
+    else:
+        raise AssertionError("Missing columns should raise ValueError")
+
+
+def test_sweep_matches_calculate_mass_loss():
+    """Every grid point of a sweep should match a direct calculate_mass_loss call."""
+    efficiency_factors = np.linspace(0.25, 1.0, 4)
+    initial_velocities = [1e3, 5e3, 1e4]
+    grid = sweep(*planet_dicts(0), efficiency_factors, initial_velocities)
+
+    assert grid["dims"] == ("efficiency_factor", "initial_velocity")
+    assert grid["values"]["total_mass_loss"].shape == (4, 3)
+    for i, n in enumerate(efficiency_factors):
+        for j, velocity in enumerate(initial_velocities):
+            results = calculate_mass_loss(*planet_dicts(0), efficiency_factor=n, initial_velocity=velocity)
+            for key, values in grid["values"].items():
+                assert np.isclose(values[i, j], results[key], rtol=1e-10), key
+
+    star_data = {key: PLANETS[key] for key in ("Restrela", "Mestrela", "t_gyr")}
+    planet_data = {key: PLANETS[key] for key in ("RplanetaEarth", "MplanetaEarth", "EixoMaiorPlaneta", "Excentricidade")}
+    grid = sweep(star_data, planet_data, efficiency_factors)
+    assert grid["dims"] == ("planet", "efficiency_factor", "initial_velocity")
+    assert np.allclose(grid["values"]["mass_loss_photoev"][:, 1, 0],
+                       calculate_mass_loss_batch(PLANETS, efficiency_factor=efficiency_factors[1])["mass_loss_photoev"],
+                       rtol=1e-12)
+
+
+def test_system_mass_loss_matches_single_planets():
+    """Planets of one star calculated together should match calculate_mass_loss for each planet."""
+    star_data, planet_data = planet_dicts(0)
+    planets = [planet_data, {**planet_data, "EixoMaiorPlaneta": 0.02, "RplanetaEarth": 2.0, "MplanetaEarth": 5.0},
+               {**planet_data, "EixoMaiorPlaneta": 0.3, "Excentricidade": 0.2}]
+    system = calculate_system_mass_loss(star_data, planets, efficiency_factor=0.5)
+
+    assert len(system) == len(planets)
+    for planet_data, results in zip(planets, system):
+        expected = calculate_mass_loss(star_data, planet_data, efficiency_factor=0.5)
+        for key, value in expected.items():
+            if key in ("density_vs_distance", "stellar_wind_mass_loss", "photoevaporation_mass_loss"):
+                for series, values in value.items():
+                    assert np.allclose(results[key][series], values, rtol=1e-10), (key, series)
+            elif key != "velocity_vs_distance":
+                assert np.isclose(results[key], value, rtol=1e-10), key
+        # One velocity profile covers every planet of the system
+        assert results["velocity_vs_distance"]["distances"][-1] == 4 * 0.3
+        assert np.isclose(results["velocity_vs_distance"]["velocity"], expected["velocity_vs_distance"]["velocity"])
+
+    try:
+        calculate_system_mass_loss(star_data, [{"RplanetaEarth": 1.0}])
+    except ValueError as e:
+        assert "Missing required fields" in str(e)
+    else:
+        raise AssertionError("Missing fields should raise ValueError")
+
+
+def test_run_parallel_groups_planets_by_host():
+    """Planets sharing a hostname are calculated together with the same results as one at a time."""
+    rows = pd.DataFrame(PLANETS).to_dict("records")
+    rows = [dict(rows[0], hostname="Kepler-7"), dict(rows[1], hostname="K2-1"),
+            dict(rows[0], hostname="Kepler-7", EixoMaiorPlaneta=0.3), dict(rows[2], hostname=None),
+            dict(rows[1], hostname="K2-1", RplanetaEarth=3.0, MplanetaEarth=8.0)]
+
+    results = run_parallel(rows, workers=1, chunk_size=1)
+
+    for row, result in zip(rows, results):
+        assert result["error"] is None
+        assert result["hostname"] == row["hostname"]
+        expected = calculate_total_mass_loss_row(row)
+        for key, value in expected.items():
+            assert np.isclose(result[key], value, rtol=1e-10), key
+
+
+def test_monte_carlo_percentiles():
+    """Monte Carlo percentiles should be reproducible, ordered and collapse without uncertainties."""
+    table = pd.DataFrame(PLANETS)
+    exact = calculate_mass_loss_batch(table)
+    fixed = monte_carlo_mass_loss(table, num_samples=20, seed=0)
+    for column in fixed:
+        assert np.allclose(fixed[column], exact[column.rsplit("_p", 1)[0]], rtol=1e-12), column
+
+    uncertainties = extract_uncertainties({"st_rad": 1.78, "st_raderr1": 0.1, "st_raderr2": -0.2,
+                                           "st_ageerr1": 1.0, "st_ageerr2": -1.0, "pl_orbeccenerr1": None})
+    assert uncertainties == {"Restrela_err1": 0.1, "Restrela_err2": -0.2, "t_gyr_err1": 1.0, "t_gyr_err2": -1.0}
+    for column, value in uncertainties.items():
+        table[column] = value
+    table["Excentricidade_err1"] = 0.05
+
+    results = monte_carlo_mass_loss(table, num_samples=500, seed=42, chunk_size=500)
+    assert results.equals(monte_carlo_mass_loss(table, num_samples=500, seed=42))
+    assert list(results.index) == list(table.index)
+    percentiles = results[[f"total_mass_loss_p{p}" for p in (2.5, 16, 50, 84, 97.5)]].to_numpy()
+    assert np.all(np.diff(percentiles, axis=1) > 0)
+    assert np.all((percentiles[:, 0] < exact["total_mass_loss"]) & (exact["total_mass_loss"] < percentiles[:, -1]))
+
+
+def test_emulator_matches_exact_engine(tmp_path):
+    """Emulated wind mass loss should be within its error estimate and fall back outside the grid."""
+    path = str(tmp_path / "emulator.npz")
+    MassLossEmulator.build(np.geomspace(1.0, 2.0, 6), np.geomspace(1.0, 2.0, 6),
+                           np.geomspace(2.0, 5.0, 8), np.geomspace(0.04, 0.1, 10)).save(path)
+    emulator = MassLossEmulator.load(path)
+
+    # Kepler 7b is inside the grid
+    args = (18.18 * Rearth, 140 * Mearth, 0.06067, 0.026, 1.78 * Rsun, 1.41 * Msun)
+    # The emulator integrates photoevaporation in closed form and the wind rates on the age nodes
+    methods = {"photoevap_method": "analytic", "wind_method": "linear"}
+    total_mass_loss, wind_mass_loss, photoevap_mass_loss, _ = calculate_total_mass_loss(*args, max_age=3.5, **methods)
+    results = estimate_total_mass_loss(*args, max_age=3.5, emulator=emulator, tolerance=np.inf)
+    assert results["source"] == "emulator"
+    assert np.isclose(results["photoevap_mass_loss"], photoevap_mass_loss, rtol=1e-10)
+    assert abs(results["wind_mass_loss"] / wind_mass_loss - 1) < max(2 * results["estimated_error"], 1e-6)
+
+    # Too strict a tolerance, and points outside the grid, use the exact engine
+    for kwargs in ({"tolerance": 0.0}, {"max_age": 8.0}):
+        results = estimate_total_mass_loss(*args, **{"max_age": 3.5, "emulator": emulator, **kwargs})
+        expected = calculate_total_mass_loss(*args, max_age=kwargs.get("max_age", 3.5), **methods)
+        assert results["source"] == "exact"
+        assert results["total_mass_loss"] == expected[0]
+
+
+def test_run_parallel_keeps_order_and_captures_errors():
+    """Results come back in input order and a bad row does not abort the run."""
+    rows = pd.DataFrame(PLANETS).to_dict("records")
+    rows.insert(1, {"Restrela": 1.0})
+
+    results = run_parallel(rows, workers=2, chunk_size=2)
+
+    assert len(results) == len(rows)
+    assert "Missing required fields" in results[1]["error"]
+    for row, result in zip(rows[:1] + rows[2:], results[:1] + results[2:]):
+        assert result["error"] is None
+        assert result["t_gyr"] == row["t_gyr"]
+        assert result["total_mass_loss"] == calculate_total_mass_loss_row(row)["total_mass_loss"]
+
+
+def test_stream_mass_loss_csv(tmp_path):
+    """Streaming a CSV in small chunks should give the same results as one batch."""
+    input_path = str(tmp_path / "planets.csv")
+    output_path = str(tmp_path / "results.csv")
+    pd.DataFrame(PLANETS).to_csv(input_path, index=False)
+
+    rows = stream_mass_loss(input_path, output_path, chunk_size=2)
+
+    assert rows == len(PLANETS["t_gyr"])
+    assert [len(chunk) for chunk in read_chunks(input_path, chunk_size=2)] == [2, 1]
+    results = pd.read_csv(output_path)
+    expected = calculate_mass_loss_batch(PLANETS)
+    assert list(results["t_gyr"]) == list(PLANETS["t_gyr"])
+    assert np.allclose(results["total_mass_loss"], expected["total_mass_loss"], rtol=1e-12)
+
+
+def test_stream_mass_loss_csv_to_parquet(tmp_path):
+    """Chunks whose CSV columns look like integers in one chunk and floats in the next go to one Parquet file."""
+    input_path = str(tmp_path / "planets.csv")
+    output_path = str(tmp_path / "results.parquet")
+    with open(input_path, "w") as f:
+        f.write("Restrela,Mestrela,t_gyr,RplanetaEarth,MplanetaEarth,EixoMaiorPlaneta,Excentricidade\n")
+        f.write("1,1,5,1,1,1,0\n")
+        f.write("1.78,1.41,3.5,18.18,140,0.06067,0.026\n")
+
+    assert stream_mass_loss(input_path, output_path, chunk_size=1) == 2
+    results = pd.read_parquet(output_path)
+    assert results["Excentricidade"].dtype == np.float64
+    assert list(results["Excentricidade"]) == [0.0, 0.026]
+    expected = calculate_mass_loss_batch(pd.read_csv(input_path))
+    assert np.allclose(results["total_mass_loss"], expected["total_mass_loss"], rtol=1e-12)
+
+    # An input without rows gives an empty file with every column
+    empty_csv = str(tmp_path / "empty.csv")
+    pd.DataFrame({column: [] for column in PLANETS}).to_csv(empty_csv, index=False)
+    assert stream_mass_loss(empty_csv, str(tmp_path / "empty.parquet")) == 0
+    empty = pd.read_parquet(str(tmp_path / "empty.parquet"))
+    assert len(empty) == 0 and list(empty.columns) == list(results.columns)
+    empty_parquet = str(tmp_path / "empty_input.parquet")
+    pd.DataFrame({column: pd.Series([], dtype=float) for column in PLANETS}).to_parquet(empty_parquet)
+    assert stream_mass_loss(empty_parquet, str(tmp_path / "empty_again.parquet")) == 0
+    assert list(pd.read_parquet(str(tmp_path / "empty_again.parquet")).columns) == list(results.columns)
+
+
+def test_run_batch_resumes_from_checkpoint(tmp_path):
+    """A resumed run should drop partial output and give the same file as an uninterrupted one."""
+    inputs = pd.DataFrame(PLANETS)
+    full_path = str(tmp_path / "full.csv")
+    output_path = str(tmp_path / "results.csv")
+
+    assert run_batch(inputs, full_path, workers=1, chunk_size=1, input_id="catalog") == 3
+
+    # Simulate a run that stopped after the first planet, in the middle of writing the second
+    run_batch(inputs.iloc[:1], output_path, workers=1, chunk_size=1, input_id="catalog")
+    with open(output_path, "a") as f:
+        f.write("partial,row")
+
+    assert run_batch(inputs, output_path, workers=1, chunk_size=1, input_id="catalog") == 2
+    with open(full_path) as full, open(output_path) as resumed:
+        assert resumed.read() == full.read()
+
+    # A checkpoint of another input is not resumed
+    assert run_batch(inputs, output_path, workers=1, chunk_size=1, input_id="other") == 3
+
+    results = pd.read_csv(output_path)
+    assert results["error"].isna().all()
+    assert np.isclose(results["total_mass_loss"].iloc[0],
+                      calculate_total_mass_loss_row(inputs.iloc[0].to_dict())["total_mass_loss"], rtol=1e-12)
+
+    assert split_planet_name("TRAPPIST-1 e") == ("TRAPPIST-1", "e")
+
+
+if __name__ == "__main__":
+    test_rates_broadcast_over_planets()
+    test_batch_matches_calculate_mass_loss()
+    test_sweep_matches_calculate_mass_loss()
+    test_system_mass_loss_matches_single_planets()
+    test_monte_carlo_percentiles()
+    test_run_parallel_keeps_order_and_captures_errors()
+    test_run_parallel_groups_planets_by_host()
+    logger.info("Test completed successfully!")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the Parker wind velocity solvers.
+This script checks the closed-form Lambert W solver against the fsolve tracker.
+"""
+
+import numpy as np
+
+from exoplanet_loss.calculators.stellar_wind_velocity_by_distance import (
+    AU, G, kB, mp,
+    generate_velocity_vs_distance_data,
+    load_parker_table,
+    parker_table_error_bound,
+    save_parker_table,
+    solve_solar_wind_velocity_lambertw,
+    solve_solar_wind_velocity_table,
+    solve_solar_wind_velocity_tracking,
+    wind_velocity_at,
+    wind_velocity_cache_info,
+    clear_wind_velocity_cache,
+)
+from exoplanet_loss.utils.cache import LRUCache
+from exoplanet_loss.utils.logging import configure_logging, get_logger
+
+# Configure logging
+configure_logging()
+logger = get_logger(__name__)
+
+# Kepler 7b host star at 3.5 Gyr
+T_CORONA = 894350.29  # K
+M_STAR = 1.41 * 1.98e30  # kg
+
+
+def sonic_radius_au(T, Mstar):
+    """Radius [AU] where the two branches of the repo's Parker equation meet."""
+    return G * Mstar / (2 * kB * T / mp) * np.exp(-0.5) / AU
+
+
+def test_lambertw_matches_fsolve_tracker():
+    """The closed form should reproduce the tracker on the transonic branch."""
+    r_au = np.linspace(0.005, 0.06067 * 4, 1000)
+    v_fsolve = solve_solar_wind_velocity_tracking(r_au, T_CORONA, M_STAR, 5e3)
+    v_lambertw = solve_solar_wind_velocity_lambertw(r_au, T_CORONA, M_STAR)
+
+    r_sonic = sonic_radius_au(T_CORONA, M_STAR)
+    outside = r_au > 1.01 * r_sonic
+    max_rel_diff = np.max(np.abs(v_fsolve[outside] - v_lambertw[outside]) / v_lambertw[outside])
+    logger.info(f"Max relative difference outside the sonic radius: {max_rel_diff:.2e}")
+    assert max_rel_diff < 1e-8
+
+    # Inside the sonic radius there is no real root and both solvers stay near the sound speed
+    inside = r_au < r_sonic
+    cs = np.sqrt(2 * kB * T_CORONA / mp)
+    assert np.allclose(v_lambertw[inside], cs)
+    assert np.allclose(v_fsolve[inside], cs, rtol=1e-2)
+
+
+def test_lambertw_profile_is_ascending():
+    """The closed-form profile is monotonic and exact at the planet's distance."""
+    _, velocities, velocity, _ = generate_velocity_vs_distance_data(
+        T_CORONA, 0.06067, 0.005, 0.06067 * 4, M_STAR, num_points=1000, method="lambertw")
+
+    assert np.all(np.diff(velocities) >= 0)
+    assert velocity == solve_solar_wind_velocity_lambertw(0.06067, T_CORONA, M_STAR)
+
+    try:
+        generate_velocity_vs_distance_data(T_CORONA, 0.06067, 0.005, 0.2, M_STAR, method="newton")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unknown solver method should raise ValueError")
+
+
+def test_lookup_table_within_error_bound():
+    """The lookup table should agree with the closed form to within its reported error bound."""
+    error_bound = parker_table_error_bound()
+    logger.info(f"Parker table interpolation error bound: {error_bound:.2e}")
+    assert error_bound < 1e-6
+
+    r_au = np.geomspace(1e-3, 1e3, 20000)
+    for T in (5e5, T_CORONA, 5e6, 2e7):
+        v_table = solve_solar_wind_velocity_table(r_au, T, M_STAR)
+        v_lambertw = solve_solar_wind_velocity_lambertw(r_au, T, M_STAR)
+        assert np.max(np.abs(v_table - v_lambertw) / v_lambertw) <= error_bound
+
+
+def test_lookup_table_save_and_load(tmp_path):
+    """A saved table should load back unchanged."""
+    path = str(tmp_path / "parker_velocity_table.npy")
+    save_parker_table(path)
+    loaded = load_parker_table(path)
+
+    assert loaded["error_bound"] == parker_table_error_bound()
+    assert loaded["table"].shape[0] == 2
+
+
+def test_wind_velocity_at_planet():
+    """A single-point query should land on the transonic branch with every method."""
+    for r_au in (0.01, 0.06067, 0.5, 5.0):
+        v_lambertw = wind_velocity_at(r_au, T_CORONA, M_STAR, method="lambertw")
+        assert abs(wind_velocity_at(r_au, T_CORONA, M_STAR) - v_lambertw) / v_lambertw < 1e-6
+        assert abs(wind_velocity_at(r_au, T_CORONA, M_STAR, method="fsolve") - v_lambertw) / v_lambertw < 1e-8
+
+
+def test_fsolve_profile_follows_transonic_branch():
+    """The fsolve profile is seeded at the sonic point, so the initial guess no longer matters."""
+    for T in (5e5, T_CORONA, 5e6, 2e7):
+        _, v_lambertw, _, _ = generate_velocity_vs_distance_data(
+            T, 0.06067, 0.005, 0.06067 * 4, M_STAR, num_points=1000, method="lambertw")
+        for v_initial in (1e2, 5e3, 1e6):
+            _, v_fsolve, velocity, final_initial_velocity = generate_velocity_vs_distance_data(
+                T, 0.06067, 0.005, 0.06067 * 4, M_STAR, v_initial_at_start=v_initial,
+                num_points=1000, method="fsolve")
+
+            assert final_initial_velocity == v_initial
+            assert np.allclose(v_fsolve, v_lambertw, rtol=1e-6)
+
+
+def test_wind_velocity_cache():
+    """Repeated queries for the same star should be served from the cache."""
+    clear_wind_velocity_cache()
+    first = wind_velocity_at(0.06067, T_CORONA, M_STAR)
+    second = wind_velocity_at(0.06067, T_CORONA * (1 + 1e-12), M_STAR)
+
+    info = wind_velocity_cache_info()
+    assert first == second
+    assert info["hits"] == 1 and info["misses"] == 1
+
+    cache = LRUCache(maxsize=2)
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_compute(key, lambda: key.upper())
+    assert cache.info() == {"hits": 1, "misses": 3, "evictions": 1, "size": 2, "maxsize": 2}
+    # "b" was the least recently used entry, so it is the one that was evicted
+    assert cache.get_or_compute("a", lambda: None) == "A"
+    assert cache.get_or_compute("b", lambda: None) is None
+
+
+if __name__ == "__main__":
+    test_lambertw_matches_fsolve_tracker()
+    test_lambertw_profile_is_ascending()
+    test_lookup_table_within_error_bound()
+    test_wind_velocity_at_planet()
+    test_fsolve_profile_follows_transonic_branch()
+    test_wind_velocity_cache()
+    logger.info("Test completed successfully!")